@@ -0,0 +1,190 @@
+"""
+strands Agent 풀
+
+질문마다 Agent를 새로 만들지 않고 (kb_id, region, allow_web) 설정별로 한 번 생성한 뒤
+재사용한다. 모델 클라이언트 생성, 도구 등록, TLS 연결 비용은 최초 1회만 발생한다.
+
+- 하나의 Agent는 한 번에 하나의 질문만 처리하므로 acquire()로 빌려 쓰고 반납한다.
+  대화 기록은 Agent에 남기지 않고, 대화 모드에서는 세션의 이전 대화를 빌릴 때 넣어 준다.
+- KB ID/리전이 바뀌면 이전 설정으로 만든 유휴 Agent는 폐기된다.
+- strands는 첫 생성 시점에 지연 로드한다 (GUI 블로킹 방지).
+- stream_agent()는 생성 중인 텍스트 조각을 콜백으로 넘겨준다 (토큰 스트리밍, 취소 가능).
+- 에이전트 생성, strands import, 도구 호출, 모델 추론 구간은 tracing span으로 기록된다.
+- KB ID/리전은 생성 시점에 retrieve 도구 입력으로 묶는다. 프로세스 환경 변수를 바꾸지 않으므로
+  설정이 다른 질문을 동시에 실행해도 서로의 KB를 조회하지 않는다.
+"""
+from __future__ import annotations
+
+import asyncio
+import threading
+import time
+from contextlib import contextmanager
+from typing import Any, Callable, Dict, Iterator, List, Optional, Tuple
+
+import aws_clients
+from cancellation import Cancelled
+from retrieve_cache import RetrieveCache
+from tracing import span, traced_tool
+
+MODEL_ID = "us.amazon.nova-lite-v1:0"
+CANCEL_POLL = 0.1  # 취소 신호 확인 간격(초)
+
+AgentKey = Tuple[str, Optional[str], bool]
+
+
+class AgentPool:
+    def __init__(self, model_id: str = MODEL_ID, max_idle_per_key: int = 2,
+                 retrieve_cache: Optional[RetrieveCache] = None):
+        self.model_id = model_id
+        self.max_idle_per_key = max_idle_per_key
+        self.retrieve_cache = retrieve_cache
+        self._lock = threading.Lock()
+        self._idle: Dict[AgentKey, List[Any]] = {}
+        self._active: Optional[Tuple[str, Optional[str]]] = None
+        self.created = 0
+        self.reused = 0
+
+    def retain(self, kb_id: str, region: Optional[str]):
+        """현재 설정(kb_id, region)과 다른 유휴 Agent를 모두 폐기한다."""
+        with self._lock:
+            self._active = (kb_id, region)
+            for key in [k for k in self._idle if k[:2] != self._active]:
+                del self._idle[key]
+
+    def clear(self):
+        with self._lock:
+            self._idle.clear()
+
+    def idle_count(self) -> int:
+        with self._lock:
+            return sum(len(v) for v in self._idle.values())
+
+    @contextmanager
+    def acquire(self, kb_id: str, region: Optional[str], allow_web: bool,
+                system_prompt: str, messages: Optional[List[Dict[str, Any]]] = None) -> Iterator[Any]:
+        """설정에 맞는 Agent를 빌려준다. 블록을 빠져나가면 풀에 반납된다.
+
+        messages를 주면 그 대화(대화 모드의 이전 질문/답변)에 이어서 시작한다.
+        """
+        self.retain(kb_id, region)
+        key: AgentKey = (kb_id, region, allow_web)
+
+        agent = None
+        with self._lock:
+            idle = self._idle.get(key)
+            if idle:
+                agent = idle.pop()
+                self.reused += 1
+        if agent is None:
+            with span("agent_build"):
+                agent = self._build(kb_id, region, allow_web, system_prompt)
+            with self._lock:
+                self.created += 1
+        else:
+            with span("agent_build", reused=True):
+                pass
+
+        # 재사용된 Agent에 이전 질문의 대화 기록이 남지 않도록 초기화
+        agent.messages.clear()
+        if messages:
+            agent.messages.extend(messages)
+        try:
+            yield agent
+        except BaseException:
+            # 실패한 Agent는 상태를 신뢰할 수 없으므로 반납하지 않는다
+            raise
+        else:
+            with self._lock:
+                if key[:2] != self._active:
+                    return
+                idle = self._idle.setdefault(key, [])
+                if len(idle) < self.max_idle_per_key:
+                    idle.append(agent)
+
+    def _build(self, kb_id: str, region: Optional[str], allow_web: bool, system_prompt: str):
+        with span("import", modules="strands"):
+            from strands import Agent
+            from strands.models import BedrockModel
+            from strands.tools import PythonAgentTool
+            from strands_tools import retrieve, http_request
+
+        def tool(module, func):
+            # 원래 도구와 같은 이름/스펙으로 등록하고 호출마다 span을 남긴다
+            spec = module.TOOL_SPEC
+            return PythonAgentTool(spec["name"], spec, traced_tool(spec["name"], func))
+
+        # 캐시가 있으면 캐시 래퍼를 거쳐 retrieve 호출
+        retrieve_func = self.retrieve_cache.wrap(retrieve.retrieve) if self.retrieve_cache else retrieve.retrieve
+        tools = [tool(retrieve, bind_knowledge_base(retrieve_func, kb_id, region))]
+        if allow_web:
+            tools.append(tool(http_request, http_request.http_request))
+
+        # 모델 클라이언트는 공유 세션에서 만들어 자격 증명 조회를 반복하지 않는다
+        model = BedrockModel(model_id=self.model_id, boto_session=aws_clients.get_session(region))
+        return Agent(
+            model=model,
+            system_prompt=system_prompt,
+            tools=tools,
+            callback_handler=None,
+        )
+
+
+def bind_knowledge_base(retrieve_func: Callable[..., Dict[str, Any]], kb_id: str,
+                        region: Optional[str]) -> Callable[..., Dict[str, Any]]:
+    """retrieve 도구 입력에 이 Agent의 KB ID/리전을 넣는다 (모델이 다른 값을 넣어도 덮어씀)."""
+
+    def retrieve(tool, **kwargs):
+        tool_input = dict(tool.get("input") or {}, knowledgeBaseId=kb_id)
+        if region:
+            tool_input["region"] = region
+        return retrieve_func(dict(tool, input=tool_input), **kwargs)
+
+    return retrieve
+
+
+def stream_agent(agent, prompt: str, on_chunk: Callable[[str], None],
+                 cancel: Optional[threading.Event] = None) -> Tuple[str, Optional[float]]:
+    """Agent.stream_async로 응답을 받아 텍스트 조각마다 on_chunk를 호출한다.
+
+    cancel이 설정되면 (모델 응답이나 도구 실행을 기다리는 중이어도) 스트림을 중단하고 Cancelled를 던진다.
+    반환: (최종 응답 텍스트, 첫 토큰까지 걸린 시간(초) 또는 None)
+    """
+    started = time.perf_counter()
+    chunks: List[str] = []
+    state: Dict[str, Any] = {"ttft": None, "result": None}
+
+    async def consume():
+        async for event in agent.stream_async(prompt):
+            data = event.get("data")
+            if data:
+                if state["ttft"] is None:
+                    state["ttft"] = time.perf_counter() - started
+                chunks.append(data)
+                on_chunk(data)
+            elif "result" in event:
+                state["result"] = event["result"]
+
+    async def run():
+        task = asyncio.ensure_future(consume())
+        while not task.done():
+            await asyncio.wait([task], timeout=CANCEL_POLL)
+            if cancel is not None and cancel.is_set() and not task.done():
+                task.cancel()
+                await asyncio.wait([task], timeout=1.0)
+                raise Cancelled()
+        task.result()
+
+    # 워커 스레드에는 이벤트 루프가 없으므로 호출마다 새로 만든다.
+    # asyncio.run과 달리 종료 시 기본 executor(진행 중인 모델/도구 호출 스레드)를 기다리지 않아
+    # 취소가 즉시 반영된다.
+    with span("inference") as sp:
+        loop = asyncio.new_event_loop()
+        try:
+            loop.run_until_complete(run())
+        finally:
+            loop.run_until_complete(loop.shutdown_asyncgens())
+            loop.close()
+        if sp is not None and state["ttft"] is not None:
+            sp.attrs["ttft_ms"] = round(state["ttft"] * 1000)
+    text = str(state["result"]) if state["result"] is not None else "".join(chunks)
+    return text, state["ttft"]
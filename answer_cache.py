@@ -0,0 +1,113 @@
+"""
+질의응답 결과 캐시 (디스크, SQLite)
+
+같은 질문을 반복하면 retrieve + LLM 호출을 다시 하지 않고 저장된 응답을 돌려준다.
+
+- 키: 정규화한 질문 + kb_id + 웹 보조 여부 + 모델 ID + 마지막으로 완료된 동기화 job ID
+  → 새 동기화가 끝나면 키가 바뀌므로 이전 응답은 자동으로 쓰이지 않는다.
+  job ID는 list_ingestion_jobs로 조회하므로(kb_sync.kb_version) 콘솔 등 앱 밖에서 한 동기화도 반영된다.
+  조회 결과는 최대 VERSION_TTL(60초) 동안 재사용하므로, 앱 밖 동기화 직후 그만큼은 이전 응답이 나올 수 있다.
+- 동기화 완료 시 invalidate(kb_id)로 해당 KB의 항목을 지워 공간도 회수한다.
+- 항목 수/총 크기 한도를 넘으면 가장 오래 쓰이지 않은 항목부터 지운다 (LRU).
+"""
+from __future__ import annotations
+
+import hashlib
+import re
+import sqlite3
+import threading
+import time
+import unicodedata
+from contextlib import contextmanager
+from typing import Iterator, List, Optional, Tuple
+
+from app_paths import state_path
+
+DEFAULT_MAX_ENTRIES = 1000
+DEFAULT_MAX_BYTES = 32 * 1024 * 1024
+
+_SPACES = re.compile(r"\s+")
+_TRAILING = re.compile(r"[\s?？!！.。~]+$")
+
+
+def normalize_prompt(text: str) -> str:
+    """대소문자, 전/반각, 공백, 끝 문장부호 차이를 없앤 질문 문자열"""
+    text = unicodedata.normalize("NFKC", text).lower().strip()
+    text = _SPACES.sub(" ", text)
+    return _TRAILING.sub("", text)
+
+
+class AnswerCache:
+    def __init__(self, path: Optional[str] = None, max_entries: int = DEFAULT_MAX_ENTRIES,
+                 max_bytes: int = DEFAULT_MAX_BYTES):
+        self.path = path or state_path("answer_cache.sqlite3")
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self.hits = 0
+        self.misses = 0
+        self._lock = threading.Lock()
+        with self._connect() as db:
+            db.execute(
+                "CREATE TABLE IF NOT EXISTS answers ("
+                " key TEXT PRIMARY KEY, kb_id TEXT, prompt TEXT, answer TEXT,"
+                " size INTEGER, created REAL, last_used REAL)"
+            )
+            db.execute("CREATE INDEX IF NOT EXISTS answers_lru ON answers(last_used)")
+
+    @contextmanager
+    def _connect(self) -> Iterator[sqlite3.Connection]:
+        db = sqlite3.connect(self.path, timeout=10)
+        try:
+            with db:  # 블록이 정상 종료되면 commit
+                yield db
+        finally:
+            db.close()
+
+    @staticmethod
+    def make_key(prompt: str, kb_id: str, allow_web: bool, model_id: str, kb_version: Optional[str]) -> str:
+        raw = "\x1f".join([normalize_prompt(prompt), kb_id, "web" if allow_web else "kb", model_id, kb_version or ""])
+        return hashlib.sha256(raw.encode("utf-8")).hexdigest()
+
+    def get(self, key: str, count: bool = True) -> Optional[str]:
+        """count=False면 hit/miss 집계에 넣지 않는다 (의미 캐시의 후보 확인용)."""
+        with self._lock, self._connect() as db:
+            row = db.execute("SELECT answer FROM answers WHERE key = ?", (key,)).fetchone()
+            if row is None:
+                self.misses += count
+                return None
+            db.execute("UPDATE answers SET last_used = ? WHERE key = ?", (time.time(), key))
+            self.hits += count
+            return row[0]
+
+    def entries(self) -> List[Tuple[str, str]]:
+        """저장된 (kb_id, 질문) 목록"""
+        with self._connect() as db:
+            return db.execute("SELECT kb_id, prompt FROM answers ORDER BY created").fetchall()
+
+    def put(self, key: str, kb_id: str, prompt: str, answer: str):
+        now = time.time()
+        size = len(answer.encode("utf-8")) + len(prompt.encode("utf-8"))
+        with self._lock, self._connect() as db:
+            db.execute(
+                "INSERT OR REPLACE INTO answers VALUES (?, ?, ?, ?, ?, ?, ?)",
+                (key, kb_id, prompt, answer, size, now, now),
+            )
+            self._evict(db)
+
+    def invalidate(self, kb_id: str) -> int:
+        with self._lock, self._connect() as db:
+            return db.execute("DELETE FROM answers WHERE kb_id = ?", (kb_id,)).rowcount
+
+    def _evict(self, db: sqlite3.Connection):
+        count, total = db.execute("SELECT COUNT(*), COALESCE(SUM(size), 0) FROM answers").fetchone()
+        if count <= self.max_entries and total <= self.max_bytes:
+            return
+        rows = db.execute("SELECT key, size FROM answers ORDER BY last_used").fetchall()
+        doomed = []
+        for key, size in rows:
+            if count <= self.max_entries and total <= self.max_bytes:
+                break
+            doomed.append((key,))
+            count -= 1
+            total -= size
+        db.executemany("DELETE FROM answers WHERE key = ?", doomed)
@@ -0,0 +1,39 @@
+"""
+로컬 상태 파일 경로
+
+업로드 매니페스트, 캐시, 색인 등 앱이 로컬에 남기는 파일은 모두 하나의 디렉터리 아래에 둔다.
+기본값은 ~/.pdfanalyze 이며 PDFANALYZE_HOME 환경 변수로 바꿀 수 있다.
+"""
+from __future__ import annotations
+
+import json
+import os
+from typing import Any
+
+
+def state_dir() -> str:
+    path = os.environ.get("PDFANALYZE_HOME") or os.path.join(os.path.expanduser("~"), ".pdfanalyze")
+    os.makedirs(path, exist_ok=True)
+    return path
+
+
+def state_path(*parts: str) -> str:
+    path = os.path.join(state_dir(), *parts)
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    return path
+
+
+def load_json(path: str, default: Any) -> Any:
+    try:
+        with open(path, "r", encoding="utf-8") as fp:
+            return json.load(fp)
+    except (OSError, ValueError):
+        return default
+
+
+def save_json(path: str, data: Any):
+    """임시 파일에 쓴 뒤 교체하여, 중간에 종료되어도 기존 파일이 깨지지 않게 한다."""
+    tmp = f"{path}.tmp"
+    with open(tmp, "w", encoding="utf-8") as fp:
+        json.dump(data, fp, ensure_ascii=False, indent=1)
+    os.replace(tmp, path)
@@ -0,0 +1,73 @@
+"""
+boto3 세션/클라이언트 공유 레지스트리
+
+워커마다 boto3 클라이언트를 새로 만들면 자격 증명 조회, 엔드포인트 해석, 커넥션 풀 생성이
+매번 반복된다. 이 모듈은 프로세스 전체에서 (service, region, profile)별 클라이언트를
+한 번만 만들어 공유한다.
+
+- boto3 클라이언트는 스레드 안전하지만 Session에서 클라이언트를 만드는 과정은 그렇지 않으므로
+  생성 구간은 잠금으로 보호한다.
+- boto3는 첫 사용 시점에 로드한다.
+"""
+from __future__ import annotations
+
+import threading
+from typing import Any, Dict, Optional, Tuple
+
+_lock = threading.RLock()
+_sessions: Dict[Tuple[Optional[str], Optional[str]], Any] = {}
+_clients: Dict[Tuple[str, Optional[str], Optional[str]], Any] = {}
+_uploaders: Dict[Tuple[str, Optional[str]], Any] = {}
+
+
+def get_session(region: Optional[str] = None, profile: Optional[str] = None):
+    key = (region, profile)
+    with _lock:
+        session = _sessions.get(key)
+        if session is None:
+            import boto3
+            session = boto3.Session(region_name=region, profile_name=profile)
+            _sessions[key] = session
+        return session
+
+
+def get_client(service: str, region: Optional[str] = None, profile: Optional[str] = None):
+    key = (service, region, profile)
+    with _lock:
+        client = _clients.get(key)
+        if client is None:
+            client = get_session(region, profile).client(service)
+            _clients[key] = client
+        return client
+
+
+def get_uploader(bucket: str, kb_id: Optional[str]):
+    """PDFUploader도 (bucket, kb_id)별로 한 번만 만들어 내부 세션/커넥션을 재사용한다."""
+    key = (bucket, kb_id)
+    with _lock:
+        uploader = _uploaders.get(key)
+        if uploader is None:
+            from pdf_uploader import PDFUploader
+            uploader = PDFUploader(bucket, kb_id)
+            _uploaders[key] = uploader
+        return uploader
+
+
+def install(service: str, region: Optional[str], client: Any, profile: Optional[str] = None):
+    """미리 만든 클라이언트를 레지스트리에 넣는다 (테스트/벤치마크의 가짜 클라이언트 등)."""
+    with _lock:
+        _clients[(service, region, profile)] = client
+
+
+def install_uploader(bucket: str, kb_id: Optional[str], uploader: Any):
+    """get_uploader(bucket, kb_id)가 돌려줄 업로더를 미리 넣는다."""
+    with _lock:
+        _uploaders[(bucket, kb_id)] = uploader
+
+
+def clear():
+    """캐시된 세션/클라이언트를 모두 버린다 (자격 증명 교체 후 등)."""
+    with _lock:
+        _sessions.clear()
+        _clients.clear()
+        _uploaders.clear()
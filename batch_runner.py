@@ -0,0 +1,220 @@
+"""
+질문 파일 일괄 실행
+
+준비한 질문 수백 개를 CSV/JSONL/텍스트 파일에서 읽어 질의응답 흐름(workflows.ask)으로
+동시에(개수 제한) 실행하고, 답변·근거(citations)·질문별 소요 시간을 결과 파일에 한 줄씩 기록한다.
+
+- 입력: .jsonl ({"id", "question"}), .csv (id, question 열), 그 외는 한 줄에 질문 하나.
+  id가 없으면 파일 안의 순번(q0001...)을 쓴다.
+- 출력: .jsonl 또는 .csv. 질문이 끝날 때마다 바로 추가하므로 중단되어도 완료분은 남는다.
+- 이어서 실행: 출력 파일에 성공으로 기록된 id는 건너뛴다 (실패한 질문은 다시 실행).
+- 요청 속도 제한: 분당 시작 질문 수 상한 (Bedrock 스로틀링 방지).
+"""
+from __future__ import annotations
+
+import csv
+import json
+import os
+import re
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from dataclasses import dataclass
+from typing import Any, Callable, Dict, List, Optional, Set
+
+from cancellation import Cancelled, check
+from latency_stats import percentile
+from tracing import S3_URI
+
+DEFAULT_CONCURRENCY = 4
+OUTPUT_FIELDS = ("id", "question", "answer", "citations", "seconds", "ttft", "cached", "local", "error", "finished_at")
+
+_PDF_PAGE = re.compile(r"(?<![/\w\-.])[\w\-.]+\.pdf(?:\s+p\.\s*\d+)?", re.IGNORECASE)
+
+
+@dataclass
+class Question:
+    id: str
+    text: str
+
+
+def read_questions(path: str) -> List[Question]:
+    ext = os.path.splitext(path)[1].lower()
+    questions: List[Question] = []
+    with open(path, "r", encoding="utf-8-sig", newline="") as fp:
+        if ext == ".jsonl":
+            rows = [json.loads(line) for line in fp if line.strip()]
+        elif ext == ".csv":
+            rows = list(csv.DictReader(fp))
+        else:
+            rows = [{"question": line.strip()} for line in fp if line.strip()]
+    for n, row in enumerate(rows, 1):
+        text = (row.get("question") or row.get("prompt") or "").strip()
+        if text:
+            questions.append(Question(str(row.get("id") or f"q{n:04d}"), text))
+    return questions
+
+
+def completed_ids(path: str) -> Set[str]:
+    """출력 파일에서 오류 없이 끝난 질문 id"""
+    if not os.path.exists(path):
+        return set()
+    with open(path, "r", encoding="utf-8-sig", newline="") as fp:
+        if path.lower().endswith(".csv"):
+            rows = list(csv.DictReader(fp))
+        else:
+            rows = []
+            for line in fp:
+                try:
+                    rows.append(json.loads(line))
+                except ValueError:
+                    # 중단 시 마지막 줄이 잘렸을 수 있음
+                    continue
+    return {str(r["id"]) for r in rows if r.get("id") and not r.get("error")}
+
+
+def citations(answer: str, sources: List[str]) -> List[str]:
+    """retrieve 결과의 문서 URI + 답변 본문에 나온 s3:// URI / "파일.pdf p.N" 표기"""
+    found = list(sources) + S3_URI.findall(answer) + [m.strip() for m in _PDF_PAGE.findall(answer)]
+    return list(dict.fromkeys(found))
+
+
+class RateLimiter:
+    """분당 per_minute개까지 시작을 허용한다 (간격을 고르게 벌림). 0이면 제한 없음."""
+
+    def __init__(self, per_minute: float = 0):
+        self.interval = 60.0 / per_minute if per_minute > 0 else 0.0
+        self._lock = threading.Lock()
+        self._next = time.monotonic()
+
+    def wait(self, cancel: Optional[threading.Event] = None):
+        if not self.interval:
+            return
+        with self._lock:
+            now = time.monotonic()
+            start = max(now, self._next)
+            self._next = start + self.interval
+        delay = start - now
+        if delay > 0:
+            if cancel is None:
+                time.sleep(delay)
+            elif cancel.wait(delay):
+                raise Cancelled()
+
+
+class ResultWriter:
+    """결과를 한 건씩 추가 기록 (JSONL/CSV). 여러 스레드에서 호출해도 줄이 섞이지 않는다."""
+
+    def __init__(self, path: str):
+        self.path = path
+        self.csv = path.lower().endswith(".csv")
+        self._lock = threading.Lock()
+        if self.csv and not os.path.exists(path):
+            with open(path, "w", encoding="utf-8-sig", newline="") as fp:
+                csv.DictWriter(fp, OUTPUT_FIELDS).writeheader()
+        elif os.path.exists(path):
+            self._end_partial_line()
+
+    def _end_partial_line(self):
+        """중단으로 마지막 줄이 잘린 채 남았으면 줄을 끝내, 이어서 쓰는 결과가 그 줄에 붙지 않게 한다."""
+        with open(self.path, "rb+") as fp:
+            fp.seek(0, os.SEEK_END)
+            if fp.tell() == 0:
+                return
+            fp.seek(-1, os.SEEK_END)
+            if fp.read(1) != b"\n":
+                fp.write(b"\n")
+
+    def write(self, row: Dict[str, Any]):
+        with self._lock, open(self.path, "a", encoding="utf-8", newline="") as fp:
+            if self.csv:
+                csv.DictWriter(fp, OUTPUT_FIELDS).writerow(dict(row, citations=" | ".join(row["citations"])))
+            else:
+                fp.write(json.dumps(row, ensure_ascii=False) + "\n")
+
+
+@dataclass
+class BatchSummary:
+    total: int
+    skipped: int
+    ok: int
+    failed: int
+    seconds: float
+    latencies: List[float]
+
+    def describe(self) -> str:
+        msg = (f"전체 {self.total}개 중 이전 완료 {self.skipped}개 건너뜀, 성공 {self.ok}개, 실패 {self.failed}개"
+               f" ({self.seconds:.1f}초)")
+        if self.latencies:
+            msg += (f", 지연 p50 {percentile(self.latencies, 50):.1f}초 / p95 {percentile(self.latencies, 95):.1f}초"
+                    f" / 최대 {max(self.latencies):.1f}초")
+        return msg
+
+
+def run_batch(questions: List[Question], output: str, ask: Callable[[str, threading.Event], Any],
+              concurrency: int = DEFAULT_CONCURRENCY, per_minute: float = 0,
+              on_progress: Optional[Callable[[str], None]] = None,
+              cancel: Optional[threading.Event] = None) -> BatchSummary:
+    """questions를 최대 concurrency개씩 ask(question, cancel) -> workflows.AskResult 로 실행한다.
+
+    ask는 호출 측에서 kb_id/풀/캐시 등을 묶어 넘긴다 (pdfanalyze batch 참고).
+    """
+    notify = on_progress or (lambda msg: None)
+    cancel = cancel or threading.Event()
+    done = completed_ids(output)
+    todo = [q for q in questions if q.id not in done]
+    writer = ResultWriter(output)
+    limiter = RateLimiter(per_minute)
+    latencies: List[float] = []
+    counts = {"ok": 0, "failed": 0}
+    started = time.perf_counter()
+    if done:
+        notify(f"[일괄] 이전 실행에서 완료된 {len(questions) - len(todo)}개는 건너뜁니다")
+
+    def one(q: Question) -> Optional[Dict[str, Any]]:
+        limiter.wait(cancel)
+        check(cancel)
+        t0 = time.perf_counter()
+        row: Dict[str, Any] = {"id": q.id, "question": q.text, "answer": "", "citations": [], "seconds": 0.0,
+                               "ttft": None, "cached": False, "local": False, "error": None}
+        try:
+            result = ask(q.text, cancel)
+            sources = result.trace.sources() if result.trace is not None else []
+            row.update(answer=result.text, citations=citations(result.text, sources),
+                       ttft=None if result.ttft is None else round(result.ttft, 3),
+                       cached=result.cached, local=result.local)
+        except Cancelled:
+            return None
+        except Exception as e:
+            row["error"] = str(e)
+        row["seconds"] = round(time.perf_counter() - t0, 3)
+        row["finished_at"] = time.strftime("%Y-%m-%dT%H:%M:%S")
+        writer.write(row)
+        return row
+
+    with ThreadPoolExecutor(max_workers=max(1, concurrency)) as pool:
+        futures = [pool.submit(one, q) for q in todo]
+        try:
+            for n, fut in enumerate(as_completed(futures), 1):
+                try:
+                    row = fut.result()
+                except Cancelled:
+                    continue
+                if row is None:
+                    continue
+                if row["error"]:
+                    counts["failed"] += 1
+                    notify(f"[일괄 {n}/{len(todo)}] {row['id']} 실패: {row['error']}")
+                else:
+                    counts["ok"] += 1
+                    latencies.append(row["seconds"])
+                    notify(f"[일괄 {n}/{len(todo)}] {row['id']} {row['seconds']:.1f}초"
+                           f" (근거 {len(row['citations'])}개)")
+        except BaseException:
+            # Ctrl+C 등: 아직 시작하지 않은 질문은 버리고 진행 중인 질문에 취소 요청
+            cancel.set()
+            for f in futures:
+                f.cancel()
+            raise
+    return BatchSummary(len(questions), len(questions) - len(todo), counts["ok"], counts["failed"],
+                        time.perf_counter() - started, latencies)
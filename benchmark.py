@@ -0,0 +1,465 @@
+"""
+오프라인 벤치마크 (AWS 계정 없이 실행)
+
+업로드/동기화/KB 점검/질의응답 작업 흐름(workflows)을 프로세스 안의 가짜 S3, 가짜 bedrock-agent,
+지연 시간을 조절할 수 있는 가짜 모델로 실행하고 처리량, 지연(p50/p95/p99), 메모리 최대치를 보고한다.
+
+GUI 워커는 workflows를 시그널에 연결만 하므로 여기서 측정한 값이 워커의 처리 비용과 같다.
+로컬 상태 파일(매니페스트, 캐시, trace)은 임시 디렉터리에 만들고 끝나면 지운다.
+
+사용 예:
+  python -m benchmark                                   # 기본 합성 코퍼스
+  python -m benchmark --files 200 --size-kb 256 --s3-latency-ms 30 --questions 200 --ask-concurrency 8
+  python -m benchmark --only upload,ask --json
+"""
+from __future__ import annotations
+
+import argparse
+import asyncio
+import hashlib
+import itertools
+import json
+import os
+import shutil
+import sys
+import tempfile
+import threading
+import time
+import tracemalloc
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import contextmanager
+from dataclasses import dataclass, field
+from typing import Any, Callable, Dict, Iterator, List, Optional
+
+from latency_stats import percentile
+
+MB = 1024 * 1024
+SCENARIOS = ("upload", "multipart", "sync", "validate", "ask")
+REGION = "us-east-1"
+KB_ID = "BENCHKB"
+BUCKET = "bench-bucket"
+
+
+# ---------- 가짜 AWS ----------
+
+def _client_error(code: str, op: str):
+    from botocore.exceptions import ClientError
+    return ClientError({"Error": {"Code": code, "Message": code}}, op)
+
+
+class FakeS3:
+    """메모리에 객체를 저장하는 S3. 요청마다 latency + 크기/bandwidth 만큼 지연한다."""
+
+    def __init__(self, latency: float = 0.02, bandwidth: float = 100 * MB):
+        self.latency = latency
+        self.bandwidth = bandwidth
+        self.objects: Dict[str, Dict[str, Any]] = {}
+        self.uploads: Dict[str, Dict[int, int]] = {}   # UploadId → {파트 번호: 크기} (내용은 버림)
+        self.requests = 0
+        self._lock = threading.Lock()
+        self._ids = itertools.count(1)
+
+    def _wait(self, size: int = 0):
+        with self._lock:
+            self.requests += 1
+        time.sleep(self.latency + size / self.bandwidth)
+
+    def put_object(self, Bucket: str, Key: str, Body: bytes, Metadata: Optional[Dict[str, str]] = None, **_):
+        self._wait(len(Body))
+        etag = f'"{hashlib.md5(Body).hexdigest()}"'
+        self.objects[f"{Bucket}/{Key}"] = {"ETag": etag, "ContentLength": len(Body), "Metadata": Metadata or {}}
+        return {"ETag": etag}
+
+    def head_object(self, Bucket: str, Key: str, **_):
+        self._wait()
+        obj = self.objects.get(f"{Bucket}/{Key}")
+        if obj is None:
+            raise _client_error("404", "HeadObject")
+        return dict(obj)
+
+    def create_multipart_upload(self, Bucket: str, Key: str, **_):
+        self._wait()
+        upload_id = f"up-{next(self._ids)}"
+        self.uploads[upload_id] = {}
+        return {"UploadId": upload_id}
+
+    def upload_part(self, Bucket: str, Key: str, UploadId: str, PartNumber: int, Body: bytes, **_):
+        self._wait(len(Body))
+        self.uploads[UploadId][PartNumber] = len(Body)
+        return {"ETag": f'"part-{PartNumber}"'}
+
+    def list_parts(self, Bucket: str, Key: str, UploadId: str, **_):
+        self._wait()
+        if UploadId not in self.uploads:
+            raise _client_error("NoSuchUpload", "ListParts")
+        return {"Parts": [{"PartNumber": n, "ETag": f'"part-{n}"'} for n in sorted(self.uploads[UploadId])]}
+
+    def complete_multipart_upload(self, Bucket: str, Key: str, UploadId: str, MultipartUpload: Dict, **_):
+        self._wait()
+        parts = self.uploads.pop(UploadId)
+        size = sum(parts.values())
+        self.objects[f"{Bucket}/{Key}"] = {"ETag": f'"mp-{len(parts)}"', "ContentLength": size, "Metadata": {}}
+        return {}
+
+    def abort_multipart_upload(self, Bucket: str, Key: str, UploadId: str, **_):
+        self._wait()
+        self.uploads.pop(UploadId, None)
+        return {}
+
+
+class FakeUploader:
+    """PDFUploader 대역: S3에 put_object로 올리고 URI를 돌려준다."""
+
+    def __init__(self, s3: FakeS3, bucket: str):
+        self.s3 = s3
+        self.bucket = bucket
+
+    def upload_pdf(self, path: str, prefix: str) -> str:
+        key = f"{prefix}{os.path.basename(path)}"
+        with open(path, "rb") as fp:
+            self.s3.put_object(Bucket=self.bucket, Key=key, Body=fp.read())
+        return f"s3://{self.bucket}/{key}"
+
+
+class FakeBedrockAgent:
+    """bedrock-agent 대역. ingestion job은 polls번 조회하면 완료된다."""
+
+    def __init__(self, latency: float = 0.02, polls: int = 3, data_sources: int = 1):
+        self.latency = latency
+        self.polls = polls
+        self.data_sources = data_sources
+        self._jobs: Dict[str, Dict[str, Any]] = {}
+        self._ids = itertools.count(1)
+
+    def get_knowledge_base(self, knowledgeBaseId: str):
+        time.sleep(self.latency)
+        return {"knowledgeBase": {"knowledgeBaseId": knowledgeBaseId, "status": "ACTIVE"}}
+
+    def list_data_sources(self, knowledgeBaseId: str, **_):
+        time.sleep(self.latency)
+        return {"dataSourceSummaries": [{"dataSourceId": f"DS{i}", "name": f"ds-{i}"}
+                                        for i in range(self.data_sources)]}
+
+    def get_data_source(self, knowledgeBaseId: str, dataSourceId: str):
+        time.sleep(self.latency)
+        return {"dataSource": {"dataSourceId": dataSourceId, "dataSourceConfiguration": {
+            "type": "S3", "s3Configuration": {"bucketArn": f"arn:aws:s3:::{BUCKET}"}}}}
+
+    def start_ingestion_job(self, knowledgeBaseId: str, dataSourceId: str):
+        time.sleep(self.latency)
+        job = {"ingestionJobId": f"JOB{next(self._ids)}", "dataSourceId": dataSourceId,
+               "status": "STARTING", "statistics": {}, "_polls": 0}
+        self._jobs[job["ingestionJobId"]] = job
+        return {"ingestionJob": {k: v for k, v in job.items() if not k.startswith("_")}}
+
+    def get_ingestion_job(self, knowledgeBaseId: str, dataSourceId: str, ingestionJobId: str):
+        time.sleep(self.latency)
+        job = self._jobs[ingestionJobId]
+        job["_polls"] += 1
+        job["status"] = "COMPLETE" if job["_polls"] >= self.polls else "IN_PROGRESS"
+        job["statistics"] = {"numberOfDocumentsScanned": job["_polls"] * 10}
+        return {"ingestionJob": {k: v for k, v in job.items() if not k.startswith("_")}}
+
+    def list_ingestion_jobs(self, knowledgeBaseId: str, dataSourceId: str, maxResults: int = 100, **_):
+        time.sleep(self.latency)
+        done = [j for j in self._jobs.values() if j["dataSourceId"] == dataSourceId and j["status"] == "COMPLETE"]
+        return {"ingestionJobSummaries": [{"ingestionJobId": j["ingestionJobId"], "status": j["status"]}
+                                          for j in reversed(done)][:maxResults]}
+
+    def stop_ingestion_job(self, knowledgeBaseId: str, dataSourceId: str, ingestionJobId: str):
+        self._jobs[ingestionJobId]["status"] = "STOPPED"
+        return {}
+
+
+class FakeAgent:
+    """strands Agent 대역. retrieve 도구를 한 번 호출한 뒤 tokens개 조각을 token_latency 간격으로 낸다."""
+
+    def __init__(self, tools: List[Callable], token_latency: float, tokens: int):
+        self.messages: List[Any] = []
+        self.tools = tools
+        self.token_latency = token_latency
+        self.tokens = tokens
+
+    async def stream_async(self, prompt: str):
+        for tool in self.tools:
+            await asyncio.to_thread(tool, {"toolUseId": "bench", "input": {"text": prompt}})
+        for i in range(self.tokens):
+            await asyncio.sleep(self.token_latency)
+            yield {"data": f"tok{i} "}
+        yield {"result": f"answer to {prompt}"}
+
+
+def _fake_retrieve(latency: float) -> Callable:
+    def retrieve(tool, **_):
+        time.sleep(latency)
+        return {"toolUseId": tool["toolUseId"], "status": "success",
+                "content": [{"text": f"passage for {tool['input']['text']}"}]}
+    return retrieve
+
+
+def make_pool(token_latency: float, tokens: int, retrieve_latency: float):
+    """AgentPool의 풀링/캐시/trace 경로는 그대로 두고 Agent 생성만 가짜로 바꾼다."""
+    from agent_pool import AgentPool, bind_knowledge_base
+    from retrieve_cache import RetrieveCache
+    from tracing import traced_tool
+
+    class FakeAgentPool(AgentPool):
+        def _build(self, kb_id, region, allow_web, system_prompt):
+            func = _fake_retrieve(retrieve_latency)
+            if self.retrieve_cache is not None:
+                func = self.retrieve_cache.wrap(func)
+            func = bind_knowledge_base(func, kb_id, region)
+            return FakeAgent([traced_tool("retrieve", func)], token_latency, tokens)
+
+    return FakeAgentPool(retrieve_cache=RetrieveCache())
+
+
+@contextmanager
+def offline_env(s3: FakeS3, agent_client: FakeBedrockAgent) -> Iterator[str]:
+    """aws_clients 레지스트리에 가짜 클라이언트를 넣고, 로컬 상태는 임시 디렉터리에 둔다."""
+    import aws_clients
+    import kb_sync
+    import workflows
+
+    home = tempfile.mkdtemp(prefix="pdfanalyze-bench-")
+    saved_home = os.environ.get("PDFANALYZE_HOME")
+    saved_prompt = workflows.load_agent_prompt
+    os.environ["PDFANALYZE_HOME"] = home
+    workflows.load_agent_prompt = lambda: "benchmark"
+    aws_clients.clear()
+    kb_sync.forget_versions()
+    for region in (None, REGION):
+        aws_clients.install("s3", region, s3)
+        aws_clients.install("bedrock-agent", region, agent_client)
+    for kb_id in (None, KB_ID):
+        aws_clients.install_uploader(BUCKET, kb_id, FakeUploader(s3, BUCKET))
+    try:
+        yield home
+    finally:
+        aws_clients.clear()
+        kb_sync.forget_versions()
+        workflows.load_agent_prompt = saved_prompt
+        if saved_home is None:
+            os.environ.pop("PDFANALYZE_HOME", None)
+        else:
+            os.environ["PDFANALYZE_HOME"] = saved_home
+        shutil.rmtree(home, ignore_errors=True)
+
+
+# ---------- 측정 ----------
+
+@dataclass
+class Result:
+    name: str
+    ops: int
+    seconds: float
+    latencies: List[float] = field(default_factory=list)
+    peak_bytes: int = 0
+    extra: Dict[str, Any] = field(default_factory=dict)
+
+    @property
+    def throughput(self) -> float:
+        return self.ops / self.seconds if self.seconds > 0 else 0.0
+
+    def to_dict(self) -> Dict[str, Any]:
+        ms = lambda v: round(v * 1000, 1)  # noqa: E731
+        return {
+            "scenario": self.name, "ops": self.ops, "seconds": round(self.seconds, 3),
+            "ops_per_sec": round(self.throughput, 2),
+            "p50_ms": ms(percentile(self.latencies, 50)), "p95_ms": ms(percentile(self.latencies, 95)),
+            "p99_ms": ms(percentile(self.latencies, 99)), "peak_mem_mb": round(self.peak_bytes / MB, 2),
+            **self.extra,
+        }
+
+
+@contextmanager
+def measure(name: str) -> Iterator[Result]:
+    result = Result(name, 0, 0.0)
+    tracemalloc.start()
+    started = time.perf_counter()
+    try:
+        yield result
+    finally:
+        result.seconds = time.perf_counter() - started
+        result.peak_bytes = tracemalloc.get_traced_memory()[1]
+        tracemalloc.stop()
+
+
+def make_corpus(directory: str, files: int, size: int, prefix: str = "doc") -> List[str]:
+    """PDF 헤더만 붙인 임의 내용의 합성 파일을 만든다 (업로드 경로는 내용을 해석하지 않음)."""
+    paths = []
+    for i in range(files):
+        path = os.path.join(directory, f"{prefix}{i:05d}.pdf")
+        with open(path, "wb") as fp:
+            fp.write(b"%PDF-1.4\n" + os.urandom(max(0, size - 9)))
+        paths.append(path)
+    return paths
+
+
+# ---------- 시나리오 ----------
+
+def bench_upload(args, s3: FakeS3, corpus: List[str]) -> List[Result]:
+    import workflows
+
+    results = []
+    for label, skip in (("upload", True), ("upload (재실행, 변경 없음)", True)):
+        with measure(label) as r:
+            report = workflows.upload(BUCKET, KB_ID, "documents/", corpus, workers=args.upload_workers,
+                                      skip_unchanged=skip, multipart=False, extract=False)
+        r.ops = len(report.results)
+        r.latencies = [x.seconds for x in report.results]
+        r.extra = {"uploaded": len(report.uploaded), "skipped": len(report.skipped),
+                   "failed": len(report.failed), "mb_per_sec": round(report.throughput, 2)}
+        results.append(r)
+    return results
+
+
+def bench_multipart(args, s3: FakeS3, workdir: str) -> List[Result]:
+    import workflows
+
+    from upload_engine import MULTIPART_THRESHOLD
+
+    size = max(args.multipart_mb * MB, MULTIPART_THRESHOLD)
+    path = make_corpus(workdir, 1, size, prefix="large")[0]
+    with measure("multipart") as r:
+        report = workflows.upload(BUCKET, KB_ID, "documents/", [path], skip_unchanged=False, multipart=True,
+                                  part_size=5 * MB, part_concurrency=args.part_concurrency, extract=False)
+    r.ops = 1
+    r.latencies = [x.seconds for x in report.results]
+    r.extra = {"mb": size // MB, "mb_per_sec": round(size / MB / r.seconds, 2) if r.seconds else 0,
+               "failed": len(report.failed)}
+    return [r]
+
+
+def bench_sync(args) -> List[Result]:
+    from kb_sync import start_sync, wait_for_jobs
+
+    with measure("sync") as r:
+        for _ in range(args.syncs):
+            t0 = time.perf_counter()
+            jobs = start_sync(KB_ID, REGION)
+            # workflows.sync와 같은 경로이되 폴링 간격만 짧게
+            wait_for_jobs(KB_ID, jobs, REGION, initial=args.poll_ms / 1000, max_interval=args.poll_ms / 1000)
+            r.latencies.append(time.perf_counter() - t0)
+    r.ops = args.syncs
+    return [r]
+
+
+def bench_validate(args) -> List[Result]:
+    import workflows
+
+    with measure("validate") as r:
+        for _ in range(args.validates):
+            t0 = time.perf_counter()
+            workflows.validate_kb(KB_ID, REGION)
+            r.latencies.append(time.perf_counter() - t0)
+    r.ops = args.validates
+    return [r]
+
+
+def bench_ask(args) -> List[Result]:
+    import workflows
+    from answer_cache import AnswerCache
+
+    pool = make_pool(args.token_ms / 1000, args.tokens, args.retrieve_ms / 1000)
+    cache = AnswerCache() if args.answer_cache else None
+    # 질문 종류를 제한해 retrieve/응답 캐시가 실제 사용 패턴처럼 일부 적중하게 한다
+    prompts = [f"질문 {i % args.distinct_questions}" for i in range(args.questions)]
+    ttfts: List[float] = []
+
+    def one(prompt: str) -> float:
+        t0 = time.perf_counter()
+        result = workflows.ask(KB_ID, REGION, prompt, False, pool, stream=True, on_chunk=lambda _: None,
+                               cache=cache)
+        if result.ttft is not None:
+            ttfts.append(result.ttft)
+        return time.perf_counter() - t0
+
+    with measure("ask") as r:
+        with ThreadPoolExecutor(max_workers=args.ask_concurrency) as ex:
+            r.latencies = list(ex.map(one, prompts))
+    r.ops = len(prompts)
+    r.extra = {"ttft_p50_ms": round(percentile(ttfts, 50) * 1000, 1), "agents_created": pool.created,
+               "retrieve_cache": pool.retrieve_cache.stats()}
+    return [r]
+
+
+def run(args) -> List[Result]:
+    only = set(args.only.split(",")) if args.only else set(SCENARIOS)
+    s3 = FakeS3(latency=args.s3_latency_ms / 1000, bandwidth=args.bandwidth_mbps * MB)
+    agent_client = FakeBedrockAgent(latency=args.api_latency_ms / 1000, polls=args.polls)
+    results: List[Result] = []
+    workdir = tempfile.mkdtemp(prefix="pdfanalyze-corpus-")
+    try:
+        with offline_env(s3, agent_client):
+            if "upload" in only:
+                corpus = make_corpus(workdir, args.files, args.size_kb * 1024)
+                results += bench_upload(args, s3, corpus)
+            if "multipart" in only:
+                results += bench_multipart(args, s3, workdir)
+            if "sync" in only:
+                results += bench_sync(args)
+            if "validate" in only:
+                results += bench_validate(args)
+            if "ask" in only:
+                results += bench_ask(args)
+    finally:
+        shutil.rmtree(workdir, ignore_errors=True)
+    return results
+
+
+def format_table(results: List[Result]) -> str:
+    header = f"{'시나리오':<24}{'건수':>6}{'초':>8}{'건/초':>9}{'p50ms':>9}{'p95ms':>9}{'p99ms':>9}{'메모리MB':>10}"
+    lines = [header, "-" * len(header)]
+    for r in results:
+        d = r.to_dict()
+        lines.append(f"{r.name:<24}{d['ops']:>6}{d['seconds']:>8.2f}{d['ops_per_sec']:>9.1f}"
+                     f"{d['p50_ms']:>9.1f}{d['p95_ms']:>9.1f}{d['p99_ms']:>9.1f}{d['peak_mem_mb']:>10.2f}")
+        extra = {k: v for k, v in d.items() if k not in ("scenario", "ops", "seconds", "ops_per_sec", "p50_ms",
+                                                          "p95_ms", "p99_ms", "peak_mem_mb")}
+        if extra:
+            lines.append("    " + ", ".join(f"{k}={v}" for k, v in extra.items()))
+    return "\n".join(lines)
+
+
+def build_parser() -> argparse.ArgumentParser:
+    p = argparse.ArgumentParser(prog="benchmark", description="가짜 S3/Bedrock으로 작업 흐름 성능 측정")
+    p.add_argument("--only", help=f"실행할 시나리오 (쉼표 구분: {','.join(SCENARIOS)})")
+    p.add_argument("--json", action="store_true", help="결과를 JSON으로 출력")
+    g = p.add_argument_group("코퍼스")
+    g.add_argument("--files", type=int, default=50)
+    g.add_argument("--size-kb", type=int, default=256)
+    g.add_argument("--multipart-mb", type=int, default=128, help="멀티파트 시나리오 파일 크기 (100MB 이상)")
+    g = p.add_argument_group("가짜 서비스 지연")
+    g.add_argument("--s3-latency-ms", type=float, default=20)
+    g.add_argument("--bandwidth-mbps", type=float, default=100, help="가짜 S3 대역폭 (MB/s)")
+    g.add_argument("--api-latency-ms", type=float, default=20, help="bedrock-agent 호출 지연")
+    g.add_argument("--polls", type=int, default=3, help="ingestion job 완료까지 조회 횟수")
+    g.add_argument("--poll-ms", type=float, default=10)
+    g.add_argument("--token-ms", type=float, default=5, help="모델 토큰 간격")
+    g.add_argument("--tokens", type=int, default=40)
+    g.add_argument("--retrieve-ms", type=float, default=150)
+    g = p.add_argument_group("부하")
+    g.add_argument("--upload-workers", type=int, default=4)
+    g.add_argument("--part-concurrency", type=int, default=4)
+    g.add_argument("--syncs", type=int, default=5)
+    g.add_argument("--validates", type=int, default=50)
+    g.add_argument("--questions", type=int, default=40)
+    g.add_argument("--distinct-questions", type=int, default=10)
+    g.add_argument("--ask-concurrency", type=int, default=4)
+    g.add_argument("--answer-cache", action="store_true", help="응답 캐시 사용")
+    return p
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    args = build_parser().parse_args(argv)
+    results = run(args)
+    if args.json:
+        print(json.dumps([r.to_dict() for r in results], ensure_ascii=False, indent=1))
+    else:
+        print(format_table(results))
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,213 @@
+"""
+로컬 BM25 검색 (페이지 색인 기반)
+
+"IAM 정의가 몇 페이지에 있어?" 같은 단순 위치 조회는 KB retrieve + LLM 호출 없이
+로컬 페이지 색인(pdf_index)만으로 답할 수 있다.
+
+- 토크나이저: NFKC/소문자 정규화 후 영문·숫자는 단어 단위, 한글은 끝 조사를 뗀 뒤
+  글자 2-gram으로 나눈다 (형태소 분석기 없이도 "정의가"/"정의는"이 같은 토큰을 공유).
+  영문·숫자 바로 뒤에 붙은 조사("IAM이", "EC2를")는 버린다.
+- 검색 단위는 페이지이며, 점수는 BM25(k1, b)로 계산한다.
+- LocalSearch는 색인 문서 집합이 바뀔 때만 역색인을 다시 만든다.
+"""
+from __future__ import annotations
+
+import math
+import re
+import threading
+import unicodedata
+from collections import Counter, defaultdict
+from dataclasses import dataclass
+from typing import Dict, FrozenSet, List, Optional, Tuple
+
+from pdf_index import PageIndex
+from upload_engine import split_s3_uri
+
+DEFAULT_K1 = 1.5
+DEFAULT_B = 0.75
+DEFAULT_TOP_K = 5
+MIN_COVERAGE = 0.6      # 로컬 답변: 질문 토큰 중 페이지에 있어야 하는 비율
+SNIPPET_CHARS = 160
+
+_WORDS = re.compile(r"[a-z0-9]+|[가-힣]+")
+_PARTICLES = ("에서", "으로", "에게", "까지", "부터", "이란", "이다", "이", "가", "은", "는", "을", "를",
+              "에", "의", "도", "와", "과", "로", "란")
+# 조사만으로 된 토큰 (영문/숫자 뒤에 붙은 조사는 따로 떨어져 나온다: "IAM이" → "iam", "이")
+PARTICLES = frozenset(_PARTICLES)
+# 페이지/파일 위치를 묻는 표현만 (단순 "어디"/"찾아"/"where"는 개념 질문에도 쓰여 제외)
+_LOOKUP = re.compile(r"몇\s*(페이지|쪽|슬라이드|page)|어느\s*(페이지|쪽|슬라이드|파일|문서|자료)"
+                     r"|(페이지|쪽)\s*(번호|위치)"
+                     r"|어디에\s*(나와|나오|적혀|언급)|(which|what)\s+(page|slide|file|document)")
+
+
+def _strip_particle(word: str) -> str:
+    if len(word) < 3:
+        return word
+    for p in _PARTICLES:
+        if word.endswith(p) and len(word) - len(p) >= 2:
+            return word[:-len(p)]
+    return word
+
+
+def tokenize(text: str) -> List[str]:
+    text = unicodedata.normalize("NFKC", text).lower()
+    tokens: List[str] = []
+    ascii_end = -1
+    for m in _WORDS.finditer(text):
+        word = m.group()
+        if word[0] < "가":   # 영문/숫자
+            tokens.append(word)
+            ascii_end = m.end()
+            continue
+        if m.start() == ascii_end and word in PARTICLES:
+            continue
+        word = _strip_particle(word)
+        if len(word) == 1:
+            tokens.append(word)
+        else:
+            tokens.extend(word[i:i + 2] for i in range(len(word) - 1))
+    return tokens
+
+
+# 위치 조회 표현 자체("몇 페이지", "어디에 있어")는 검색어에서 뺀다
+_LOOKUP_STOP = frozenset(tokenize("몇 페이지 쪽 장 어디 어디에 어느 파일 문서 자료 있어 있나요 나와 나오나요 "
+                                  "찾아줘 알려줘 설명해 다뤄 위치 page which where"))
+
+
+def is_lookup_question(query: str) -> bool:
+    return _LOOKUP.search(unicodedata.normalize("NFKC", query).lower()) is not None
+
+
+@dataclass
+class Hit:
+    sha256: str
+    name: str
+    page: int
+    score: float
+    coverage: float     # 질문 토큰 중 이 페이지에 나오는 비율
+    snippet: str
+    uri: Optional[str] = None
+
+    def cite(self) -> str:
+        return f"{self.name} p.{self.page}" + (f" ({self.uri})" if self.uri else "")
+
+
+class BM25Index:
+    def __init__(self, k1: float = DEFAULT_K1, b: float = DEFAULT_B):
+        self.k1 = k1
+        self.b = b
+        self.pages: List[Tuple[str, int, str]] = []           # (sha256, 페이지, 원문)
+        self._lengths: List[int] = []
+        self._terms: List[FrozenSet[str]] = []
+        self._postings: Dict[str, List[Tuple[int, int]]] = defaultdict(list)   # 토큰 → [(페이지 번호, tf)]
+        self._avgdl = 0.0
+
+    def add(self, sha256: str, page: int, text: str):
+        doc = len(self.pages)
+        counts = Counter(tokenize(text))
+        self.pages.append((sha256, page, text))
+        self._lengths.append(sum(counts.values()))
+        self._terms.append(frozenset(counts))
+        for token, tf in counts.items():
+            self._postings[token].append((doc, tf))
+        self._avgdl = sum(self._lengths) / len(self._lengths)
+
+    @classmethod
+    def from_page_index(cls, index: PageIndex, shas: Optional[List[str]] = None) -> "BM25Index":
+        bm25 = cls()
+        for sha in (shas if shas is not None else [d.sha256 for d in index.documents()]):
+            for sha256, page, text in index.iter_pages(sha):
+                bm25.add(sha256, page, text)
+        return bm25
+
+    def __len__(self) -> int:
+        return len(self.pages)
+
+    def search(self, query: str, top_k: int = DEFAULT_TOP_K) -> List[Tuple[int, float, float]]:
+        """(페이지 번호, 점수, 질문 토큰 포함 비율)을 점수 순으로 돌려준다."""
+        terms = [t for t in dict.fromkeys(tokenize(query)) if t not in _LOOKUP_STOP]
+        if not terms or not self.pages:
+            return []
+        n = len(self.pages)
+        scores: Dict[int, float] = defaultdict(float)
+        for term in terms:
+            postings = self._postings.get(term)
+            if not postings:
+                continue
+            idf = math.log(1 + (n - len(postings) + 0.5) / (len(postings) + 0.5))
+            for doc, tf in postings:
+                norm = self.k1 * (1 - self.b + self.b * self._lengths[doc] / self._avgdl)
+                scores[doc] += idf * tf * (self.k1 + 1) / (tf + norm)
+        best = sorted(scores.items(), key=lambda kv: kv[1], reverse=True)[:top_k]
+        return [(doc, score, sum(t in self._terms[doc] for t in terms) / len(terms)) for doc, score in best]
+
+
+def _snippet(text: str, query: str, chars: int = SNIPPET_CHARS) -> str:
+    flat = " ".join(text.split())
+    lowered = unicodedata.normalize("NFKC", flat).lower()
+    positions = [lowered.find(t) for t in tokenize(query) if t not in _LOOKUP_STOP]
+    positions = [p for p in positions if p >= 0]
+    start = max(0, min(positions) - chars // 4) if positions else 0
+    return ("…" if start else "") + flat[start:start + chars] + ("…" if start + chars < len(flat) else "")
+
+
+class LocalSearch:
+    """페이지 색인 위의 BM25 검색. 검색 범위(문서 집합)가 바뀔 때만 역색인을 다시 만든다."""
+
+    def __init__(self, index: Optional[PageIndex] = None):
+        self.index = index or PageIndex()
+        self._lock = threading.Lock()
+        self._key: Optional[tuple] = None
+        self._bm25: Optional[BM25Index] = None
+        self._docs: Dict[str, Tuple[str, Optional[str]]] = {}
+
+    def scope(self, paths: Optional[List[str]] = None, kb_id: Optional[str] = None) -> List[str]:
+        """검색 대상 문서(sha256): paths로 지정한 색인 파일 + S3에 업로드된 문서. paths가 없으면 색인 전체.
+
+        kb_id를 주면 업로드된 문서 중 그 KB로 올린 문서와, KB 없이 같은 버킷에 올린 문서만 남긴다
+        (다른 KB/버킷의 자료가 답변 근거로 섞이지 않도록).
+        """
+        docs = self.index.documents()
+        listed = {sha for sha in (self.index.lookup(p) for p in paths or []) if sha}
+        if kb_id is not None:
+            buckets = {split_s3_uri(d.uri)[0] for d in docs if d.uri and d.kb_id == kb_id}
+            docs = [d for d in docs if d.sha256 in listed or d.kb_id == kb_id
+                    or (d.uri and not d.kb_id and split_s3_uri(d.uri)[0] in buckets)]
+        if paths is None:
+            return [d.sha256 for d in docs]
+        return [d.sha256 for d in docs if d.sha256 in listed or d.uri]
+
+    def search(self, query: str, paths: Optional[List[str]] = None, top_k: int = DEFAULT_TOP_K,
+               kb_id: Optional[str] = None) -> List[Hit]:
+        shas = self.scope(paths, kb_id)
+        key = (frozenset(shas), self.index.signature())
+        with self._lock:
+            if key != self._key:
+                self._bm25 = BM25Index.from_page_index(self.index, shas)
+                self._docs = {d.sha256: (d.name, d.uri) for d in self.index.documents()}
+                self._key = key
+            bm25, docs = self._bm25, self._docs
+        hits = []
+        for doc, score, coverage in bm25.search(query, top_k):
+            sha, page, text = bm25.pages[doc]
+            name, uri = docs.get(sha, (sha[:12], None))
+            hits.append(Hit(sha, name, page, score, coverage, _snippet(text, query), uri))
+        return hits
+
+    @staticmethod
+    def answer(query: str, hits: List[Hit]) -> Optional[str]:
+        """위치 조회 질문이고 근거가 충분하면 로컬 답변을 만든다. 아니면 None."""
+        if not hits or not is_lookup_question(query) or hits[0].coverage < MIN_COVERAGE:
+            return None
+        good = [h for h in hits if h.coverage >= MIN_COVERAGE and h.score >= hits[0].score * 0.5][:3]
+        lines = ["로컬 색인에서 찾은 위치입니다 (KB/모델 호출 없음):"]
+        for h in good:
+            lines.append(f"- {h.cite()}: {h.snippet}")
+        return "\n".join(lines)
+
+    @staticmethod
+    def context(hits: List[Hit], limit: int = 3) -> str:
+        """질문에 덧붙일 참고 문맥"""
+        lines = ["[참고: 로컬 PDF 검색 결과]"]
+        lines.extend(f"- {h.cite()}: {h.snippet}" for h in hits[:limit])
+        return "\n".join(lines)
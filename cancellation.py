@@ -0,0 +1,22 @@
+"""
+작업 취소 (협조적 중단)
+
+워커는 threading.Event를 취소 신호로 받아 작업 경계(파일, 파트, 이벤트, 폴링 간격)마다 확인하고,
+설정되어 있으면 Cancelled를 던져 정리 후 빠져나온다.
+"""
+from __future__ import annotations
+
+import threading
+from typing import Optional
+
+
+class Cancelled(Exception):
+    """사용자 요청으로 작업이 취소됨"""
+
+    def __init__(self, msg: str = "사용자 요청으로 취소됨"):
+        super().__init__(msg)
+
+
+def check(cancel: Optional[threading.Event]):
+    if cancel is not None and cancel.is_set():
+        raise Cancelled()
@@ -0,0 +1,203 @@
+"""
+대화 모드 (후속 질문용 세션)
+
+"그럼 3장은?" 같은 후속 질문은 앞선 질문/답변이 있어야 뜻이 통한다.
+세션에 질문/답변과 그동안 retrieve로 가져온 구절을 보관해 두고, 다음 질문 때 함께 넘긴다.
+
+- 이전 대화는 질문/답변 텍스트만 strands 메시지로 넘긴다 (도구 호출/결과 블록은 빼서 토큰 절약).
+  토큰 예산을 넘으면 오래된 턴부터 통째로 뺀다. 가장 최근 턴은 예산을 넘어도 답변 앞부분을 잘라 남긴다.
+- 검색 구절은 세션에 따로 모아 두고, 새 질문과 BM25로 관련 있는 것만 예산 안에서 참고 문맥으로 붙인다.
+  모델이 이미 가진 근거로 답할 수 있으면 retrieve를 다시 부르지 않아도 된다.
+  구절은 검색한 KB ID와 함께 보관하고 같은 KB에 묻는 질문에만 붙인다.
+- 토큰 수는 모델 토크나이저 없이 글자 수로 어림한다 (영문/숫자 4글자당 1, 그 외 1글자당 1).
+- CLI에서는 이름을 붙여 ~/.pdfanalyze/sessions/<이름>.json에 저장해 두고 이어서 쓸 수 있다.
+"""
+from __future__ import annotations
+
+import re
+import threading
+import uuid
+from dataclasses import asdict, dataclass
+from typing import Any, Dict, List, Optional
+
+from app_paths import load_json, save_json, state_path
+from bm25_index import BM25Index
+
+DEFAULT_HISTORY_TOKENS = 2000   # 이전 대화(질문/답변)에 쓰는 토큰 예산
+DEFAULT_PASSAGE_TOKENS = 1500   # 다시 붙여 줄 검색 구절의 토큰 예산
+MAX_TURNS = 50
+MAX_PASSAGES = 200
+MIN_PASSAGE_COVERAGE = 0.3      # 질문 토큰 중 구절에 나와야 하는 비율
+
+_RESULT_SPLIT = re.compile(r"\n(?=Score: )")
+_DOCUMENT_ID = re.compile(r"^Document ID: (.+)$", re.MULTILINE)
+
+
+def estimate_tokens(text: str) -> int:
+    ascii_chars = sum(1 for c in text if c.isascii())
+    return (ascii_chars + 3) // 4 + (len(text) - ascii_chars)
+
+
+def truncate_tokens(text: str, tokens: int) -> str:
+    """estimate_tokens 기준으로 tokens 안에 드는 앞부분만 남긴다."""
+    if estimate_tokens(text) <= tokens:
+        return text
+    ascii_chars = other = 0
+    for i, c in enumerate(text):
+        if c.isascii():
+            ascii_chars += 1
+        else:
+            other += 1
+        if (ascii_chars + 3) // 4 + other > tokens:
+            return text[:i].rstrip() + " …(이하 생략)"
+    return text
+
+
+@dataclass
+class Turn:
+    question: str
+    answer: str
+
+
+@dataclass
+class Passage:
+    source: str     # 문서 URI (retrieve 결과의 Document ID)
+    text: str
+    kb_id: str = ""     # 검색한 KB (이전 버전 세션 파일에는 없음)
+
+
+def split_passages(text: str) -> List[Passage]:
+    """strands retrieve 결과 텍스트("Score: ... / Document ID: ... / Content: ...")를 구절 단위로 나눈다."""
+    passages = []
+    for block in _RESULT_SPLIT.split(text):
+        start = block.find("Content: ")
+        if start < 0:
+            continue
+        doc = _DOCUMENT_ID.search(block)
+        content = block[start + len("Content: "):].strip()
+        if content:
+            passages.append(Passage(doc.group(1).strip() if doc else "", content))
+    return passages
+
+
+def retrieved_passages(messages: List[Dict[str, Any]]) -> List[Passage]:
+    """에이전트 메시지 중 retrieve 도구 결과에 들어 있는 구절"""
+    retrieve_ids = set()
+    passages: List[Passage] = []
+    for msg in messages:
+        for block in msg.get("content") or []:
+            use = block.get("toolUse")
+            if use and use.get("name") == "retrieve":
+                retrieve_ids.add(use.get("toolUseId"))
+            result = block.get("toolResult")
+            if result and result.get("toolUseId") in retrieve_ids and result.get("status") == "success":
+                for c in result.get("content") or []:
+                    passages.extend(split_passages(str(c.get("text", ""))))
+    return passages
+
+
+class Conversation:
+    def __init__(self, name: Optional[str] = None, history_tokens: int = DEFAULT_HISTORY_TOKENS,
+                 passage_tokens: int = DEFAULT_PASSAGE_TOKENS):
+        self.name = name
+        self.id = uuid.uuid4().hex[:8]
+        self.history_tokens = history_tokens
+        self.passage_tokens = passage_tokens
+        self.turns: List[Turn] = []
+        self.passages: List[Passage] = []
+        self._lock = threading.Lock()
+
+    # ---- 다음 질문에 넘길 내용 ----
+    def messages(self) -> List[Dict[str, Any]]:
+        """토큰 예산 안에 드는 최근 턴을 strands 메시지 형식으로 돌려준다 (턴 단위로 자름).
+
+        가장 최근 턴은 후속 질문이 가리키는 대상이므로, 혼자서 예산을 넘으면 답변을 잘라서라도 넘긴다.
+        """
+        with self._lock:
+            turns = list(self.turns)
+        kept: List[Turn] = []
+        used = 0
+        for turn in reversed(turns):
+            cost = estimate_tokens(turn.question) + estimate_tokens(turn.answer)
+            if used + cost > self.history_tokens:
+                if not kept:
+                    budget = max(0, self.history_tokens - estimate_tokens(turn.question))
+                    kept.append(Turn(turn.question, truncate_tokens(turn.answer, budget)))
+                break
+            kept.append(turn)
+            used += cost
+        messages: List[Dict[str, Any]] = []
+        for turn in reversed(kept):
+            messages.append({"role": "user", "content": [{"text": turn.question}]})
+            messages.append({"role": "assistant", "content": [{"text": turn.answer}]})
+        return messages
+
+    def relevant_passages(self, question: str, kb_id: Optional[str] = None) -> List[Passage]:
+        """kb_id에서 검색한 구절 중 question과 관련 있는 것 (예산 안에서)"""
+        with self._lock:
+            passages = [p for p in self.passages if kb_id is None or p.kb_id == kb_id]
+        if not passages:
+            return []
+        bm25 = BM25Index()
+        for i, p in enumerate(passages):
+            bm25.add(p.source, i, p.text)
+        picked: List[Passage] = []
+        used = 0
+        for doc, _score, coverage in bm25.search(question, top_k=len(passages)):
+            if coverage < MIN_PASSAGE_COVERAGE:
+                continue
+            passage = passages[doc]
+            cost = estimate_tokens(passage.text)
+            if used + cost > self.passage_tokens:
+                continue
+            picked.append(passage)
+            used += cost
+        return picked
+
+    @staticmethod
+    def context(passages: List[Passage]) -> str:
+        """질문에 덧붙일 참고 문맥"""
+        lines = ["[참고: 이 대화에서 앞서 검색한 내용]"]
+        lines.extend(f"- ({p.source or '출처 미상'}) {' '.join(p.text.split())}" for p in passages)
+        return "\n".join(lines)
+
+    # ---- 기록 ----
+    def record(self, question: str, answer: str, messages: Optional[List[Dict[str, Any]]] = None,
+               kb_id: str = ""):
+        """끝난 턴을 추가한다. messages는 이번 턴에 에이전트가 주고받은 메시지(kb_id에서 검색한 구절 수집용)."""
+        with self._lock:
+            self.turns.append(Turn(question, answer))
+            del self.turns[:-MAX_TURNS]
+            known = {(p.kb_id, p.text) for p in self.passages}
+            for p in retrieved_passages(messages or []):
+                p.kb_id = kb_id
+                if (kb_id, p.text) not in known:
+                    known.add((kb_id, p.text))
+                    self.passages.append(p)
+            del self.passages[:-MAX_PASSAGES]
+
+    def describe(self) -> str:
+        history = self.messages()
+        tokens = sum(estimate_tokens(m["content"][0]["text"]) for m in history)
+        return (f"{len(self.turns)}턴 (전달 {len(history) // 2}턴, 약 {tokens}토큰),"
+                f" 검색 구절 {len(self.passages)}개")
+
+    # ---- 저장 (CLI) ----
+    @staticmethod
+    def _path(name: str) -> str:
+        return state_path("sessions", f"{name}.json")
+
+    @classmethod
+    def load(cls, name: str) -> "Conversation":
+        conv = cls(name)
+        data = load_json(cls._path(name), {})
+        conv.turns = [Turn(**t) for t in data.get("turns", [])]
+        conv.passages = [Passage(**p) for p in data.get("passages", [])]
+        return conv
+
+    def save(self):
+        if not self.name:
+            raise ValueError("이름 없는 대화는 저장할 수 없습니다")
+        with self._lock:
+            data = {"turns": [asdict(t) for t in self.turns], "passages": [asdict(p) for p in self.passages]}
+        save_json(self._path(self.name), data)
@@ -2,7 +2,7 @@
 PyQt GUI for PDF 학습 도우미 (AWS Bedrock Knowledge Base 기반)
 
 기능:
-- 질문하기 탭: KB 기반 질의응답 (옵션: 웹 보조 허용)
+- 질문하기 탭: KB 기반 질의응답 (옵션: 웹 보조 허용, 여러 질문 동시 실행 + 질문별 응답 기록, 대화 모드)
 - 문서 관리 탭: PDF 업로드(S3) 및 KB 동기화, KB 상태 점검
 
 요구사항:
@@ -15,42 +15,94 @@ PyQt GUI for PDF 학습 도우미 (AWS Bedrock Knowledge Base 기반)
 """
 from __future__ import annotations
 
+import importlib
 import os
 import sys
+import threading
+import time
 import traceback
-from typing import List, Optional
+from dataclasses import dataclass, field
+from typing import Any, Dict, List, Optional
 
-from PyQt6.QtCore import Qt, QThread, pyqtSignal
+_STARTED = time.perf_counter()  # 창 표시까지 걸린 시간 측정 기준 (PyQt 로드 포함)
+
+from PyQt6.QtCore import Qt, QThread, QTimer, pyqtSignal
+from PyQt6.QtGui import QTextCursor
 from PyQt6.QtWidgets import (
     QApplication, QMainWindow, QWidget, QTabWidget, QVBoxLayout, QHBoxLayout,
     QLabel, QLineEdit, QPushButton, QFileDialog, QPlainTextEdit, QCheckBox,
-    QGroupBox, QFormLayout, QMessageBox, QListWidget, QListWidgetItem, QSizePolicy
+    QGroupBox, QFormLayout, QMessageBox, QListWidget, QListWidgetItem, QSizePolicy, QSpinBox, QToolButton,
+    QDoubleSpinBox
 )
 
-# 외부 종속 모듈 로드 (런타임 에러 핸들링)
-_load_errors = []
+import workflows
+from agent_pool import AgentPool
+from cancellation import Cancelled
+from conversation import Conversation
+from log_sink import LogSink
+from pdf_index import PageIndex
+from answer_cache import AnswerCache
+from bm25_index import LocalSearch
+from retrieve_cache import RetrieveCache
+from semantic_cache import DEFAULT_THRESHOLD, SemanticCache, numpy_available
+from task_scheduler import CATEGORY_NAMES, DEFAULT_LIMITS, DEFAULT_MAX_RUNNING, QUEUED, Task, TaskScheduler
+from upload_engine import DEFAULT_PART_CONCURRENCY, DEFAULT_PART_SIZE, DEFAULT_WORKERS, MB, ResumeJournal
+
+# 무거운 외부 모듈(boto3, strands 등)은 창을 띄운 뒤 백그라운드에서 미리 로드한다.
+# (이름, import 대상) 순서대로 로드하며, 실패는 경고로만 표시한다.
+AUTO_SYNC_DELAY = 30   # 자동 동기화 기본 대기 시간(초)
+MAX_ANSWER_HISTORY = 100   # 질문 기록에 남길 최대 개수 (넘으면 오래된 완료 기록부터 삭제)
+
+WARM_MODULES = [
+    ("boto3", "boto3"),
+    ("pdf_uploader", "pdf_uploader"),
+    ("kb_for_rrag", "kb_for_rrag"),
+    ("strands", "strands"),
+    ("strands_tools", "strands_tools.retrieve"),
+]
+
+
+def _client_error_code(e: Exception) -> Optional[str]:
+    """botocore ClientError이면 오류 코드를 돌려준다 (botocore는 지연 로드되므로 로드된 경우만 확인)."""
+    exc = sys.modules.get("botocore.exceptions")
+    if exc is not None and isinstance(e, exc.ClientError):
+        return e.response.get("Error", {}).get("Code")
+    return None
+
+
+# ---------- Worker Threads ----------
+# 실제 처리 로직은 workflows 모듈에 있고, 워커는 콜백을 시그널로 연결한다.
+# 모듈 사전 로드를 제외한 워커는 직접 start()하지 않고 TaskScheduler에 제출한다.
 
-try:
-    import boto3
-    from botocore.exceptions import ClientError
-except Exception as e:
-    _load_errors.append(f"boto3 import 오류: {e}")
+class ModuleWarmWorker(QThread):
+    loaded = pyqtSignal(str, float)   # 모듈 이름, import 소요 시간(초)
+    failed = pyqtSignal(str)
+    finished = pyqtSignal(float)      # 전체 소요 시간(초)
 
-try:
-    # 에이전트/도구는 런타임 워커에서 지연 로드
-    from kb_for_rrag import PAPER_AGENT_PROMPT  # 프롬프트 재사용
-except Exception as e:
-    _load_errors.append(f"kb_for_rrag import 오류: {e}")
+    def run(self):
+        started = time.perf_counter()
+        for name, target in WARM_MODULES:
+            t0 = time.perf_counter()
+            try:
+                importlib.import_module(target)
+                self.loaded.emit(name, time.perf_counter() - t0)
+            except Exception as e:
+                self.failed.emit(f"{name} import 오류: {e}")
+        self.finished.emit(time.perf_counter() - started)
 
-try:
-    from pdf_uploader import PDFUploader
-except Exception as e:
-    _load_errors.append(f"pdf_uploader import 오류: {e}")
 
+class CancellableWorker(QThread):
+    """cancel()로 협조적 중단을 요청할 수 있는 워커. 작업 흐름에는 self.cancel_event를 넘긴다."""
 
-# ---------- Worker Threads ----------
+    def __init__(self):
+        super().__init__()
+        self.cancel_event = threading.Event()
+
+    def cancel(self):
+        self.cancel_event.set()
 
-class KBValidateWorker(QThread):
+
+class KBValidateWorker(CancellableWorker):
     finished = pyqtSignal(str)
     failed = pyqtSignal(str)
 
@@ -61,113 +113,161 @@ class KBValidateWorker(QThread):
 
     def run(self):
         try:
-            session_kwargs = {}
-            if self.region:
-                session_kwargs["region_name"] = self.region
-            client = boto3.client("bedrock-agent", **session_kwargs)
-            kb = client.get_knowledge_base(knowledgeBaseId=self.kb_id)["knowledgeBase"]
-            status = kb.get("status")
-            msg = [f"[KB] ID={self.kb_id}, 상태={status}"]
-            ds = client.list_data_sources(knowledgeBaseId=self.kb_id)
-            summaries = ds.get("dataSourceSummaries", [])
-            if not summaries:
-                msg.append("[KB] 데이터 소스: 없음 (S3 데이터 소스 추가 필요)")
-            else:
-                msg.append(f"[KB] 데이터 소스: {len(summaries)}개")
-                for s in summaries:
-                    name = s.get("name") or s.get("dataSourceId")
-                    msg.append(f" - {name}")
-            self.finished.emit("\n".join(msg))
-        except ClientError as e:
-            code = e.response.get("Error", {}).get("Code")
-            self.failed.emit(f"[KB 점검 실패] {code}: {e}")
+            self.finished.emit(workflows.validate_kb(self.kb_id, self.region, cancel=self.cancel_event))
+        except Cancelled:
+            self.failed.emit("[KB 점검] 취소됨")
         except Exception as e:
-            self.failed.emit(f"[KB 점검 실패] {e}\n{traceback.format_exc()}")
+            code = _client_error_code(e)
+            if code:
+                self.failed.emit(f"[KB 점검 실패] {code}: {e}")
+            else:
+                self.failed.emit(f"[KB 점검 실패] {e}\n{traceback.format_exc()}")
 
 
-class AskWorker(QThread):
+class AskWorker(CancellableWorker):
+    chunk = pyqtSignal(str)          # 스트리밍 모드: 생성 중인 텍스트 조각
+    first_token = pyqtSignal(float)  # 스트리밍 모드: 첫 토큰까지 걸린 시간(초)
+    cache_hit = pyqtSignal(float)    # 응답 캐시에서 꺼낸 답변 (의미 캐시면 유사도, 같은 질문이면 0)
+    local_hit = pyqtSignal()         # 로컬 색인만으로 답한 경우
+    traced = pyqtSignal(object)      # 단계별 소요 시간 (tracing.Trace)
+    log = pyqtSignal(str)
     finished = pyqtSignal(str)
     failed = pyqtSignal(str)
 
-    def __init__(self, kb_id: str, region: Optional[str], prompt: str, allow_web: bool):
+    def __init__(self, kb_id: str, region: Optional[str], prompt: str, allow_web: bool, pool: AgentPool,
+                 stream: bool = False, cache: Optional[AnswerCache] = None,
+                 local: Optional[LocalSearch] = None, local_paths: Optional[List[str]] = None,
+                 local_context: bool = False, session: Optional[Conversation] = None,
+                 semantic: Optional[SemanticCache] = None):
         super().__init__()
         self.kb_id = kb_id
         self.region = region
         self.prompt = prompt
         self.allow_web = allow_web
+        self.pool = pool
+        self.stream = stream
+        self.cache = cache
+        self.local = local
+        self.local_paths = local_paths
+        self.local_context = local_context
+        self.session = session
+        self.semantic = semantic
 
     def run(self):
         try:
-            os.environ["KNOWLEDGE_BASE_ID"] = self.kb_id
-
-            if self.region:
-                os.environ["AWS_REGION"] = self.region
-                os.environ["AWS_DEFAULT_REGION"] = self.region
-                
-            # strands 및 tools는 워커 내부에서 로드 (GUI 블로킹 방지)
-            from strands import Agent
-            from strands_tools import retrieve, http_request
-
-            tools = [retrieve]
-            if self.allow_web:
-                tools.append(http_request)
-
-            # 에이전트 생성
-            agent = Agent(
-                model="us.amazon.nova-lite-v1:0",
-                system_prompt=PAPER_AGENT_PROMPT,
-                tools=tools
-            )
-            # 응답
-            resp = agent(self.prompt)
-            self.finished.emit(str(resp))
+            result = workflows.ask(self.kb_id, self.region, self.prompt, self.allow_web, self.pool,
+                                   stream=self.stream, on_chunk=self.chunk.emit, cache=self.cache,
+                                   on_log=self.log.emit, cancel=self.cancel_event, local=self.local,
+                                   local_paths=self.local_paths, local_context=self.local_context,
+                                   session=self.session, semantic=self.semantic)
+            self.traced.emit(result.trace)
+            if result.local:
+                self.local_hit.emit()
+            elif result.cached:
+                self.cache_hit.emit(result.similarity or 0.0)
+            elif result.ttft is not None:
+                self.first_token.emit(result.ttft)
+            self.finished.emit(result.text)
+        except Cancelled:
+            self.failed.emit("[질문 취소됨]")
         except Exception as e:
             self.failed.emit(f"[질문 처리 오류] {e}\n{traceback.format_exc()}")
 
 
-class UploadWorker(QThread):
+class WarmupWorker(CancellableWorker):
+    progress = pyqtSignal(str)
+    finished = pyqtSignal(float, bool)   # 소요 시간(초), 모든 단계 성공 여부
+
+    def __init__(self, kb_id: str, region: Optional[str], pool: AgentPool, allow_web: bool):
+        super().__init__()
+        self.kb_id = kb_id
+        self.region = region
+        self.pool = pool
+        self.allow_web = allow_web
+
+    def run(self):
+        # 사전 준비는 실패해도 질문 처리에는 영향이 없으므로 오류는 진행 로그로만 남긴다
+        self.finished.emit(*workflows.warm_up(self.kb_id, self.region, self.pool, self.allow_web,
+                                              on_progress=self.progress.emit))
+
+
+class UploadWorker(CancellableWorker):
     progress = pyqtSignal(str)
     finished = pyqtSignal(str)
     failed = pyqtSignal(str)
 
-    def __init__(self, bucket: str, kb_id: Optional[str], prefix: str, files: List[str]):
+    def __init__(self, bucket: str, kb_id: Optional[str], prefix: str, files: List[str],
+                 workers: int = DEFAULT_WORKERS, skip_unchanged: bool = True, multipart: bool = True,
+                 part_size: int = DEFAULT_PART_SIZE, part_concurrency: int = DEFAULT_PART_CONCURRENCY,
+                 extract: bool = True):
         super().__init__()
         self.bucket = bucket
         self.kb_id = kb_id
         self.prefix = prefix
         self.files = files
+        self.workers = workers
+        self.skip_unchanged = skip_unchanged
+        self.multipart = multipart
+        self.part_size = part_size
+        self.part_concurrency = part_concurrency
+        self.extract = extract
 
     def run(self):
         try:
-            uploader = PDFUploader(self.bucket, self.kb_id)
-            uploaded = []
-            for f in self.files:
-                self.progress.emit(f"[업로드] {f} ...")
-                uri = uploader.upload_pdf(f, self.prefix)
-                uploaded.append(uri)
-                self.progress.emit(f"[완료] {uri}")
-            self.finished.emit(f"총 {len(uploaded)}개 업로드 완료")
+            report = workflows.upload(
+                self.bucket, self.kb_id, self.prefix, self.files,
+                workers=self.workers, skip_unchanged=self.skip_unchanged, multipart=self.multipart,
+                part_size=self.part_size, part_concurrency=self.part_concurrency, extract=self.extract,
+                on_progress=self.progress.emit, cancel=self.cancel_event,
+            )
+            self.finished.emit(report.summary())
         except Exception as e:
             self.failed.emit(f"[업로드 실패] {e}\n{traceback.format_exc()}")
 
 
-class SyncWorker(QThread):
+class SyncWorker(CancellableWorker):
+    progress = pyqtSignal(str)
     finished = pyqtSignal(str)
     failed = pyqtSignal(str)
 
-    def __init__(self, kb_id: str):
+    def __init__(self, kb_id: str, region: Optional[str] = None, force: bool = False):
         super().__init__()
         self.kb_id = kb_id
+        self.region = region
+        self.force = force
 
     def run(self):
         try:
-            uploader = PDFUploader(bucket_name="dummy", knowledge_base_id=self.kb_id)  # bucket은 사용 안함
-            uploader.sync_knowledge_base()
-            self.finished.emit("KB 동기화 작업 시작 요청 완료 (완료까지 수 분 소요)")
+            started = time.monotonic()
+            jobs = workflows.sync(self.kb_id, self.region, on_progress=self.progress.emit,
+                                  cancel=self.cancel_event, force=self.force)
+            self.finished.emit(f"동기화 종료: {workflows.describe_jobs(jobs)} ({time.monotonic() - started:.0f}초)")
+        except Cancelled as e:
+            self.failed.emit(f"[동기화] {e}")
         except Exception as e:
             self.failed.emit(f"[동기화 실패] {e}\n{traceback.format_exc()}")
 
 
+# ---------- 질문 기록 ----------
+
+@dataclass(eq=False)
+class AnswerEntry:
+    """질문 한 건의 응답 창 내용. 질문마다 따로 보관하고 선택한 기록을 응답 창에 표시한다."""
+    prompt: str
+    item: QListWidgetItem
+    task: Optional[Task] = None
+    text: str = "대기 중... (동시 질문 한도)"
+    status: str = ""
+    trace: Any = None
+    started: float = field(default_factory=time.perf_counter)
+    streaming: bool = False
+    result: Optional[str] = None     # 끝나면 "완료" / "실패" / "취소"
+
+    def label(self) -> str:
+        state = self.result or (self.task.state if self.task is not None else QUEUED)
+        return f"[{state}] {self.prompt.splitlines()[0][:40]}"
+
+
 # ---------- GUI ----------
 
 class MainWindow(QMainWindow):
@@ -176,16 +276,45 @@ class MainWindow(QMainWindow):
         self.setWindowTitle("PDF 학습 도우미 (PyQt)")
         self.resize(980, 720)
 
-        if _load_errors:
-            QMessageBox.warning(self, "의존성 경고", "다음 모듈 로드 중 문제가 발생했습니다:\n" + "\n".join(_load_errors))
-
         self._build_ui()
-
-        # Workers
-        self._ask_worker: Optional[AskWorker] = None
-        self._kb_worker: Optional[KBValidateWorker] = None
-        self._upload_worker: Optional[UploadWorker] = None
-        self._sync_worker: Optional[SyncWorker] = None
+        # 진행 로그는 버퍼에 모았다가 주기적으로 한 번에 화면에 붙인다
+        self._log = LogSink(self.txt_log, parent=self)
+
+        # 설정별로 재사용되는 strands Agent 풀
+        self._agent_pool = AgentPool(retrieve_cache=RetrieveCache())
+        self._answer_cache = AnswerCache()
+        # 바꿔 말한 질문용 의미 캐시 (NumPy가 없으면 사용 안 함)
+        self._semantic_cache = SemanticCache(self._answer_cache) if numpy_available() else None
+        self._local_search = LocalSearch()
+        self._conversation = Conversation()   # 대화 모드에서 이어 쓰는 세션 ("새 대화"로 교체)
+
+        pending = ResumeJournal().pending()
+        if pending:
+            self._append_log(f"[이어 올리기] 중단된 멀티파트 업로드 {len(pending)}개 (같은 파일을 다시 업로드하면 이어서 진행)")
+
+        # 작업은 분류별 동시 실행 한도/우선순위에 따라 스케줄러가 시작한다
+        self._scheduler = TaskScheduler(parent=self)
+        self._scheduler.changed.connect(self._refresh_task_list)
+        self._scheduler.dropped.connect(self._on_task_dropped)
+        # 질문 기록: 워커별 진행 중인 기록과 응답 창에 표시 중인 기록
+        self._answers: Dict[QThread, AnswerEntry] = {}
+        self._shown_answer: Optional[AnswerEntry] = None
+
+        # 자동 동기화: 업로드가 끝날 때마다 다시 시작되는 단발 타이머 (대기 시간 동안 조용하면 동기화)
+        self._auto_sync_timer = QTimer(self)
+        self._auto_sync_timer.setSingleShot(True)
+        self._auto_sync_timer.timeout.connect(self._on_auto_sync_due)
+        self._warmed_key: Optional[tuple] = None   # 사전 준비를 성공적으로 마친 (kb_id, region, allow_web)
+        self._warm_recheck = False                 # 사전 준비 중 입력이 바뀜 → 끝난 뒤 다시 확인
+
+        # 창을 먼저 띄우고 무거운 모듈은 백그라운드에서 로드
+        self._load_errors: List[str] = []
+        self._import_timings: List[str] = []
+        self._warm_worker = ModuleWarmWorker()
+        self._warm_worker.loaded.connect(lambda name, sec: self._import_timings.append(f"{name} {sec:.2f}초"))
+        self._warm_worker.failed.connect(self._load_errors.append)
+        self._warm_worker.finished.connect(self._on_modules_warmed)
+        self._warm_worker.start()
 
     # ---- UI 구성 ----
     def _build_ui(self):
@@ -197,6 +326,7 @@ class MainWindow(QMainWindow):
         tabs.addTab(self._build_ask_tab(), "질문하기")
         tabs.addTab(self._build_manage_tab(), "문서 관리")
         root.addWidget(tabs)
+        root.addWidget(self._build_task_group())
 
         self.setCentralWidget(central)
 
@@ -212,7 +342,14 @@ class MainWindow(QMainWindow):
         btn_validate = QPushButton("KB 점검")
         btn_validate.clicked.connect(self.on_validate_kb)
 
-        form.addRow(QLabel("AWS Region"), self._hbox(self.ed_region, self._spacer()))
+        # KB/리전 변경 시 이전 설정의 Agent 폐기
+        self.ed_region.editingFinished.connect(self._on_config_changed)
+        self.ed_kb.editingFinished.connect(self._on_config_changed)
+
+        self.cb_warmup = QCheckBox("KB ID/리전 입력 시 사전 준비(warm-up)")
+        self.cb_warmup.setChecked(True)
+
+        form.addRow(QLabel("AWS Region"), self._hbox(self.ed_region, self.cb_warmup))
         form.addRow(QLabel("Knowledge Base ID"), self._hbox(self.ed_kb, btn_validate))
         form.addRow(QLabel("S3 Bucket"), self.ed_bucket)
         form.addRow(QLabel("S3 Prefix"), self.ed_prefix)
@@ -225,6 +362,40 @@ class MainWindow(QMainWindow):
 
         self.cb_allow_web = QCheckBox("웹 보조 허용 (http_request)")
         self.cb_allow_web.setChecked(False)
+        self.cb_stream = QCheckBox("스트리밍 응답 (생성되는 대로 표시)")
+        self.cb_stream.setChecked(True)
+        self.cb_answer_cache = QCheckBox("응답 캐시 사용 (같은 질문은 저장된 답변 재사용)")
+        self.cb_answer_cache.setChecked(True)
+        self.cb_semantic_cache = QCheckBox("비슷한 질문도 캐시에서 답변 (의미 캐시)")
+        self.sp_similarity = QDoubleSpinBox()
+        self.sp_similarity.setRange(0.5, 0.99)
+        self.sp_similarity.setSingleStep(0.01)
+        self.sp_similarity.setValue(DEFAULT_THRESHOLD)
+        self.sp_similarity.setPrefix("유사도 ≥ ")
+        self.sp_similarity.valueChanged.connect(self._on_similarity_changed)
+        self.lbl_semantic = QLabel("")
+        if not numpy_available():
+            self.cb_semantic_cache.setEnabled(False)
+            self.sp_similarity.setEnabled(False)
+            self.cb_semantic_cache.setToolTip("numpy가 설치되어 있지 않아 사용할 수 없습니다 (pip install numpy)")
+        else:
+            self.cb_semantic_cache.setChecked(True)
+        self.cb_answer_cache.toggled.connect(lambda on: self.cb_semantic_cache.setEnabled(on and numpy_available()))
+        self.cb_local_first = QCheckBox("로컬 색인 먼저 검색 (페이지 위치 질문은 KB 호출 없이 답변)")
+        self.cb_local_first.setChecked(True)
+        self.cb_local_context = QCheckBox("로컬 검색 결과를 참고 문맥으로 함께 전달")
+        self.cb_local_first.toggled.connect(self.cb_local_context.setEnabled)
+        self.cb_multi_query = QCheckBox("여러 질문 동시 실행 (한 줄에 질문 하나, 이전 질문을 취소하지 않음)")
+        self.sp_ask_limit = QSpinBox()
+        self.sp_ask_limit.setRange(1, DEFAULT_MAX_RUNNING)
+        self.sp_ask_limit.setValue(DEFAULT_LIMITS["ask"])
+        self.sp_ask_limit.setPrefix("동시 ")
+        self.sp_ask_limit.setSuffix("개")
+        self.sp_ask_limit.valueChanged.connect(self._on_ask_limit_changed)
+        self.cb_conversation = QCheckBox("대화 모드 (이전 질문/답변과 검색 결과를 이어서 사용)")
+        btn_new_conversation = QPushButton("새 대화")
+        btn_new_conversation.clicked.connect(self.on_new_conversation)
+        self.lbl_conversation = QLabel("")
 
         self.ed_prompt = QPlainTextEdit()
         self.ed_prompt.setPlaceholderText("교재/강의자료에 대한 질문을 입력하세요.\n예) '2장 프로세스 관리의 핵심 개념을 요약해줘' 또는 'AWS-Service-IAM 자료에서 IAM 정의를 KB 근거와 함께 알려줘'")
@@ -233,22 +404,63 @@ class MainWindow(QMainWindow):
         btn_row = QHBoxLayout()
         btn_ask = QPushButton("질문하기")
         btn_ask.clicked.connect(self.on_ask)
+        btn_stop = QPushButton("중지")
+        btn_stop.clicked.connect(lambda: self._cancel_category("ask"))
         btn_clear = QPushButton("지우기")
         btn_clear.clicked.connect(lambda: self.ed_prompt.setPlainText(""))
         btn_row.addWidget(btn_ask)
+        btn_row.addWidget(btn_stop)
         btn_row.addWidget(btn_clear)
         btn_row.addStretch()
 
+        self.list_answers = QListWidget()
+        self.list_answers.setMaximumWidth(260)
+        self.list_answers.currentItemChanged.connect(self._on_answer_selected)
+        btn_clear_history = QPushButton("완료 기록 지우기")
+        btn_clear_history.clicked.connect(self.on_clear_answers)
         self.txt_answer = QPlainTextEdit()
         self.txt_answer.setReadOnly(True)
         self.txt_answer.setPlaceholderText("응답이 여기에 표시됩니다 (근거: 파일/섹션/페이지 포함).")
+        self.lbl_ask_status = QLabel("")
+
+        # 단계별 소요 시간 (접었다 펼 수 있는 패널)
+        self.btn_trace = QToolButton()
+        self.btn_trace.setText("단계별 소요 시간")
+        self.btn_trace.setCheckable(True)
+        self.btn_trace.setToolButtonStyle(Qt.ToolButtonStyle.ToolButtonTextBesideIcon)
+        self.btn_trace.setArrowType(Qt.ArrowType.RightArrow)
+        self.btn_trace.setStyleSheet("QToolButton { border: none; }")
+        self.txt_trace = QPlainTextEdit()
+        self.txt_trace.setReadOnly(True)
+        self.txt_trace.setMaximumHeight(160)
+        self.txt_trace.setPlaceholderText("질문을 처리하면 import/에이전트 생성/도구 호출/모델 추론 시간이 표시됩니다.")
+        self.txt_trace.setVisible(False)
+        self.btn_trace.toggled.connect(self._on_trace_toggled)
 
         lay.addWidget(self.cb_allow_web)
+        lay.addWidget(self.cb_stream)
+        lay.addWidget(self.cb_answer_cache)
+        lay.addWidget(self._hbox(self.cb_semantic_cache, self.sp_similarity, self.lbl_semantic, self._spacer()))
+        lay.addWidget(self._hbox(self.cb_local_first, self.cb_local_context))
+        lay.addWidget(self._hbox(self.cb_multi_query, self.sp_ask_limit, self._spacer()))
+        lay.addWidget(self._hbox(self.cb_conversation, btn_new_conversation, self.lbl_conversation, self._spacer()))
         lay.addLayout(btn_row)
         lay.addWidget(QLabel("질문"))
         lay.addWidget(self.ed_prompt)
         lay.addWidget(QLabel("응답"))
-        lay.addWidget(self.txt_answer)
+
+        history = QVBoxLayout()
+        history.addWidget(self.list_answers)
+        history.addWidget(btn_clear_history)
+        answer = QVBoxLayout()
+        answer.addWidget(self.txt_answer)
+        answer.addWidget(self.lbl_ask_status)
+        answer.addWidget(self.btn_trace)
+        answer.addWidget(self.txt_trace)
+        answer_row = QHBoxLayout()
+        answer_row.addLayout(history)
+        answer_row.addLayout(answer, 1)
+        lay.addLayout(answer_row)
 
         return w
 
@@ -268,29 +480,99 @@ class MainWindow(QMainWindow):
 
         self.list_files = QListWidget()
         self.list_files.setSizePolicy(QSizePolicy.Policy.Expanding, QSizePolicy.Policy.Expanding)
+        self.list_files.setToolTip("더블클릭하면 로컬 색인의 목차/첫 페이지 미리보기를 로그에 표시")
+        self.list_files.itemDoubleClicked.connect(self.on_preview_file)
 
         # 동작 버튼
         action_row = QHBoxLayout()
         btn_upload = QPushButton("선택 파일 업로드(S3)")
         btn_upload.clicked.connect(self.on_upload_files)
         btn_sync = QPushButton("KB 동기화 시작")
-        btn_sync.clicked.connect(self.on_sync_kb)
+        btn_sync.clicked.connect(lambda: self.on_sync_kb())
+        self.sp_upload_workers = QSpinBox()
+        self.sp_upload_workers.setRange(1, 32)
+        self.sp_upload_workers.setValue(DEFAULT_WORKERS)
+        btn_stop_upload = QPushButton("업로드 중지")
+        btn_stop_upload.clicked.connect(lambda: self._cancel_category("upload"))
+        btn_stop_sync = QPushButton("동기화 중지")
+        btn_stop_sync.clicked.connect(lambda: self._cancel_category("sync"))
         action_row.addWidget(btn_upload)
+        action_row.addWidget(btn_stop_upload)
         action_row.addWidget(btn_sync)
+        action_row.addWidget(btn_stop_sync)
+        action_row.addWidget(QLabel("동시 업로드"))
+        action_row.addWidget(self.sp_upload_workers)
+        self.cb_skip_unchanged = QCheckBox("변경 없는 파일 건너뛰기")
+        self.cb_skip_unchanged.setChecked(True)
+        action_row.addWidget(self.cb_skip_unchanged)
+        self.cb_force_sync = QCheckBox("변경 없어도 동기화")
+        self.cb_force_sync.setToolTip("끄면 마지막 동기화 이후 업로드한 파일이 없을 때 동기화를 건너뜁니다")
+        action_row.addWidget(self.cb_force_sync)
+
+        # 업로드 후 자동 동기화
+        auto_row = QHBoxLayout()
+        self.cb_auto_sync = QCheckBox("업로드 후 자동 동기화")
+        self.cb_auto_sync.toggled.connect(self._on_auto_sync_toggled)
+        self.sp_auto_sync_delay = QSpinBox()
+        self.sp_auto_sync_delay.setRange(5, 3600)
+        self.sp_auto_sync_delay.setSuffix(" 초")
+        self.sp_auto_sync_delay.setValue(AUTO_SYNC_DELAY)
+        self.lbl_auto_sync = QLabel("")
+        auto_row.addWidget(self.cb_auto_sync)
+        auto_row.addWidget(QLabel("마지막 업로드 후 대기"))
+        auto_row.addWidget(self.sp_auto_sync_delay)
+        auto_row.addWidget(self.lbl_auto_sync)
+        auto_row.addStretch()
+
+        # 대용량 파일 멀티파트 업로드 설정
+        multipart_row = QHBoxLayout()
+        self.cb_multipart = QCheckBox("대용량 파일 멀티파트(이어 올리기)")
+        self.cb_multipart.setChecked(True)
+        self.sp_part_size = QSpinBox()
+        self.sp_part_size.setRange(5, 512)
+        self.sp_part_size.setSuffix(" MB")
+        self.sp_part_size.setValue(DEFAULT_PART_SIZE // MB)
+        self.sp_part_concurrency = QSpinBox()
+        self.sp_part_concurrency.setRange(1, 16)
+        self.sp_part_concurrency.setValue(DEFAULT_PART_CONCURRENCY)
+        multipart_row.addWidget(self.cb_multipart)
+        multipart_row.addWidget(QLabel("파트 크기"))
+        multipart_row.addWidget(self.sp_part_size)
+        multipart_row.addWidget(QLabel("파트 동시 전송"))
+        multipart_row.addWidget(self.sp_part_concurrency)
+        self.cb_extract = QCheckBox("로컬 텍스트 추출(페이지 색인)")
+        self.cb_extract.setChecked(True)
+        multipart_row.addWidget(self.cb_extract)
+        multipart_row.addStretch()
         action_row.addStretch()
 
         self.txt_log = QPlainTextEdit()
         self.txt_log.setReadOnly(True)
         self.txt_log.setPlaceholderText("업로드/동기화/점검 로그가 표시됩니다.")
+        self.cb_log_file = QCheckBox("로그 파일로도 저장 (~/.pdfanalyze/logs/gui.log)")
+        self.cb_log_file.toggled.connect(lambda on: self._log.set_file_mirror(on))
 
         lay.addLayout(file_row)
         lay.addWidget(self.list_files)
         lay.addLayout(action_row)
-        lay.addWidget(QLabel("로그"))
+        lay.addLayout(multipart_row)
+        lay.addLayout(auto_row)
+        lay.addWidget(self._hbox(QLabel("로그"), self._spacer(), self.cb_log_file))
         lay.addWidget(self.txt_log)
 
         return w
 
+    def _build_task_group(self) -> QGroupBox:
+        grp = QGroupBox("작업 대기열")
+        lay = QHBoxLayout(grp)
+        self.list_tasks = QListWidget()
+        self.list_tasks.setMaximumHeight(90)
+        btn_cancel = QPushButton("선택 작업 취소")
+        btn_cancel.clicked.connect(self.on_cancel_task)
+        lay.addWidget(self.list_tasks)
+        lay.addWidget(btn_cancel, alignment=Qt.AlignmentFlag.AlignTop)
+        return grp
+
     # ---- 유틸 ----
     def _hbox(self, *widgets):
         w = QWidget()
@@ -307,9 +589,85 @@ class MainWindow(QMainWindow):
         return s
 
     def _append_log(self, text: str):
-        self.txt_log.appendPlainText(text)
+        self._log.write(text)
+
+    def _on_modules_warmed(self, total: float):
+        self._append_log(f"[시작] 모듈 사전 로드 {total:.2f}초: " + ", ".join(self._import_timings))
+        if self._load_errors:
+            QMessageBox.warning(self, "의존성 경고", "다음 모듈 로드 중 문제가 발생했습니다:\n" + "\n".join(self._load_errors))
+        # 환경 변수로 KB ID/리전이 이미 채워져 있으면 바로 사전 준비
+        self._maybe_warm_up()
+
+    def _maybe_warm_up(self):
+        kb_id = self.ed_kb.text().strip()
+        region = self.ed_region.text().strip() or None
+        if not (self.cb_warmup.isChecked() and kb_id and region):
+            return
+        allow_web = self.cb_allow_web.isChecked()
+        key = (kb_id, region, allow_web)
+        if key == self._warmed_key:
+            return
+        if self._scheduler.running("warmup") or self._scheduler.pending("warmup"):
+            # 진행 중인 사전 준비가 끝나면 그때의 입력값으로 다시 확인한다
+            self._warm_recheck = True
+            return
+        self._warm_recheck = False
+        worker = WarmupWorker(kb_id, region, self._agent_pool, allow_web)
+        worker.progress.connect(self._log.write, Qt.ConnectionType.DirectConnection)
+        worker.finished.connect(lambda sec, ok: self._on_warmed_up(key, sec, ok))
+        self._scheduler.submit("warmup", f"KB={kb_id}", worker)
+
+    def _on_warmed_up(self, key: tuple, seconds: float, ok: bool):
+        if ok:
+            self._warmed_key = key
+            self._append_log(f"[사전 준비] 완료 ({seconds:.2f}초)")
+        else:
+            # 실패한 설정은 기억하지 않으므로 다음 입력 변경 때 다시 시도한다
+            self._append_log(f"[사전 준비] 일부 단계 실패 ({seconds:.2f}초)")
+        if self._warm_recheck:
+            # 스케줄러가 이 작업을 끝난 것으로 처리한 뒤에 확인하도록 이벤트 루프에 넘긴다
+            QTimer.singleShot(0, self._maybe_warm_up)
+
+    def _cancel_category(self, category: str):
+        running, pending = self._scheduler.running(category), self._scheduler.pending(category)
+        if running or pending:
+            self._scheduler.cancel_category(category)
+            self._append_log(f"[중지 요청] {CATEGORY_NAMES[category]} (실행 {len(running)}개, 대기 {len(pending)}개)")
+
+    def _refresh_task_list(self):
+        self.list_tasks.clear()
+        for task in self._scheduler.tasks():
+            item = QListWidgetItem(task.describe())
+            item.setData(Qt.ItemDataRole.UserRole, task)
+            self.list_tasks.addItem(item)
+        # 질문 기록의 대기/실행 상태 표시도 함께 갱신
+        for entry in self._answers.values():
+            entry.item.setText(entry.label())
+
+    def _on_task_dropped(self, task: Task):
+        self._append_log(f"[대기 취소] {task.describe()}")
+        entry = self._answers.pop(task.worker, None)
+        if entry is not None:
+            self._finish_answer(entry, "[질문 취소됨]", "취소")
+
+    def on_cancel_task(self):
+        item = self.list_tasks.currentItem()
+        if item is not None:
+            self._scheduler.cancel(item.data(Qt.ItemDataRole.UserRole))
+
+    def closeEvent(self, event):
+        # 창을 닫으면 대기 작업을 버리고 실행 중인 작업을 취소한 뒤 정리될 때까지 잠시 기다린다
+        self._scheduler.shutdown(3000)
+        self._log.close()
+        super().closeEvent(event)
 
     # ---- Slots ----
+    def _on_config_changed(self):
+        kb_id = self.ed_kb.text().strip()
+        region = self.ed_region.text().strip() or None
+        self._agent_pool.retain(kb_id, region)
+        self._maybe_warm_up()
+
     def on_validate_kb(self):
         kb_id = self.ed_kb.text().strip()
         region = self.ed_region.text().strip() or None
@@ -317,16 +675,15 @@ class MainWindow(QMainWindow):
             QMessageBox.warning(self, "입력 필요", "Knowledge Base ID를 입력하세요.")
             return
         self._append_log(f"[점검] KB={kb_id}, Region={region or '(기본)'}")
-        self._kb_worker = KBValidateWorker(kb_id, region)
-        self._kb_worker.finished.connect(lambda msg: self._append_log(msg))
-        self._kb_worker.failed.connect(lambda err: self._append_log(err))
-        self._kb_worker.start()
+        worker = KBValidateWorker(kb_id, region)
+        worker.finished.connect(lambda msg: self._append_log(msg))
+        worker.failed.connect(lambda err: self._append_log(err))
+        self._scheduler.submit("validate", f"KB={kb_id}", worker)
 
     def on_ask(self):
         kb_id = self.ed_kb.text().strip()
         region = self.ed_region.text().strip() or None
         prompt = self.ed_prompt.toPlainText().strip()
-        allow_web = self.cb_allow_web.isChecked()
 
         if not kb_id:
             QMessageBox.warning(self, "입력 필요", "Knowledge Base ID를 입력하세요.")
@@ -335,11 +692,183 @@ class MainWindow(QMainWindow):
             QMessageBox.information(self, "입력 필요", "질문을 입력하세요.")
             return
 
-        self.txt_answer.setPlainText("생각 중... (KB 검색 중)")
-        self._ask_worker = AskWorker(kb_id, region, prompt, allow_web)
-        self._ask_worker.finished.connect(self.txt_answer.setPlainText)
-        self._ask_worker.failed.connect(lambda err: self.txt_answer.setPlainText(err))
-        self._ask_worker.start()
+        if self.cb_multi_query.isChecked():
+            prompts = [line.strip() for line in prompt.splitlines() if line.strip()]
+        else:
+            # 한 번에 하나만 묻는 모드: 응답 창에 표시 중인 질문이 아직 진행 중이면 취소
+            prompts = [prompt]
+            shown = self._shown_answer
+            if shown is not None and shown.result is None and shown.task is not None:
+                self._scheduler.cancel(shown.task)
+        entries = [self._submit_question(kb_id, region, p) for p in prompts]
+        self.list_answers.setCurrentItem(entries[0].item)
+        if len(entries) > 1:
+            self._append_log(f"[질문] {len(entries)}개 제출 (동시 {self.sp_ask_limit.value()}개)")
+        self._trim_answers()
+
+    def _submit_question(self, kb_id: str, region: Optional[str], prompt: str) -> AnswerEntry:
+        cache = self._answer_cache if self.cb_answer_cache.isChecked() else None
+        semantic = self._semantic_cache if cache is not None and self.cb_semantic_cache.isChecked() else None
+        local = self._local_search if self.cb_local_first.isChecked() else None
+        paths = [self.list_files.item(i).text() for i in range(self.list_files.count())]
+        worker = AskWorker(kb_id, region, prompt, self.cb_allow_web.isChecked(), self._agent_pool,
+                           stream=self.cb_stream.isChecked(), cache=cache, local=local, local_paths=paths,
+                           local_context=self.cb_local_context.isChecked(),
+                           session=self._conversation if self.cb_conversation.isChecked() else None,
+                           semantic=semantic)
+        entry = AnswerEntry(prompt, QListWidgetItem())
+        entry.item.setData(Qt.ItemDataRole.UserRole, entry)
+        entry.item.setToolTip(prompt)
+        self._answers[worker] = entry
+        worker.started.connect(self._on_answer_started)
+        worker.chunk.connect(self._on_answer_chunk)
+        worker.cache_hit.connect(self._on_answer_cache_hit)
+        worker.local_hit.connect(self._on_answer_local_hit)
+        worker.traced.connect(self._on_answer_traced)
+        worker.log.connect(self._log.write, Qt.ConnectionType.DirectConnection)
+        worker.first_token.connect(self._on_answer_first_token)
+        worker.finished.connect(self._on_answer_finished)
+        worker.failed.connect(self._on_answer_failed)
+        entry.task = self._scheduler.submit("ask", prompt.splitlines()[0][:40], worker)
+        entry.item.setText(entry.label())
+        self.list_answers.addItem(entry.item)
+        return entry
+
+    def _trim_answers(self):
+        finished = [self.list_answers.item(i) for i in range(self.list_answers.count())
+                    if self.list_answers.item(i).data(Qt.ItemDataRole.UserRole).result is not None]
+        for item in finished[:max(0, self.list_answers.count() - MAX_ANSWER_HISTORY)]:
+            self.list_answers.takeItem(self.list_answers.row(item))
+
+    def on_clear_answers(self):
+        for i in reversed(range(self.list_answers.count())):
+            if self.list_answers.item(i).data(Qt.ItemDataRole.UserRole).result is not None:
+                self.list_answers.takeItem(i)
+        if self.list_answers.count() == 0:
+            self._shown_answer = None
+            self.txt_answer.setPlainText("")
+            self.lbl_ask_status.setText("")
+            self._show_trace(None)
+
+    def on_new_conversation(self):
+        self._conversation = Conversation()
+        self.lbl_conversation.setText("")
+        self._append_log("[대화] 새 대화를 시작합니다")
+
+    def _on_ask_limit_changed(self, limit: int):
+        self._scheduler.set_limit("ask", limit)
+        # 동시에 쓰는 Agent 수만큼은 풀에 남겨 두어야 다음 질문에서 재사용된다
+        self._agent_pool.max_idle_per_key = max(2, limit)
+
+    def _on_answer_selected(self, item: Optional[QListWidgetItem]):
+        if item is None:
+            return
+        entry = item.data(Qt.ItemDataRole.UserRole)
+        self._shown_answer = entry
+        self.txt_answer.setPlainText(entry.text)
+        self.lbl_ask_status.setText(entry.status)
+        self._show_trace(entry.trace)
+
+    def _sender_answer(self) -> Optional[AnswerEntry]:
+        """시그널을 보낸 워커의 질문 기록 (이미 끝났거나 취소된 워커면 None)"""
+        return self._answers.get(self.sender())
+
+    def _set_answer_status(self, entry: AnswerEntry, status: str):
+        entry.status = status
+        if entry is self._shown_answer:
+            self.lbl_ask_status.setText(status)
+
+    def _on_answer_started(self):
+        entry = self._sender_answer()
+        if entry is None:
+            return
+        entry.started = time.perf_counter()
+        entry.text = "생각 중... (KB 검색 중)"
+        if entry is self._shown_answer:
+            self.txt_answer.setPlainText(entry.text)
+
+    def _on_answer_cache_hit(self, similarity: float):
+        entry = self._sender_answer()
+        if entry is not None:
+            self._set_answer_status(entry, "캐시된 응답" if not similarity
+                                    else f"비슷한 질문의 캐시된 응답 (유사도 {similarity:.2f})")
+
+    def _on_similarity_changed(self, threshold: float):
+        if self._semantic_cache is not None:
+            self._semantic_cache.threshold = threshold
+
+    def _on_trace_toggled(self, shown: bool):
+        self.btn_trace.setArrowType(Qt.ArrowType.DownArrow if shown else Qt.ArrowType.RightArrow)
+        self.txt_trace.setVisible(shown)
+
+    def _show_trace(self, trace):
+        if trace is None:
+            self.txt_trace.setPlainText("")
+            self.btn_trace.setText("단계별 소요 시간")
+            return
+        summary = " / ".join(f"{name} {ms:.0f}ms" for name, ms in trace.summary().items())
+        self.txt_trace.setPlainText(f"{summary}\n\n{trace.format()}")
+        self.btn_trace.setText(f"단계별 소요 시간 ({trace.summary()['total'] / 1000:.2f}초)")
+
+    def _on_answer_traced(self, trace):
+        entry = self._sender_answer()
+        if entry is None:
+            return
+        entry.trace = trace
+        if entry is self._shown_answer:
+            self._show_trace(trace)
+
+    def _on_answer_local_hit(self):
+        entry = self._sender_answer()
+        if entry is not None:
+            self._set_answer_status(entry, "로컬 색인 응답")
+
+    def _on_answer_first_token(self, ttft: float):
+        entry = self._sender_answer()
+        if entry is not None:
+            self._set_answer_status(entry, f"첫 토큰 {ttft:.2f}초")
+
+    def _on_answer_failed(self, err: str):
+        entry = self._answers.pop(self.sender(), None)
+        if entry is not None:
+            self._finish_answer(entry, err, "취소" if err == "[질문 취소됨]" else "실패")
+
+    def _on_answer_chunk(self, text: str):
+        entry = self._sender_answer()
+        if entry is None:
+            return
+        if not entry.streaming:
+            # 첫 조각이 도착하면 "생각 중..." 안내를 지우고 이어 붙이기 시작
+            entry.streaming = True
+            entry.text = ""
+            if entry is self._shown_answer:
+                self.txt_answer.setPlainText("")
+        entry.text += text
+        if entry is self._shown_answer:
+            self.txt_answer.moveCursor(QTextCursor.MoveOperation.End)
+            self.txt_answer.insertPlainText(text)
+
+    def _on_answer_finished(self, text: str):
+        entry = self._answers.pop(self.sender(), None)
+        if entry is None:
+            return
+        elapsed = time.perf_counter() - entry.started
+        entry.status = f"{entry.status} / 전체 {elapsed:.2f}초" if entry.status else f"전체 {elapsed:.2f}초"
+        # 스트리밍 중에는 도구 호출 전 중간 발화도 섞이므로 최종 응답으로 교체
+        self._finish_answer(entry, text, "완료")
+        worker = self.sender()
+        if worker.semantic is not None:
+            self.lbl_semantic.setText(f"hit율: {worker.semantic.stats()}")
+        if worker.session is not None and worker.session is self._conversation:
+            self.lbl_conversation.setText(worker.session.describe())
+
+    def _finish_answer(self, entry: AnswerEntry, text: str, result: str):
+        entry.text = text
+        entry.result = result
+        entry.item.setText(entry.label())
+        if entry is self._shown_answer:
+            self.txt_answer.setPlainText(text)
+            self.lbl_ask_status.setText(entry.status)
 
     def on_add_files(self):
         files, _ = QFileDialog.getOpenFileNames(self, "PDF 파일 선택", "", "PDF Files (*.pdf)")
@@ -349,6 +878,18 @@ class MainWindow(QMainWindow):
         if files:
             self._append_log(f"[선택] {len(files)}개 파일 추가")
 
+    def on_preview_file(self, item: QListWidgetItem):
+        index = PageIndex()
+        sha = index.lookup(item.text())
+        doc = index.document(sha) if sha else None
+        if doc is None:
+            self._append_log(f"[미리보기] {item.text()}: 아직 색인되지 않음 (업로드 시 추출)")
+            return
+        self._append_log(f"[미리보기] {doc.name}: {doc.page_count}쪽" + (f", {doc.uri}" if doc.uri else ""))
+        for level, title, page in doc.outline[:20]:
+            self._append_log(f"  {'  ' * level}{title}" + (f" (p.{page})" if page else ""))
+        self._append_log(f"  p.1: {index.preview(sha)}")
+
     def on_clear_files(self):
         self.list_files.clear()
         self._append_log("[선택] 목록 비움")
@@ -366,28 +907,74 @@ class MainWindow(QMainWindow):
             return
 
         self._append_log(f"[업로드 시작] {len(files)}개 파일 → s3://{bucket}/{prefix}")
-        self._upload_worker = UploadWorker(bucket, kb_id, prefix, files)
-        self._upload_worker.progress.connect(self._append_log)
-        self._upload_worker.finished.connect(lambda msg: self._append_log(f"[업로드 완료] {msg}"))
-        self._upload_worker.failed.connect(lambda err: self._append_log(err))
-        self._upload_worker.start()
+        worker = UploadWorker(bucket, kb_id, prefix, files, workers=self.sp_upload_workers.value(),
+                              skip_unchanged=self.cb_skip_unchanged.isChecked(),
+                              multipart=self.cb_multipart.isChecked(),
+                              part_size=self.sp_part_size.value() * MB,
+                              part_concurrency=self.sp_part_concurrency.value(),
+                              extract=self.cb_extract.isChecked())
+        worker.progress.connect(self._log.write, Qt.ConnectionType.DirectConnection)
+        worker.finished.connect(lambda msg: self._append_log(f"[업로드 완료] {msg}"))
+        worker.finished.connect(self._on_upload_done)
+        worker.failed.connect(lambda err: self._append_log(err))
+        worker.failed.connect(self._on_upload_done)
+        if self._auto_sync_timer.isActive():
+            # 대기 중에 새 업로드가 들어오면 끝날 때까지 미뤘다가 그때부터 다시 센다
+            self._auto_sync_timer.stop()
+            self.lbl_auto_sync.setText("업로드 진행 중, 완료 후 대기 재시작")
+        self._scheduler.submit("upload", f"{len(files)}개 파일 → s3://{bucket}/{prefix}", worker)
+
+    def _on_upload_done(self, *_):
+        if not self.cb_auto_sync.isChecked() or not self.ed_kb.text().strip():
+            return
+        # 연속 업로드는 타이머를 다시 시작해 마지막 업로드 후 한 번만 동기화
+        delay = self.sp_auto_sync_delay.value()
+        self._auto_sync_timer.start(delay * 1000)
+        self.lbl_auto_sync.setText(f"{delay}초 후 자동 동기화 예정")
+
+    def _on_auto_sync_toggled(self, enabled: bool):
+        if not enabled and self._auto_sync_timer.isActive():
+            self._auto_sync_timer.stop()
+            self._append_log("[자동 동기화] 예약 취소")
+        self.lbl_auto_sync.setText("")
+
+    def _on_auto_sync_due(self):
+        if self._scheduler.running("upload") or self._scheduler.pending("upload"):
+            # 남은 업로드가 끝나면 _on_upload_done이 타이머를 다시 시작한다
+            return
+        self.lbl_auto_sync.setText("")
+        self._append_log("[자동 동기화] 마지막 업로드 후 대기 시간 경과")
+        self.on_sync_kb(auto=True)
 
-    def on_sync_kb(self):
+    def on_sync_kb(self, auto: bool = False):
         kb_id = self.ed_kb.text().strip()
+        region = self.ed_region.text().strip() or None
         if not kb_id:
-            QMessageBox.warning(self, "입력 필요", "Knowledge Base ID를 입력하세요.")
+            if not auto:
+                QMessageBox.warning(self, "입력 필요", "Knowledge Base ID를 입력하세요.")
+            return
+        if self._auto_sync_timer.isActive():
+            # 직접 동기화하면 예약된 자동 동기화는 필요 없음
+            self._auto_sync_timer.stop()
+            self.lbl_auto_sync.setText("")
+        if self._scheduler.pending("sync"):
+            # 대기 중인 동기화가 시작될 때 그때까지의 변경을 모두 반영하므로 하나로 충분
+            self._append_log("[동기화 요청] 이미 대기 중인 동기화에 합칩니다")
             return
         self._append_log(f"[동기화 요청] KB={kb_id}")
-        self._sync_worker = SyncWorker(kb_id)
-        self._sync_worker.finished.connect(lambda msg: self._append_log(f"[동기화] {msg}"))
-        self._sync_worker.failed.connect(lambda err: self._append_log(err))
-        self._sync_worker.start()
+        # 자동 동기화는 변경이 있을 때만 (강제 옵션 무시)
+        worker = SyncWorker(kb_id, region, force=self.cb_force_sync.isChecked() and not auto)
+        worker.progress.connect(self._log.write, Qt.ConnectionType.DirectConnection)
+        worker.finished.connect(lambda msg: self._append_log(f"[동기화] {msg}"))
+        worker.failed.connect(lambda err: self._append_log(err))
+        self._scheduler.submit("sync", f"KB={kb_id}", worker)
 
 
 def main():
     app = QApplication(sys.argv)
     win = MainWindow()
     win.show()
+    win._append_log(f"[시작] 창 표시까지 {time.perf_counter() - _STARTED:.2f}초")
     sys.exit(app.exec())
 
 
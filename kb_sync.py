@@ -0,0 +1,263 @@
+"""
+Knowledge Base 동기화(인덱싱 작업)
+
+KB에 연결된 데이터 소스마다 ingestion job을 시작하고, 끝날 때까지 상태를 추적한다.
+bedrock-agent 클라이언트는 aws_clients 레지스트리에서 공유한다.
+
+상태 조회는 고정 간격이 아니라 지수 백오프(2초 → 최대 30초)로 간격을 늘려
+인덱싱이 오래 걸려도 API 호출 수가 크게 늘지 않는다.
+
+PendingChanges는 마지막으로 성공한 동기화 이후 업로드된 객체(URI, sha256)를 기록한다.
+바뀐 것이 없으면 동기화를 건너뛰고, 여러 번의 업로드는 다음 동기화 한 번으로 합쳐진다.
+KB ID 없이 버킷에만 올린 객체는 따로 모아 두었다가, 그 버킷을 데이터 소스로 쓰는 KB의 변경으로 본다.
+"""
+from __future__ import annotations
+
+import threading
+import time
+from typing import Any, Callable, Dict, List, Optional, Set, Tuple
+
+import aws_clients
+from app_paths import load_json, save_json, state_path
+from cancellation import Cancelled
+from upload_engine import split_s3_uri
+
+TERMINAL_STATUSES = ("COMPLETE", "FAILED", "STOPPED")
+POLL_INITIAL = 2.0
+POLL_FACTOR = 1.6
+POLL_MAX = 30.0
+UNATTRIBUTED = ""   # PendingChanges에서 KB ID 없이 올린 객체를 모아 두는 키
+VERSION_TTL = 60.0  # 응답 캐시용 KB 버전 조회 결과를 재사용하는 시간(초)
+VERSION_FALLBACK_TTL = 10.0  # 조회 실패 시 대체 값을 재사용하는 시간(초)
+
+_versions: Dict[Tuple[str, Optional[str]], Tuple[float, Optional[str]]] = {}   # → (만료 시각, 버전)
+_versions_lock = threading.Lock()
+
+
+def list_data_source_ids(kb_id: str, region: Optional[str] = None) -> List[str]:
+    client = aws_clients.get_client("bedrock-agent", region)
+    ids: List[str] = []
+    kwargs: Dict[str, Any] = {"knowledgeBaseId": kb_id}
+    while True:
+        resp = client.list_data_sources(**kwargs)
+        ids.extend(s["dataSourceId"] for s in resp.get("dataSourceSummaries", []))
+        if not resp.get("nextToken"):
+            return ids
+        kwargs["nextToken"] = resp["nextToken"]
+
+
+def data_source_buckets(kb_id: str, region: Optional[str] = None) -> Optional[Set[str]]:
+    """KB의 S3 데이터 소스 버킷 이름. 조회할 수 없으면(권한 없음 등) None."""
+    client = aws_clients.get_client("bedrock-agent", region)
+    buckets: Set[str] = set()
+    try:
+        for ds_id in list_data_source_ids(kb_id, region):
+            ds = client.get_data_source(knowledgeBaseId=kb_id, dataSourceId=ds_id)["dataSource"]
+            arn = ((ds.get("dataSourceConfiguration") or {}).get("s3Configuration") or {}).get("bucketArn")
+            if arn:
+                buckets.add(arn.rsplit(":", 1)[-1])
+    except Exception:
+        return None
+    return buckets
+
+
+def start_sync(kb_id: str, region: Optional[str] = None) -> List[Dict[str, Any]]:
+    """모든 데이터 소스에 대해 ingestion job을 시작하고 job 정보 목록을 돌려준다."""
+    client = aws_clients.get_client("bedrock-agent", region)
+    ds_ids = list_data_source_ids(kb_id, region)
+    if not ds_ids:
+        raise RuntimeError("KB에 연결된 데이터 소스가 없습니다 (S3 데이터 소스 추가 필요)")
+    jobs = []
+    for ds_id in ds_ids:
+        resp = client.start_ingestion_job(knowledgeBaseId=kb_id, dataSourceId=ds_id)
+        jobs.append(resp["ingestionJob"])
+    return jobs
+
+
+def last_completed_job(kb_id: str) -> Optional[str]:
+    """이 KB에서 마지막으로 완료된 ingestion job ID (캐시 무효화 기준)"""
+    return load_json(state_path("kb_state.json"), {}).get(kb_id, {}).get("last_job_id")
+
+
+def kb_version(kb_id: str, region: Optional[str] = None, ttl: float = VERSION_TTL,
+               fallback_ttl: float = VERSION_FALLBACK_TTL) -> Optional[str]:
+    """응답 캐시 키에 쓰는 KB 색인 버전 (데이터 소스별 마지막 COMPLETE job ID를 이은 문자열)
+
+    콘솔이나 다른 도구로 실행한 동기화도 반영되도록 list_ingestion_jobs로 조회한다.
+    질문마다 API를 부르지 않도록 ttl초 동안은 이전 결과를 쓰고,
+    조회할 수 없으면(권한 없음 등) 이 앱이 기록한 마지막 완료 job으로 대신하고, 실패한 API를
+    질문마다 다시 기다리지 않도록 그 값도 fallback_ttl초 동안 재사용한다.
+    """
+    now = time.monotonic()
+    with _versions_lock:
+        hit = _versions.get((kb_id, region))
+    if hit is not None and now < hit[0]:
+        return hit[1]
+    try:
+        client = aws_clients.get_client("bedrock-agent", region)
+        latest = []
+        for ds_id in list_data_source_ids(kb_id, region):
+            resp = client.list_ingestion_jobs(
+                knowledgeBaseId=kb_id, dataSourceId=ds_id, maxResults=1,
+                filters=[{"attribute": "STATUS", "operator": "EQ", "values": ["COMPLETE"]}],
+                sortBy={"attribute": "STARTED_AT", "order": "DESCENDING"},
+            )
+            latest.extend(j["ingestionJobId"] for j in resp.get("ingestionJobSummaries", [])[:1])
+        version = ",".join(latest) or None
+        expires = now + ttl
+    except Exception:
+        version = last_completed_job(kb_id)
+        expires = now + min(ttl, fallback_ttl)
+    with _versions_lock:
+        _versions[(kb_id, region)] = (expires, version)
+    return version
+
+
+def forget_versions(kb_id: Optional[str] = None):
+    """kb_version 조회 결과를 버린다 (kb_id가 없으면 전부)."""
+    with _versions_lock:
+        for key in [k for k in _versions if kb_id is None or k[0] == kb_id]:
+            del _versions[key]
+
+
+def record_completed(kb_id: str, jobs: List[Dict[str, Any]]) -> Optional[str]:
+    """완료된 job이 있으면 마지막 완료 job으로 기록하고 그 ID를 돌려준다."""
+    done = [j for j in jobs if j.get("status") == "COMPLETE"]
+    if not done:
+        return None
+    # 다음 질문부터 새 버전을 조회하도록 캐시된 kb_version을 버린다
+    forget_versions(kb_id)
+    path = state_path("kb_state.json")
+    state = load_json(path, {})
+    job_id = done[-1]["ingestionJobId"]
+    state[kb_id] = {"last_job_id": job_id, "completed_at": time.time()}
+    save_json(path, state)
+    return job_id
+
+
+class PendingChanges:
+    """KB별로 마지막 성공 동기화 이후 올라간 객체와, 이미 색인된 객체의 해시를 기록 (kb_pending.json)"""
+
+    def __init__(self, path: Optional[str] = None):
+        self.path = path or state_path("kb_pending.json")
+        self._lock = threading.Lock()
+
+    def _load(self, kb_id: str) -> Tuple[Dict[str, Any], Dict[str, Any]]:
+        state = load_json(self.path, {})
+        return state, state.setdefault(kb_id, {"pending": {}, "ingested": {}})
+
+    def record(self, kb_id: Optional[str], uri: str, sha256: Optional[str] = None) -> bool:
+        """업로드된 객체를 변경으로 기록한다. 이미 같은 내용으로 색인되어 있으면 False.
+
+        kb_id가 없으면 버킷에만 올린 객체로 기록한다 (pending(kb_id, buckets) 참고).
+        """
+        with self._lock:
+            state, kb = self._load(kb_id or UNATTRIBUTED)
+            if sha256 and kb["ingested"].get(uri) == sha256:
+                return False
+            kb["pending"][uri] = {"sha256": sha256, "at": time.time()}
+            save_json(self.path, state)
+            return True
+
+    def pending(self, kb_id: str, buckets: Optional[Set[str]] = None) -> Dict[str, Dict[str, Any]]:
+        """kb_id의 변경 + KB ID 없이 올린 객체 중 buckets(None이면 전체)에 있는 것"""
+        with self._lock:
+            state, kb = self._load(kb_id)
+            changes = dict(kb["pending"])
+            for uri, entry in state.get(UNATTRIBUTED, {}).get("pending", {}).items():
+                if uri in changes or (buckets is not None and split_s3_uri(uri)[0] not in buckets):
+                    continue
+                if entry.get("sha256") and kb["ingested"].get(uri) == entry["sha256"]:
+                    continue
+                changes[uri] = entry
+            return changes
+
+    def commit(self, kb_id: str, snapshot: Dict[str, Dict[str, Any]]):
+        """동기화 시작 시점의 변경(snapshot)을 색인 완료로 옮긴다.
+
+        동기화 중에 다시 올라간 객체는 기록이 바뀌었으므로 다음 동기화 대상으로 남는다.
+        """
+        with self._lock:
+            state, kb = self._load(kb_id)
+            loose = state.get(UNATTRIBUTED, {}).get("pending", {})
+            for uri, entry in snapshot.items():
+                if kb["pending"].get(uri) == entry:
+                    del kb["pending"][uri]
+                elif loose.get(uri) == entry:
+                    del loose[uri]
+                else:
+                    continue
+                if entry.get("sha256"):
+                    kb["ingested"][uri] = entry["sha256"]
+            save_json(self.path, state)
+
+
+def describe_job(job: Dict[str, Any]) -> str:
+    """job 상태와 문서 수 통계를 한 줄로 요약한다."""
+    st = job.get("statistics") or {}
+    indexed = st.get("numberOfNewDocumentsIndexed", 0) + st.get("numberOfModifiedDocumentsIndexed", 0)
+    return (f"{job.get('ingestionJobId')} {job.get('status')}"
+            f" - 스캔 {st.get('numberOfDocumentsScanned', 0)}, 색인 {indexed},"
+            f" 실패 {st.get('numberOfDocumentsFailed', 0)}, 삭제 {st.get('numberOfDocumentsDeleted', 0)}")
+
+
+def wait_for_jobs(kb_id: str, jobs: List[Dict[str, Any]], region: Optional[str] = None,
+                  on_update: Optional[Callable[[str], None]] = None,
+                  initial: float = POLL_INITIAL, factor: float = POLL_FACTOR, max_interval: float = POLL_MAX,
+                  sleep: Callable[[float], Any] = time.sleep,
+                  cancel: Optional[threading.Event] = None,
+                  timeout: Optional[float] = None) -> List[Dict[str, Any]]:
+    """모든 job이 끝날 때까지 백오프 간격으로 상태를 조회하고 최종 job 정보를 돌려준다.
+
+    상태나 통계가 바뀔 때마다 on_update로 경과 시간과 함께 알린다.
+    cancel이 설정되면 진행 중인 job에 중지를 요청하고 Cancelled를 던진다.
+    timeout(초)이 지나면 job은 그대로 두고 마지막으로 조회한 상태를 돌려준다.
+    """
+    client = aws_clients.get_client("bedrock-agent", region)
+    notify = on_update or (lambda msg: None)
+    started = time.monotonic()
+    current = {j["ingestionJobId"]: j for j in jobs}
+    last_seen: Dict[str, str] = {}
+    interval = initial
+
+    while True:
+        for job_id, job in current.items():
+            if job.get("status") in TERMINAL_STATUSES and job_id in last_seen:
+                continue
+            if job_id in last_seen:
+                job = client.get_ingestion_job(
+                    knowledgeBaseId=kb_id, dataSourceId=job["dataSourceId"], ingestionJobId=job_id,
+                )["ingestionJob"]
+                current[job_id] = job
+            summary = describe_job(job)
+            if last_seen.get(job_id) != summary:
+                last_seen[job_id] = summary
+                notify(f"{summary} ({time.monotonic() - started:.0f}초 경과)")
+
+        if all(j.get("status") in TERMINAL_STATUSES for j in current.values()):
+            return list(current.values())
+        if timeout is not None:
+            remaining = timeout - (time.monotonic() - started)
+            if remaining <= 0:
+                notify(f"{timeout:.0f}초 제한 초과: 작업은 계속 진행되며 상태 추적만 멈춥니다")
+                return list(current.values())
+            interval = min(interval, remaining)
+        if cancel is None:
+            sleep(interval)
+        elif cancel.wait(interval):
+            stop_jobs(kb_id, list(current.values()), region)
+            raise Cancelled("동기화 취소 (진행 중인 ingestion job 중지 요청)")
+        interval = min(interval * factor, max_interval)
+
+
+def stop_jobs(kb_id: str, jobs: List[Dict[str, Any]], region: Optional[str] = None):
+    """끝나지 않은 job에 중지를 요청한다 (이미 끝났거나 중지할 수 없으면 무시)."""
+    client = aws_clients.get_client("bedrock-agent", region)
+    for job in jobs:
+        if job.get("status") in TERMINAL_STATUSES:
+            continue
+        try:
+            client.stop_ingestion_job(knowledgeBaseId=kb_id, dataSourceId=job["dataSourceId"],
+                                      ingestionJobId=job["ingestionJobId"])
+        except Exception:
+            pass
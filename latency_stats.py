@@ -0,0 +1,18 @@
+"""
+지연 시간 통계
+
+벤치마크와 일괄 실행 요약이 같은 방식으로 백분위수를 계산하도록 한곳에 둔다.
+"""
+from __future__ import annotations
+
+import math
+from typing import List
+
+
+def percentile(values: List[float], pct: float) -> float:
+    """nearest-rank 방식 백분위수 (값이 없으면 0)"""
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    rank = max(0, math.ceil(pct / 100 * len(ordered)) - 1)
+    return ordered[rank]
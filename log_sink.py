@@ -0,0 +1,99 @@
+"""
+GUI 로그 출력 버퍼
+
+대량 병렬 업로드처럼 초당 수천 건의 진행 메시지가 나오면
+메시지마다 appendPlainText를 부르는 것만으로 GUI 스레드가 다시 그리기에 묶인다.
+
+LogSink는
+- write()를 어느 스레드에서나 호출할 수 있고 (잠금이 걸린 버퍼에 쌓기만 함),
+- GUI 스레드의 QTimer가 주기적으로 버퍼를 비워 한 번에 붙이며,
+- 화면 문서는 최대 줄 수(setMaximumBlockCount)로 제한하고,
+- 선택적으로 같은 내용을 회전 로그 파일(~/.pdfanalyze/logs/gui.log)에 남긴다.
+
+워커 시그널은 Qt.ConnectionType.DirectConnection으로 write에 연결하면
+GUI 스레드로 넘어가는 시그널 자체가 생기지 않는다.
+"""
+from __future__ import annotations
+
+import logging
+import threading
+from logging.handlers import RotatingFileHandler
+from typing import List, Optional
+
+from PyQt6.QtCore import QObject, QTimer
+from PyQt6.QtWidgets import QPlainTextEdit
+
+from app_paths import state_path
+
+DEFAULT_INTERVAL_MS = 100
+DEFAULT_MAX_BLOCKS = 5000
+LOG_FILE_BYTES = 2 * 1024 * 1024
+LOG_FILE_BACKUPS = 3
+
+
+class LogSink(QObject):
+    def __init__(self, view: QPlainTextEdit, interval_ms: int = DEFAULT_INTERVAL_MS,
+                 max_blocks: int = DEFAULT_MAX_BLOCKS, parent: Optional[QObject] = None):
+        super().__init__(parent)
+        self.view = view
+        self.max_blocks = max_blocks
+        self.view.setMaximumBlockCount(max_blocks)
+        self._lock = threading.Lock()
+        self._pending: List[str] = []
+        self._dropped = 0
+        self._file: Optional[logging.Logger] = None
+
+        self._timer = QTimer(self)
+        self._timer.setInterval(interval_ms)
+        self._timer.timeout.connect(self.flush)
+        self._timer.start()
+
+    def write(self, text: str):
+        """어느 스레드에서든 호출 가능. 화면에는 다음 flush 때 반영된다."""
+        with self._lock:
+            self._pending.append(text)
+            # 화면에 남지 못할 만큼 쌓이면 오래된 것부터 버린다 (파일에는 flush 때만 쓰므로 함께 생략됨)
+            if len(self._pending) > self.max_blocks * 2:
+                drop = len(self._pending) - self.max_blocks
+                del self._pending[:drop]
+                self._dropped += drop
+
+    def flush(self):
+        with self._lock:
+            batch, self._pending = self._pending, []
+            dropped, self._dropped = self._dropped, 0
+        if dropped:
+            batch.insert(0, f"[로그] 메시지가 너무 많아 {dropped}줄 생략")
+        if not batch:
+            return
+        if self._file is not None:
+            for line in batch:
+                self._file.info(line)
+        # 화면에 남을 만큼만 한 번에 붙인다
+        self.view.appendPlainText("\n".join(batch[-self.max_blocks:]))
+
+    def set_file_mirror(self, enabled: bool, path: Optional[str] = None):
+        """회전 로그 파일 기록을 켜거나 끈다."""
+        if not enabled:
+            if self._file is not None:
+                for handler in list(self._file.handlers):
+                    self._file.removeHandler(handler)
+                    handler.close()
+                self._file = None
+            return
+        if self._file is not None:
+            return
+        handler = RotatingFileHandler(path or state_path("logs", "gui.log"), maxBytes=LOG_FILE_BYTES,
+                                      backupCount=LOG_FILE_BACKUPS, encoding="utf-8")
+        handler.setFormatter(logging.Formatter("%(asctime)s %(message)s"))
+        logger = logging.getLogger(f"pdfanalyze.gui.{id(self)}")
+        logger.setLevel(logging.INFO)
+        logger.propagate = False
+        logger.addHandler(handler)
+        self._file = logger
+        logger.info("[로그] 파일 기록 시작")
+
+    def close(self):
+        self._timer.stop()
+        self.flush()
+        self.set_file_mirror(False)
@@ -0,0 +1,271 @@
+"""
+로컬 PDF 텍스트 추출 및 페이지 색인 (SQLite)
+
+업로드하는 PDF에서 페이지별 텍스트와 목차(outline)를 직접 뽑아 로컬에 보관한다.
+KB를 거치지 않고 "어느 파일 몇 페이지" 같은 조회나 미리보기를 바로 할 수 있다.
+
+- 추출은 CPU 작업이므로 프로세스 풀에서 파일 단위로 병렬 처리한다.
+  GUI 스레드/업로드 스레드가 도는 프로세스에서 fork하지 않도록 spawn 방식으로 워커를 띄운다.
+- 문서는 내용 해시(sha256)로 식별하므로 같은 내용은 경로가 달라도 한 번만 추출한다.
+  (경로/크기/수정 시각이 같으면 해시 계산도 건너뜀)
+- 페이지 텍스트는 zlib으로 압축해 저장한다.
+- PDF 파서(pypdf)는 선택 의존성이다. 설치되어 있지 않으면 추출 단계만 건너뛴다.
+"""
+from __future__ import annotations
+
+import importlib.util
+import json
+import multiprocessing
+import os
+import sqlite3
+import threading
+import time
+import zlib
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from contextlib import contextmanager
+from dataclasses import dataclass, field
+from typing import Any, Callable, Dict, Iterator, List, Optional, Tuple
+
+from app_paths import state_path
+from cancellation import check
+from upload_engine import file_digest
+
+DEFAULT_EXTRACT_WORKERS = max(1, min(4, (os.cpu_count() or 2) - 1))
+PREVIEW_CHARS = 300
+
+
+def extractor_available() -> bool:
+    return importlib.util.find_spec("pypdf") is not None
+
+
+# ---------- 추출 (프로세스 풀에서 실행되므로 모듈 수준 함수) ----------
+
+def _outline_entries(reader, items, level: int = 0) -> List[Tuple[int, str, Optional[int]]]:
+    entries: List[Tuple[int, str, Optional[int]]] = []
+    for item in items:
+        if isinstance(item, list):
+            entries.extend(_outline_entries(reader, item, level + 1))
+            continue
+        try:
+            page = reader.get_destination_page_number(item) + 1
+        except Exception:
+            page = None
+        entries.append((level, str(item.title), page))
+    return entries
+
+
+def extract_pdf(path: str) -> Dict[str, Any]:
+    """PDF 한 개에서 {"pages": [페이지 텍스트...], "outline": [(깊이, 제목, 페이지)...]}를 뽑는다."""
+    from pypdf import PdfReader
+
+    reader = PdfReader(path)
+    pages = []
+    for page in reader.pages:
+        try:
+            pages.append(page.extract_text() or "")
+        except Exception:
+            # 글꼴/인코딩 문제로 한 페이지를 못 읽어도 나머지는 색인
+            pages.append("")
+    try:
+        outline = _outline_entries(reader, reader.outline)
+    except Exception:
+        outline = []
+    return {"pages": pages, "outline": outline}
+
+
+# ---------- 색인 ----------
+
+@dataclass
+class IndexedDocument:
+    sha256: str
+    path: str
+    name: str
+    page_count: int
+    outline: List[Tuple[int, str, Optional[int]]] = field(default_factory=list)
+    uri: Optional[str] = None
+    kb_id: Optional[str] = None     # 업로드할 때 지정한 KB (없으면 버킷에만 올림)
+
+
+class PageIndex:
+    def __init__(self, path: Optional[str] = None):
+        self.path = path or state_path("pdf_index.sqlite3")
+        self._lock = threading.Lock()
+        with self._connect() as db:
+            db.execute(
+                "CREATE TABLE IF NOT EXISTS documents ("
+                " sha256 TEXT PRIMARY KEY, path TEXT, name TEXT, size INTEGER, mtime REAL,"
+                " page_count INTEGER, outline TEXT, uri TEXT, indexed REAL, kb_id TEXT)"
+            )
+            columns = {row[1] for row in db.execute("PRAGMA table_info(documents)")}
+            if "kb_id" not in columns:
+                # 이전 버전에서 만든 색인
+                db.execute("ALTER TABLE documents ADD COLUMN kb_id TEXT")
+            db.execute("CREATE INDEX IF NOT EXISTS documents_path ON documents(path)")
+            db.execute(
+                "CREATE TABLE IF NOT EXISTS pages ("
+                " sha256 TEXT, page INTEGER, text BLOB, PRIMARY KEY (sha256, page))"
+            )
+
+    @contextmanager
+    def _connect(self) -> Iterator[sqlite3.Connection]:
+        db = sqlite3.connect(self.path, timeout=10)
+        try:
+            with db:  # 블록이 정상 종료되면 commit
+                yield db
+        finally:
+            db.close()
+
+    def has(self, sha256: str) -> bool:
+        with self._connect() as db:
+            return db.execute("SELECT 1 FROM documents WHERE sha256 = ?", (sha256,)).fetchone() is not None
+
+    def lookup(self, path: str) -> Optional[str]:
+        """경로/크기/수정 시각이 색인 당시와 같으면 그 문서의 sha256을 돌려준다."""
+        try:
+            st = os.stat(path)
+        except OSError:
+            return None
+        with self._connect() as db:
+            row = db.execute(
+                "SELECT sha256 FROM documents WHERE path = ? AND size = ? AND mtime = ?",
+                (os.path.abspath(path), st.st_size, st.st_mtime),
+            ).fetchone()
+        return row[0] if row else None
+
+    def add(self, sha256: str, path: str, extracted: Dict[str, Any], uri: Optional[str] = None):
+        st = os.stat(path)
+        pages = [(sha256, i + 1, zlib.compress(text.encode("utf-8"))) for i, text in enumerate(extracted["pages"])]
+        with self._lock, self._connect() as db:
+            db.execute("DELETE FROM pages WHERE sha256 = ?", (sha256,))
+            db.executemany("INSERT INTO pages VALUES (?, ?, ?)", pages)
+            db.execute(
+                "INSERT OR REPLACE INTO documents (sha256, path, name, size, mtime, page_count, outline, uri, indexed)"
+                " VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                (sha256, os.path.abspath(path), os.path.basename(path), st.st_size, st.st_mtime,
+                 len(pages), json.dumps(extracted["outline"], ensure_ascii=False), uri, time.time()),
+            )
+
+    def touch(self, sha256: str, path: str):
+        """같은 내용의 파일이 다른 경로/시각으로 다시 들어오면 경로 정보만 갱신한다."""
+        st = os.stat(path)
+        with self._lock, self._connect() as db:
+            db.execute("UPDATE documents SET path = ?, name = ?, size = ?, mtime = ? WHERE sha256 = ?",
+                       (os.path.abspath(path), os.path.basename(path), st.st_size, st.st_mtime, sha256))
+
+    def set_uri(self, sha256: str, uri: str, kb_id: Optional[str] = None):
+        with self._lock, self._connect() as db:
+            db.execute("UPDATE documents SET uri = ?, kb_id = ? WHERE sha256 = ?", (uri, kb_id, sha256))
+
+    def remove(self, sha256: str):
+        with self._lock, self._connect() as db:
+            db.execute("DELETE FROM pages WHERE sha256 = ?", (sha256,))
+            db.execute("DELETE FROM documents WHERE sha256 = ?", (sha256,))
+
+    def signature(self) -> Tuple[int, float]:
+        """문서가 추가/교체되면 바뀌는 값 (파생 색인의 재생성 여부 판단용)"""
+        with self._connect() as db:
+            count, latest = db.execute("SELECT COUNT(*), COALESCE(MAX(indexed), 0) FROM documents").fetchone()
+        return count, latest
+
+    def _document(self, row) -> IndexedDocument:
+        sha256, path, name, page_count, outline, uri, kb_id = row
+        return IndexedDocument(sha256, path, name, page_count,
+                               [tuple(e) for e in json.loads(outline or "[]")], uri, kb_id)
+
+    def document(self, sha256: str) -> Optional[IndexedDocument]:
+        with self._connect() as db:
+            row = db.execute("SELECT sha256, path, name, page_count, outline, uri, kb_id FROM documents"
+                             " WHERE sha256 = ?", (sha256,)).fetchone()
+        return self._document(row) if row else None
+
+    def documents(self) -> List[IndexedDocument]:
+        with self._connect() as db:
+            rows = db.execute("SELECT sha256, path, name, page_count, outline, uri, kb_id FROM documents"
+                              " ORDER BY name").fetchall()
+        return [self._document(r) for r in rows]
+
+    def page_text(self, sha256: str, page: int) -> Optional[str]:
+        with self._connect() as db:
+            row = db.execute("SELECT text FROM pages WHERE sha256 = ? AND page = ?", (sha256, page)).fetchone()
+        return zlib.decompress(row[0]).decode("utf-8") if row else None
+
+    def iter_pages(self, sha256: Optional[str] = None) -> Iterator[Tuple[str, int, str]]:
+        """(sha256, 페이지 번호, 텍스트)를 차례로 돌려준다. sha256을 주면 그 문서만."""
+        with self._connect() as db:
+            if sha256 is None:
+                rows = db.execute("SELECT sha256, page, text FROM pages ORDER BY sha256, page").fetchall()
+            else:
+                rows = db.execute("SELECT sha256, page, text FROM pages WHERE sha256 = ? ORDER BY page",
+                                  (sha256,)).fetchall()
+        for sha, page, blob in rows:
+            yield sha, page, zlib.decompress(blob).decode("utf-8")
+
+    def preview(self, sha256: str, page: int = 1, chars: int = PREVIEW_CHARS) -> str:
+        text = " ".join((self.page_text(sha256, page) or "").split())
+        return text[:chars] + ("…" if len(text) > chars else "")
+
+
+@dataclass
+class ExtractReport:
+    indexed: List[str] = field(default_factory=list)      # 새로 추출한 파일
+    unchanged: List[str] = field(default_factory=list)    # 이미 색인된 내용
+    failed: List[Tuple[str, str]] = field(default_factory=list)
+    elapsed: float = 0.0
+
+    def summary(self) -> str:
+        msg = f"새로 색인 {len(self.indexed)}개, 기존 {len(self.unchanged)}개 ({self.elapsed:.1f}초)"
+        if self.failed:
+            msg += f", 실패 {len(self.failed)}개"
+        return msg
+
+
+def index_files(files: List[str], index: Optional[PageIndex] = None, workers: int = DEFAULT_EXTRACT_WORKERS,
+                on_progress: Optional[Callable[[str], None]] = None,
+                cancel: Optional[threading.Event] = None,
+                digest: Callable[[str, Optional[threading.Event]], Tuple[str, str]] = file_digest) -> ExtractReport:
+    """files 중 아직 색인되지 않은 PDF를 프로세스 풀에서 추출해 색인에 넣는다.
+
+    digest는 업로드와 해시 계산을 공유할 때 넘긴다 (upload_engine.DigestCache).
+    """
+    notify = on_progress or (lambda msg: None)
+    index = index or PageIndex()
+    report = ExtractReport()
+    started = time.perf_counter()
+
+    todo: Dict[str, str] = {}   # sha256 → 경로 (같은 내용이 여러 번 있으면 한 번만 추출)
+    for path in files:
+        check(cancel)
+        sha = index.lookup(path)
+        if sha is None:
+            sha = digest(path, cancel)[0]
+            if index.has(sha):
+                index.touch(sha, path)
+        if sha in todo or index.has(sha):
+            report.unchanged.append(path)
+        else:
+            todo[sha] = path
+
+    if todo:
+        with ProcessPoolExecutor(max_workers=max(1, min(workers, len(todo))),
+                                 mp_context=multiprocessing.get_context("spawn")) as pool:
+            futures = {pool.submit(extract_pdf, path): (sha, path) for sha, path in todo.items()}
+            try:
+                for fut in as_completed(futures):
+                    sha, path = futures[fut]
+                    try:
+                        extracted = fut.result()
+                    except Exception as e:
+                        report.failed.append((path, str(e)))
+                        notify(f"[추출 실패] {path}: {e}")
+                        continue
+                    index.add(sha, path, extracted)
+                    report.indexed.append(path)
+                    notify(f"[추출] {os.path.basename(path)}: {len(extracted['pages'])}쪽,"
+                           f" 목차 {len(extracted['outline'])}개")
+                    check(cancel)
+            finally:
+                # 취소/오류로 빠져나가면 아직 시작하지 않은 추출은 버린다
+                for f in futures:
+                    f.cancel()
+    report.elapsed = time.perf_counter() - started
+    return report
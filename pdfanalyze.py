@@ -0,0 +1,245 @@
+"""
+PDF 학습 도우미 CLI (헤드리스)
+
+GUI 없이 서버/배치 환경에서 업로드, 동기화, 질의응답을 실행한다.
+PyQt6를 불러오지 않으며, 무거운 모듈(boto3, strands)은 하위 명령 실행 시점에 로드한다.
+
+사용 예:
+  python -m pdfanalyze upload --bucket my-bucket ./lectures          # 폴더 안 PDF 전체
+  python -m pdfanalyze upload --bucket my-bucket a.pdf b.pdf --sync  # 업로드 후 동기화
+  python -m pdfanalyze sync --kb-id KB123
+  python -m pdfanalyze validate --kb-id KB123
+  python -m pdfanalyze ask --kb-id KB123 "2장 요약해줘"
+  python -m pdfanalyze batch --kb-id KB123 questions.csv -o answers.jsonl   # 중단 후 다시 실행하면 이어서
+
+KB ID/리전은 KNOWLEDGE_BASE_ID, AWS_REGION 환경 변수를 기본값으로 사용한다.
+"""
+from __future__ import annotations
+
+import argparse
+import os
+import sys
+from typing import List, Optional
+
+MB = 1024 * 1024
+
+
+def _print(msg: str):
+    print(msg, flush=True)
+
+
+def _default_region() -> Optional[str]:
+    return os.environ.get("AWS_REGION") or os.environ.get("AWS_DEFAULT_REGION") or None
+
+
+def collect_pdfs(paths: List[str]) -> List[str]:
+    """파일은 그대로, 디렉터리는 하위의 *.pdf를 모두 모은다."""
+    files: List[str] = []
+    for path in paths:
+        if os.path.isdir(path):
+            for root, _, names in os.walk(path):
+                files.extend(os.path.join(root, n) for n in sorted(names) if n.lower().endswith(".pdf"))
+        else:
+            files.append(path)
+    return files
+
+
+def cmd_upload(args) -> int:
+    import workflows
+
+    files = collect_pdfs(args.paths)
+    if not files:
+        _print("업로드할 PDF 파일이 없습니다.")
+        return 1
+    _print(f"[업로드 시작] {len(files)}개 파일 → s3://{args.bucket}/{args.prefix}")
+    report = workflows.upload(
+        args.bucket, args.kb_id, args.prefix, files,
+        workers=args.workers, skip_unchanged=not args.no_skip_unchanged, multipart=not args.no_multipart,
+        part_size=args.part_size_mb * MB, part_concurrency=args.part_concurrency,
+        extract=not args.no_extract, on_progress=_print,
+    )
+    _print(f"[업로드 완료] {report.summary()}")
+    if args.sync:
+        if not args.kb_id:
+            _print("[동기화] --kb-id가 없어 동기화를 건너뜁니다.")
+            return 1
+        jobs = workflows.sync(args.kb_id, args.region, on_progress=_print, timeout=args.timeout)
+        _print(f"[동기화] 종료: {workflows.describe_jobs(jobs)}")
+    return 1 if report.failed else 0
+
+
+def cmd_sync(args) -> int:
+    import workflows
+
+    jobs = workflows.sync(args.kb_id, args.region, wait=not args.no_wait, on_progress=_print,
+                          force=args.force, timeout=args.timeout)
+    _print(f"[동기화] {workflows.describe_jobs(jobs)}")
+    return 1 if any(j.get("status") == "FAILED" for j in jobs) else 0
+
+
+def cmd_validate(args) -> int:
+    import workflows
+
+    _print(workflows.validate_kb(args.kb_id, args.region))
+    return 0
+
+
+def _semantic_cache(args, cache):
+    """--semantic이면 응답 캐시 앞에 둘 의미 캐시 (NumPy 필요)"""
+    if not args.semantic or cache is None:
+        return None
+    from semantic_cache import DEFAULT_THRESHOLD, SemanticCache, numpy_available
+
+    if not numpy_available():
+        raise RuntimeError("--semantic에는 numpy가 필요합니다 (pip install numpy)")
+    return SemanticCache(cache, threshold=DEFAULT_THRESHOLD if args.similarity is None else args.similarity)
+
+
+def cmd_ask(args) -> int:
+    import workflows
+    from agent_pool import AgentPool
+    from answer_cache import AnswerCache
+    from bm25_index import LocalSearch
+    from conversation import Conversation
+    from retrieve_cache import RetrieveCache
+
+    session = None
+    if args.session:
+        session = Conversation(args.session) if args.reset_session else Conversation.load(args.session)
+    stream = not args.no_stream
+    chunk = (lambda text: print(text, end="", flush=True)) if stream else None
+    cache = None if args.no_cache else AnswerCache()
+    result = workflows.ask(
+        args.kb_id, args.region, args.prompt, args.web, AgentPool(retrieve_cache=RetrieveCache()),
+        stream=stream, on_chunk=chunk, cache=cache, semantic=_semantic_cache(args, cache),
+        on_log=lambda msg: print(msg, file=sys.stderr),
+        local=LocalSearch() if args.local or args.local_context else None, local_context=args.local_context,
+        session=session,
+    )
+    if session is not None:
+        session.save()
+    if stream and not (result.cached or result.local):
+        # 스트리밍으로 이미 stdout에 나갔으므로 줄만 끝낸다 (답변을 파이프로 받을 때 한 번만 나오도록)
+        print()
+    else:
+        print(result.text)
+    if args.trace and result.trace is not None:
+        print("-" * 40 + "\n" + result.trace.format(), file=sys.stderr)
+    return 0
+
+
+def cmd_batch(args) -> int:
+    import threading
+
+    import workflows
+    from agent_pool import AgentPool
+    from answer_cache import AnswerCache
+    from batch_runner import read_questions, run_batch
+    from bm25_index import LocalSearch
+    from retrieve_cache import RetrieveCache
+
+    questions = read_questions(args.input)
+    if not questions:
+        _print("질문이 없습니다.")
+        return 1
+    output = args.output or os.path.splitext(args.input)[0] + ".answers.jsonl"
+    pool = AgentPool(max_idle_per_key=args.concurrency, retrieve_cache=RetrieveCache())
+    cache = None if args.no_cache else AnswerCache()
+    semantic = _semantic_cache(args, cache)
+    local = LocalSearch() if args.local else None
+
+    def ask(prompt: str, cancel: threading.Event):
+        return workflows.ask(args.kb_id, args.region, prompt, args.web, pool, stream=False,
+                             cache=cache, cancel=cancel, local=local, semantic=semantic)
+
+    _print(f"[일괄] 질문 {len(questions)}개 → {output} (동시 {args.concurrency}개"
+           + (f", 분당 {args.rate_per_min:g}개" if args.rate_per_min else "") + ")")
+    summary = run_batch(questions, output, ask, concurrency=args.concurrency, per_minute=args.rate_per_min,
+                        on_progress=_print)
+    _print(f"[일괄 완료] {summary.describe()}")
+    if semantic is not None:
+        _print(f"[의미 캐시] {semantic.stats()}")
+    return 0 if not summary.failed else 2
+
+
+def build_parser() -> argparse.ArgumentParser:
+    parser = argparse.ArgumentParser(prog="pdfanalyze", description="PDF 학습 도우미 CLI")
+    sub = parser.add_subparsers(dest="command", required=True)
+
+    def kb_args(p: argparse.ArgumentParser, required: bool = True):
+        kb_default = os.environ.get("KNOWLEDGE_BASE_ID")
+        p.add_argument("--kb-id", default=kb_default, required=required and not kb_default,
+                       help="Knowledge Base ID (기본: KNOWLEDGE_BASE_ID)")
+        p.add_argument("--region", default=_default_region(), help="AWS 리전 (기본: AWS_REGION)")
+
+    p = sub.add_parser("upload", help="PDF 파일/폴더를 S3에 업로드")
+    p.add_argument("paths", nargs="+", help="PDF 파일 또는 폴더")
+    p.add_argument("--bucket", required=True)
+    p.add_argument("--prefix", default="documents/")
+    p.add_argument("--workers", type=int, default=4, help="동시 업로드 수")
+    p.add_argument("--no-skip-unchanged", action="store_true", help="내용이 같아도 다시 업로드")
+    p.add_argument("--no-multipart", action="store_true", help="대용량 멀티파트 업로드 끄기")
+    p.add_argument("--part-size-mb", type=int, default=64)
+    p.add_argument("--part-concurrency", type=int, default=4)
+    p.add_argument("--no-extract", action="store_true", help="로컬 텍스트 추출(페이지 색인) 끄기")
+    p.add_argument("--sync", action="store_true", help="업로드 후 KB 동기화")
+    p.add_argument("--timeout", type=float, help="--sync 상태 추적 최대 시간(초)")
+    kb_args(p, required=False)
+    p.set_defaults(func=cmd_upload)
+
+    p = sub.add_parser("sync", help="KB 동기화(인덱싱) 시작")
+    kb_args(p)
+    p.add_argument("--no-wait", action="store_true", help="작업 완료를 기다리지 않음")
+    p.add_argument("--force", action="store_true", help="업로드된 변경이 없어도 동기화")
+    p.add_argument("--timeout", type=float, help="상태 추적 최대 시간(초). 지나면 마지막 상태를 출력하고 종료")
+    p.set_defaults(func=cmd_sync)
+
+    p = sub.add_parser("validate", help="KB 상태 점검")
+    kb_args(p)
+    p.set_defaults(func=cmd_validate)
+
+    p = sub.add_parser("ask", help="KB 기반 질의응답")
+    p.add_argument("prompt")
+    kb_args(p)
+    p.add_argument("--web", action="store_true", help="웹 보조(http_request) 허용")
+    p.add_argument("--no-stream", action="store_true", help="스트리밍 출력 끄기")
+    p.add_argument("--no-cache", action="store_true", help="응답 캐시 사용 안 함")
+    p.add_argument("--semantic", action="store_true", help="비슷한 질문도 응답 캐시에서 찾기 (의미 캐시, numpy 필요)")
+    p.add_argument("--similarity", type=float, help="의미 캐시 유사도 임계값 (0~1, 기본 0.95)")
+    p.add_argument("--local", action="store_true", help="로컬 색인 먼저 검색 (위치 질문은 로컬에서 답변)")
+    p.add_argument("--trace", action="store_true", help="단계별 소요 시간을 stderr에 출력")
+    p.add_argument("--local-context", action="store_true", help="로컬 검색 결과를 참고 문맥으로 전달 (--local 포함)")
+    p.add_argument("--session", help="대화 세션 이름: 같은 이름으로 물으면 이전 질문/답변에 이어서 답변")
+    p.add_argument("--reset-session", action="store_true", help="--session 대화를 비우고 새로 시작")
+    p.set_defaults(func=cmd_ask)
+
+    p = sub.add_parser("batch", help="질문 파일(CSV/JSONL/텍스트)을 일괄 질의응답")
+    p.add_argument("input", help="질문 파일 (.csv: id,question 열 / .jsonl: {\"id\", \"question\"} / 그 외: 한 줄에 하나)")
+    kb_args(p)
+    p.add_argument("-o", "--output", help="결과 파일 (.jsonl 또는 .csv, 기본: <입력>.answers.jsonl)")
+    p.add_argument("--concurrency", type=int, default=4, help="동시 질문 수")
+    p.add_argument("--rate-per-min", type=float, default=0, help="분당 시작 질문 수 상한 (0: 제한 없음)")
+    p.add_argument("--web", action="store_true", help="웹 보조(http_request) 허용")
+    p.add_argument("--no-cache", action="store_true", help="응답 캐시 사용 안 함")
+    p.add_argument("--semantic", action="store_true", help="비슷한 질문도 응답 캐시에서 찾기 (의미 캐시, numpy 필요)")
+    p.add_argument("--similarity", type=float, help="의미 캐시 유사도 임계값 (0~1, 기본 0.95)")
+    p.add_argument("--local", action="store_true", help="로컬 색인 먼저 검색 (위치 질문은 로컬에서 답변)")
+    p.set_defaults(func=cmd_batch)
+
+    return parser
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    args = build_parser().parse_args(argv)
+    try:
+        return args.func(args)
+    except KeyboardInterrupt:
+        _print("중단됨")
+        return 130
+    except Exception as e:
+        _print(f"[오류] {e}")
+        return 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,86 @@
+"""
+retrieve 도구 결과 캐시
+
+같은 장(chapter)에 대한 연속 질문은 거의 같은 검색어로 KB를 반복 조회한다.
+strands_tools의 retrieve 도구를 감싸 (kb_id, 검색어, top_k, 기타 옵션) → 검색 결과를
+메모리에 TTL/개수 한도로 보관하고, hit/miss 수를 집계한다.
+
+wrap()한 함수는 agent_pool에서 원래 retrieve와 같은 이름/스펙의 도구로 등록하므로
+에이전트/프롬프트 쪽 변경은 필요 없다. KB ID/리전은 agent_pool이 도구 입력에 넣어 주므로
+키는 입력만으로 만든다.
+"""
+from __future__ import annotations
+
+import json
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Callable, Dict, Optional, Tuple
+
+from answer_cache import normalize_prompt
+
+DEFAULT_TTL = 600.0
+DEFAULT_MAX_ENTRIES = 256
+DEFAULT_TOP_K = 10
+
+
+class RetrieveCache:
+    def __init__(self, ttl: float = DEFAULT_TTL, max_entries: int = DEFAULT_MAX_ENTRIES):
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self.hits = 0
+        self.misses = 0
+        self._lock = threading.Lock()
+        self._entries: "OrderedDict[Tuple[str, str, int, str], Tuple[float, Any]]" = OrderedDict()
+
+    @staticmethod
+    def make_key(tool_input: Dict[str, Any]) -> Tuple[str, str, int, str]:
+        kb_id = tool_input.get("knowledgeBaseId", "")
+        query = normalize_prompt(tool_input.get("text", ""))
+        top_k = int(tool_input.get("numberOfResults", DEFAULT_TOP_K))
+        rest = {k: v for k, v in tool_input.items() if k not in ("knowledgeBaseId", "text", "numberOfResults")}
+        return kb_id, query, top_k, json.dumps(rest, sort_keys=True, ensure_ascii=False)
+
+    def get(self, key) -> Optional[Any]:
+        with self._lock:
+            item = self._entries.get(key)
+            if item is None or item[0] < time.monotonic():
+                if item is not None:
+                    del self._entries[key]
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return item[1]
+
+    def put(self, key, content: Any):
+        with self._lock:
+            self._entries[key] = (time.monotonic() + self.ttl, content)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+    def stats(self) -> str:
+        total = self.hits + self.misses
+        rate = self.hits / total * 100 if total else 0.0
+        return f"hit={self.hits}, miss={self.misses} ({rate:.0f}%), 항목 {len(self._entries)}개"
+
+    def wrap(self, retrieve_func: Callable[..., Dict[str, Any]]) -> Callable[..., Dict[str, Any]]:
+        """retrieve(tool, **kwargs) 형태의 도구 함수를 캐시를 거치도록 감싼다."""
+
+        def cached_retrieve(tool, **kwargs):
+            key = self.make_key(tool["input"])
+            content = self.get(key)
+            if content is not None:
+                return {"toolUseId": tool["toolUseId"], "status": "success", "content": content}
+            result = retrieve_func(tool, **kwargs)
+            # 오류 결과는 캐시하지 않는다
+            if result.get("status") == "success":
+                self.put(key, result["content"])
+            return result
+
+        return cached_retrieve
@@ -0,0 +1,156 @@
+"""
+의미 기반 응답 캐시 (로컬 해싱 임베딩)
+
+AnswerCache는 정규화한 질문이 정확히 같아야 찾으므로 "IAM이 뭐야"와 "IAM 알려줘" 같은
+바꿔 말한 질문은 놓친다. 질문을 로컬에서 벡터로 만들어 이전 질문들과 코사인 유사도를 비교하고,
+임계값 이상이면 그 질문의 캐시된 답변을 돌려준다.
+
+- 임베딩: "뭐야/알려줘/설명해 주세요/정의/의미/개념/에 대해" 같은 질문 표현과 조사를 빼고
+  bm25_index 토크나이저의 토큰을 고정 차원에 부호 해싱한 뒤 L2 정규화한다 (모델/학습 없음, CPU만 사용).
+  바꿔 말한 질문은 같은 토큰만 남아 유사도 1.0이 되고, 단어 하나가 다르거나 더 붙은 질문은
+  대개 0.92 아래로 떨어지므로 기본 임계값은 0.95로 둔다.
+- 숫자/영문 토큰("2장"의 2, EC2, IAM)은 한 글자만 달라도 다른 질문이므로, 유사도와 별개로
+  두 질문의 숫자/영문 토큰 집합이 정확히 같아야 후보로 본다.
+- 색인: 벡터를 NumPy 행렬 하나에 쌓고 행렬-벡터 곱으로 한 번에 비교한다.
+- 답변 본문은 AnswerCache(SQLite)에 있는 것을 쓴다. 후보 질문으로 현재 범위(kb_id, 웹 보조, 모델,
+  동기화 job)의 키를 만들어 꺼내므로, 다른 KB/동기화 이전의 답변은 쓰이지 않는다.
+- 색인은 처음 쓸 때 AnswerCache에 저장된 질문으로 만들고, 이후 새 답변이 저장될 때마다 추가한다.
+- NumPy는 선택 의존성이다. 설치되어 있지 않으면 의미 캐시만 꺼진다.
+"""
+from __future__ import annotations
+
+import importlib.util
+import re
+import threading
+import zlib
+from dataclasses import dataclass
+from typing import Any, FrozenSet, List, Optional
+
+from answer_cache import AnswerCache, normalize_prompt
+from bm25_index import PARTICLES, tokenize
+
+DEFAULT_THRESHOLD = 0.95
+DEFAULT_DIM = 1024
+MAX_CANDIDATES = 5
+
+# 질문 의도만 나타내는 표현: 토큰으로 나누기 전에 지워야 "설명해줘"의 "설명" 같은 내용 토큰과 섞이지 않는다
+_INTENT = re.compile(r"(알려|말해|설명해|해)\s*(줘|주세요|줄래요?|주실래요?)"
+                     r"|뭐야|뭔가요|뭐지|뭐예요|무엇인가요|무엇인지|뭔지|무엇"
+                     r"|(?<![가-힣])(정의|의미|개념|뜻)|에\s*(대해|관해)서?"
+                     r"|\b(what|is|are|the|explain|define|please)\b")
+
+
+def numpy_available() -> bool:
+    return importlib.util.find_spec("numpy") is not None
+
+
+def content_tokens(text: str) -> List[str]:
+    return [t for t in tokenize(_INTENT.sub(" ", normalize_prompt(text))) if t not in PARTICLES]
+
+
+def anchors(text: str) -> FrozenSet[str]:
+    """숫자/영문 토큰 집합 (장 번호, 서비스 이름 등). 의미 캐시는 이것이 같은 질문끼리만 비교한다."""
+    return frozenset(t for t in content_tokens(text) if t.isascii())
+
+
+def embed(text: str, dim: int = DEFAULT_DIM) -> Any:
+    """질문 → L2 정규화한 해싱 벡터 (numpy.ndarray, float32)"""
+    import numpy as np
+
+    vec = np.zeros(dim, dtype=np.float32)
+    for token in content_tokens(text):
+        h = zlib.crc32(token.encode("utf-8"))
+        vec[h % dim] += 1.0 if h & 0x80000000 else -1.0
+    norm = float(np.linalg.norm(vec))
+    return vec / norm if norm else vec
+
+
+@dataclass
+class SemanticMatch:
+    prompt: str         # 캐시에 있던 비슷한 질문
+    answer: str
+    similarity: float
+
+
+class SemanticCache:
+    def __init__(self, cache: AnswerCache, threshold: float = DEFAULT_THRESHOLD, dim: int = DEFAULT_DIM):
+        self.cache = cache
+        self.threshold = threshold
+        self.dim = dim
+        self.hits = 0
+        self.misses = 0
+        self._lock = threading.Lock()
+        self._loaded = False
+        self._kb_ids: List[str] = []
+        self._prompts: List[str] = []
+        self._anchors: List[FrozenSet[str]] = []
+        self._seen: set = set()
+        self._matrix: Any = None
+
+    def _ensure_loaded(self):
+        import numpy as np
+
+        if self._loaded:
+            return
+        self._matrix = np.zeros((0, self.dim), dtype=np.float32)
+        self._loaded = True
+        self._append(self.cache.entries())
+
+    def _append(self, rows: List[tuple]):
+        import numpy as np
+
+        rows = [(kb, p) for kb, p in rows if (kb, normalize_prompt(p)) not in self._seen]
+        if not rows:
+            return
+        for kb, p in rows:
+            self._seen.add((kb, normalize_prompt(p)))
+            self._kb_ids.append(kb)
+            self._prompts.append(p)
+            self._anchors.append(anchors(p))
+        self._matrix = np.vstack([self._matrix, np.stack([embed(p, self.dim) for _, p in rows])])
+
+    def add(self, kb_id: str, prompt: str):
+        """AnswerCache에 새 답변을 저장한 뒤 호출한다."""
+        with self._lock:
+            self._ensure_loaded()
+            if len(self._prompts) >= self.cache.max_entries * 2:
+                # 캐시에서 지워진 질문이 쌓였으면 저장된 질문으로 다시 만든다
+                self._loaded = False
+                self._kb_ids, self._prompts, self._anchors, self._seen = [], [], [], set()
+                self._ensure_loaded()
+            self._append([(kb_id, prompt)])
+
+    def lookup(self, prompt: str, kb_id: str, allow_web: bool, model_id: str,
+               kb_version: Optional[str]) -> Optional[SemanticMatch]:
+        import numpy as np
+
+        vec = embed(prompt, self.dim)
+        required = anchors(prompt)
+        with self._lock:
+            self._ensure_loaded()
+            matrix, kb_ids, prompts = self._matrix, list(self._kb_ids), list(self._prompts)
+            other = [a != required for a in self._anchors]
+        match = None
+        if len(prompts) and vec.any():
+            sims = matrix @ vec
+            sims[np.array(kb_ids) != kb_id] = -1.0
+            sims[np.array(other, dtype=bool)] = -1.0
+            for i in np.argsort(-sims)[:MAX_CANDIDATES]:
+                if sims[i] < self.threshold:
+                    break
+                key = AnswerCache.make_key(prompts[i], kb_id, allow_web, model_id, kb_version)
+                answer = self.cache.get(key, count=False)
+                if answer is not None:
+                    match = SemanticMatch(prompts[i], answer, float(sims[i]))
+                    break
+        with self._lock:
+            if match is None:
+                self.misses += 1
+            else:
+                self.hits += 1
+        return match
+
+    def stats(self) -> str:
+        total = self.hits + self.misses
+        rate = self.hits / total * 100 if total else 0.0
+        return f"hit={self.hits}, miss={self.misses} ({rate:.0f}%), 질문 {len(self._prompts)}개"
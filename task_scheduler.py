@@ -0,0 +1,147 @@
+"""
+GUI 작업 스케줄러
+
+버튼을 누를 때마다 QThread를 바로 시작하지 않고 이 스케줄러에 제출한다.
+
+- 분류(category)별 동시 실행 한도와 전체 동시 실행 한도를 둔다.
+- 한도를 넘는 작업은 대기열에 쌓이고, 우선순위(질문 > 점검 > 사전 준비 > 동기화 > 업로드)와
+  제출 순서대로 시작된다.
+- 대기/실행 목록은 changed 시그널로 알려 화면에 표시한다.
+- 실행 중인 작업을 취소하면 워커가 실제로 멈출 때까지 기다리지 않고 곧바로 한도에서 빠진다.
+  단 업로드/동기화는 매니페스트·재개 기록·동기화 대기 목록 파일을 통째로 다시 쓰므로, 취소한 워커가
+  끝날 때(finished/failed)까지 자리를 잡고 있어 같은 파일을 쓰는 다음 작업과 겹치지 않는다.
+
+워커는 CancellableWorker이며, 끝날 때 finished 또는 (있으면) failed 시그널을 한 번 내보낸다.
+"""
+from __future__ import annotations
+
+import itertools
+from dataclasses import dataclass
+from typing import Dict, List, Optional
+
+from PyQt6.QtCore import QObject, QThread, pyqtSignal
+
+PRIORITIES: Dict[str, int] = {"ask": 0, "validate": 1, "warmup": 2, "sync": 3, "upload": 4}
+DEFAULT_LIMITS: Dict[str, int] = {"ask": 2, "validate": 1, "warmup": 1, "sync": 1, "upload": 1}
+DEFAULT_MAX_RUNNING = 4
+# 취소해도 워커가 끝날 때까지 한도에서 빼지 않는 분류 (로컬 상태 파일을 쓰는 작업)
+HOLD_UNTIL_EXIT = frozenset({"sync", "upload"})
+
+CATEGORY_NAMES = {"ask": "질문", "validate": "KB 점검", "warmup": "사전 준비", "sync": "동기화", "upload": "업로드"}
+
+QUEUED = "대기"
+RUNNING = "실행 중"
+DONE = "완료"
+CANCELLED = "취소"
+
+
+@dataclass(eq=False)
+class Task:
+    category: str
+    label: str
+    worker: QThread
+    priority: int
+    seq: int
+    state: str = QUEUED
+
+    def describe(self) -> str:
+        return f"[{self.state}] {CATEGORY_NAMES.get(self.category, self.category)}: {self.label}"
+
+
+class TaskScheduler(QObject):
+    changed = pyqtSignal()
+    dropped = pyqtSignal(object)   # 시작 전에 취소된 Task
+
+    def __init__(self, limits: Optional[Dict[str, int]] = None, max_running: int = DEFAULT_MAX_RUNNING,
+                 parent: Optional[QObject] = None):
+        super().__init__(parent)
+        self.limits = dict(DEFAULT_LIMITS, **(limits or {}))
+        self.max_running = max_running
+        self._seq = itertools.count()
+        self._queue: List[Task] = []
+        self._running: List[Task] = []
+        # finished/failed는 run() 끝에서 나가므로 스레드가 완전히 끝날 때까지 참조를 보관
+        self._exiting: List[QThread] = []
+
+    # ---- 제출/취소 ----
+    def submit(self, category: str, label: str, worker: QThread, priority: Optional[int] = None) -> Task:
+        task = Task(category, label, worker, PRIORITIES.get(category, 9) if priority is None else priority,
+                    next(self._seq))
+        for name in ("finished", "failed"):
+            signal = getattr(worker, name, None)
+            if signal is not None:
+                signal.connect(lambda *_: self._on_task_end(task))
+        self._queue.append(task)
+        self._queue.sort(key=lambda t: (t.priority, t.seq))
+        self._pump()
+        self.changed.emit()
+        return task
+
+    def cancel(self, task: Task):
+        if task.state == QUEUED:
+            self._queue.remove(task)
+            task.state = CANCELLED
+            self.dropped.emit(task)
+            self.changed.emit()
+        elif task.state == RUNNING:
+            task.worker.cancel()
+            task.state = CANCELLED
+            if task.category in HOLD_UNTIL_EXIT:
+                self.changed.emit()
+                return
+            # 취소 요청 후 스트림/API 호출이 끝날 때까지 자리를 잡고 있지 않도록 바로 한도에서 뺀다
+            self._running.remove(task)
+            self._exiting.append(task.worker)
+            self._pump()
+            self.changed.emit()
+
+    def cancel_category(self, category: str):
+        for task in [t for t in self._queue + self._running if t.category == category]:
+            self.cancel(task)
+
+    def set_limit(self, category: str, limit: int):
+        self.limits[category] = max(1, limit)
+        self._pump()
+        self.changed.emit()
+
+    def shutdown(self, wait_ms: int = 3000):
+        """대기 작업을 버리고 실행 중인 작업을 취소한 뒤 끝날 때까지 기다린다."""
+        for task in list(self._queue):
+            self.cancel(task)
+        for task in self._running:
+            task.worker.cancel()
+        for worker in [t.worker for t in self._running] + self._exiting:
+            worker.wait(wait_ms)
+
+    # ---- 조회 ----
+    def tasks(self) -> List[Task]:
+        return self._running + self._queue
+
+    def running(self, category: Optional[str] = None) -> List[Task]:
+        return [t for t in self._running if category is None or t.category == category]
+
+    def pending(self, category: Optional[str] = None) -> List[Task]:
+        return [t for t in self._queue if category is None or t.category == category]
+
+    # ---- 내부 ----
+    def _pump(self):
+        self._exiting = [w for w in self._exiting if not w.isFinished()]
+        while len(self._running) < self.max_running:
+            task = next((t for t in self._queue
+                         if len(self.running(t.category)) < self.limits.get(t.category, 1)), None)
+            if task is None:
+                return
+            self._queue.remove(task)
+            task.state = RUNNING
+            self._running.append(task)
+            task.worker.start()
+
+    def _on_task_end(self, task: Task):
+        if task not in self._running:
+            return
+        if task.state == RUNNING:
+            task.state = DONE
+        self._running.remove(task)
+        self._exiting.append(task.worker)
+        self._pump()
+        self.changed.emit()
@@ -0,0 +1,47 @@
+"""
+테스트 공통 설정
+
+- 저장소 루트의 모듈(workflows, upload_engine ...)을 바로 import한다.
+- 로컬 상태(매니페스트, 캐시, 색인 등)는 테스트마다 임시 디렉터리(PDFANALYZE_HOME)에 둔다.
+- fake_aws: benchmark의 가짜 S3/bedrock-agent를 aws_clients 레지스트리에 넣는다.
+"""
+from __future__ import annotations
+
+import os
+import sys
+
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import aws_clients  # noqa: E402
+import kb_sync  # noqa: E402
+from benchmark import BUCKET, KB_ID, REGION, FakeBedrockAgent, FakeS3, FakeUploader  # noqa: E402
+
+
+@pytest.fixture(autouse=True)
+def home(tmp_path, monkeypatch):
+    path = tmp_path / "home"
+    monkeypatch.setenv("PDFANALYZE_HOME", str(path))
+    return path
+
+
+class FakeAws:
+    def __init__(self):
+        self.s3 = FakeS3(latency=0, bandwidth=1e12)
+        self.agent = FakeBedrockAgent(latency=0, polls=1)
+
+
+@pytest.fixture
+def fake_aws():
+    aws = FakeAws()
+    aws_clients.clear()
+    kb_sync.forget_versions()
+    for region in (None, REGION):
+        aws_clients.install("s3", region, aws.s3)
+        aws_clients.install("bedrock-agent", region, aws.agent)
+    for kb_id in (None, KB_ID):
+        aws_clients.install_uploader(BUCKET, kb_id, FakeUploader(aws.s3, BUCKET))
+    yield aws
+    aws_clients.clear()
+    kb_sync.forget_versions()
@@ -0,0 +1,53 @@
+from __future__ import annotations
+
+import os
+from concurrent.futures import ThreadPoolExecutor
+
+from agent_pool import bind_knowledge_base
+from benchmark import make_pool
+from retrieve_cache import RetrieveCache
+
+
+def test_retrieve_input_is_bound_to_the_agent_kb():
+    seen = []
+
+    def retrieve(tool, **_):
+        seen.append(tool["input"])
+        return {"toolUseId": tool["toolUseId"], "status": "success", "content": []}
+
+    bound = bind_knowledge_base(retrieve, "KB1", "ap-northeast-2")
+    bound({"toolUseId": "t", "input": {"text": "IAM", "knowledgeBaseId": "OTHER"}})
+    assert seen == [{"text": "IAM", "knowledgeBaseId": "KB1", "region": "ap-northeast-2"}]
+
+
+def test_retrieve_cache_keys_do_not_mix_kbs():
+    cache = RetrieveCache()
+    calls = []
+
+    def retrieve(tool, **_):
+        calls.append(tool["input"]["knowledgeBaseId"])
+        return {"toolUseId": tool["toolUseId"], "status": "success", "content": [{"text": calls[-1]}]}
+
+    wrapped = cache.wrap(retrieve)
+    kb1, kb2 = bind_knowledge_base(wrapped, "KB1", None), bind_knowledge_base(wrapped, "KB2", None)
+    assert kb1({"toolUseId": "a", "input": {"text": "IAM"}})["content"] == [{"text": "KB1"}]
+    assert kb2({"toolUseId": "b", "input": {"text": "IAM"}})["content"] == [{"text": "KB2"}]
+    assert kb1({"toolUseId": "c", "input": {"text": "IAM"}})["content"] == [{"text": "KB1"}]
+    assert calls == ["KB1", "KB2"]
+
+
+def test_concurrent_asks_do_not_touch_environment(monkeypatch):
+    import workflows
+
+    monkeypatch.delenv("KNOWLEDGE_BASE_ID", raising=False)
+    monkeypatch.setattr(workflows, "load_agent_prompt", lambda: "test")
+    pool = make_pool(token_latency=0, tokens=1, retrieve_latency=0)
+
+    def ask(kb_id):
+        return workflows.ask(kb_id, "us-east-1", "IAM", False, pool, stream=False).text
+
+    with ThreadPoolExecutor(max_workers=4) as ex:
+        list(ex.map(ask, ["KB1", "KB2", "KB3", "KB4"]))
+    assert "KNOWLEDGE_BASE_ID" not in os.environ
+    # 같은 질문이라도 KB가 다르면 retrieve 캐시를 공유하지 않는다
+    assert (pool.retrieve_cache.hits, pool.retrieve_cache.misses) == (0, 4)
@@ -0,0 +1,77 @@
+from __future__ import annotations
+
+import itertools
+
+import pytest
+
+import answer_cache
+import kb_sync
+import workflows
+from answer_cache import AnswerCache
+from benchmark import KB_ID, REGION, make_pool
+
+
+def test_key_ignores_spacing_case_and_trailing_punctuation():
+    key = AnswerCache.make_key("IAM 정의 알려줘", KB_ID, False, "model", "JOB1")
+    assert AnswerCache.make_key("  iam   정의 알려줘?? ", KB_ID, False, "model", "JOB1") == key
+
+
+@pytest.mark.parametrize("changed", [
+    dict(kb_id="KB2"), dict(allow_web=True), dict(model_id="other"), dict(kb_version="JOB2"),
+])
+def test_key_changes_with_scope(changed):
+    base = dict(prompt="IAM 정의 알려줘", kb_id=KB_ID, allow_web=False, model_id="model", kb_version="JOB1")
+    assert AnswerCache.make_key(**dict(base, **changed)) != AnswerCache.make_key(**base)
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    # last_used가 같은 값이 되지 않도록 1초씩 증가하는 시계
+    ticks = itertools.count(1000)
+    monkeypatch.setattr(answer_cache.time, "time", lambda: float(next(ticks)))
+
+
+def test_evicts_least_recently_used_entry(clock):
+    cache = AnswerCache(max_entries=2)
+    cache.put("a", KB_ID, "qa", "A")
+    cache.put("b", KB_ID, "qb", "B")
+    assert cache.get("a") == "A"
+    cache.put("c", KB_ID, "qc", "C")
+
+    assert cache.get("b") is None
+    assert cache.get("a") == "A" and cache.get("c") == "C"
+
+
+def test_evicts_by_total_size(clock):
+    cache = AnswerCache(max_bytes=20)
+    cache.put("a", KB_ID, "qa", "x" * 10)
+    cache.put("b", KB_ID, "qb", "y" * 10)
+
+    assert cache.get("a") is None
+    assert cache.get("b") == "y" * 10
+
+
+def test_invalidate_only_removes_that_kb():
+    cache = AnswerCache()
+    cache.put("a", KB_ID, "qa", "A")
+    cache.put("b", "KB2", "qb", "B")
+
+    assert cache.invalidate(KB_ID) == 1
+    assert cache.get("a") is None and cache.get("b") == "B"
+
+
+def test_ask_uses_cache_until_next_sync(fake_aws, monkeypatch):
+    monkeypatch.setattr(workflows, "load_agent_prompt", lambda: "test")
+    pool = make_pool(token_latency=0, tokens=1, retrieve_latency=0)
+    cache = AnswerCache()
+
+    def ask():
+        return workflows.ask(KB_ID, REGION, "IAM 정의 알려줘", False, pool, stream=False, cache=cache)
+
+    assert not ask().cached
+    assert ask().cached
+    # 앱 밖(콘솔 등)에서 끝난 동기화도 캐시 키에 반영된다
+    jobs = kb_sync.start_sync(KB_ID, REGION)
+    kb_sync.wait_for_jobs(KB_ID, jobs, REGION, sleep=lambda _: None)
+    kb_sync.forget_versions()
+    assert not ask().cached
@@ -0,0 +1,28 @@
+from __future__ import annotations
+
+import json
+
+from batch_runner import ResultWriter, citations, completed_ids
+from latency_stats import percentile
+
+
+def test_resume_after_truncated_line(tmp_path):
+    out = tmp_path / "answers.jsonl"
+    out.write_text(json.dumps({"id": "q1", "error": None}) + "\n" + '{"id": "q2", "ans', encoding="utf-8")
+
+    ResultWriter(str(out)).write({"id": "q3", "error": None})
+    lines = out.read_text(encoding="utf-8").splitlines()
+    assert json.loads(lines[-1])["id"] == "q3"
+    assert completed_ids(str(out)) == {"q1", "q3"}
+
+
+def test_citations_keep_uri_and_page_mentions():
+    answer = "근거: s3://b/docs/iam.pdf 와 os.pdf p. 3"
+    assert citations(answer, ["s3://b/docs/iam.pdf"]) == ["s3://b/docs/iam.pdf", "os.pdf p. 3"]
+
+
+def test_percentile_nearest_rank():
+    values = [float(v) for v in range(1, 101)]
+    assert percentile(values, 50) == 50.0
+    assert percentile(values, 95) == 95.0
+    assert percentile([], 50) == 0.0
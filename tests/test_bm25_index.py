@@ -0,0 +1,67 @@
+from __future__ import annotations
+
+import pytest
+
+from bm25_index import MIN_COVERAGE, BM25Index, LocalSearch, is_lookup_question, tokenize
+from pdf_index import PageIndex
+
+PAGES = [
+    "IAM은 AWS 리소스 접근을 제어하는 서비스입니다. IAM 사용자와 역할을 만듭니다.",
+    "EC2 인스턴스를 시작하고 중지하는 방법을 설명합니다.",
+    "S3 버킷 정책으로 객체 접근 권한을 지정합니다.",
+]
+
+
+def test_korean_bigrams_share_tokens_across_particles():
+    assert tokenize("정의가") == tokenize("정의는") == ["정의"]
+    assert tokenize("프로세스") == ["프로", "로세", "세스"]
+
+
+def test_particles_after_latin_and_digit_words_are_dropped():
+    assert tokenize("IAM이") == ["iam"]
+    assert tokenize("EC2를 S3의") == ["ec2", "s3"]
+    # 띄어 쓴 한 글자 한글은 조사가 아니라 단어로 남긴다
+    assert tokenize("2 장") == ["2", "장"]
+
+
+@pytest.mark.parametrize("query, page", [
+    ("IAM이 몇 페이지에 있어?", 0),
+    ("EC2를 몇 페이지에서 설명해?", 1),
+    ("S3의 버킷 정책은 몇 쪽?", 2),
+])
+def test_lookup_queries_cover_the_page(query, page):
+    bm25 = BM25Index()
+    for i, text in enumerate(PAGES):
+        bm25.add("sha", i + 1, text)
+
+    doc, _, coverage = bm25.search(query)[0]
+    assert doc == page
+    assert coverage >= MIN_COVERAGE
+
+
+def test_lookup_question_detection():
+    assert is_lookup_question("IAM 정의가 몇 페이지에 있어?")
+    assert is_lookup_question("Which page covers EC2?")
+    assert not is_lookup_question("IAM이 어디에 쓰이는지 설명해줘")
+
+
+@pytest.fixture
+def local(tmp_path):
+    pdf = tmp_path / "aws.pdf"
+    pdf.write_bytes(b"%PDF")
+    index = PageIndex()
+    index.add("sha-aws", str(pdf), {"pages": PAGES, "outline": []})
+    return LocalSearch(index)
+
+
+def test_answer_cites_pages_for_lookup_question(local):
+    query = "EC2를 몇 페이지에서 설명해?"
+    answer = LocalSearch.answer(query, local.search(query))
+    assert answer is not None and "aws.pdf p.2" in answer
+
+
+def test_no_local_answer_for_explanation_question(local):
+    query = "EC2 인스턴스 중지 방법 설명해줘"
+    hits = local.search(query)
+    assert hits and hits[0].page == 2
+    assert LocalSearch.answer(query, hits) is None
@@ -0,0 +1,54 @@
+from __future__ import annotations
+
+import workflows
+from answer_cache import AnswerCache
+from benchmark import KB_ID, REGION, make_pool
+from conversation import Conversation, estimate_tokens
+
+
+def _retrieve_messages(text: str):
+    return [
+        {"role": "assistant", "content": [{"toolUse": {"toolUseId": "t1", "name": "retrieve", "input": {}}}]},
+        {"role": "user", "content": [{"toolResult": {"toolUseId": "t1", "status": "success", "content": [
+            {"text": f"Score: 0.9\nDocument ID: s3://b/os.pdf\nContent: {text}"}]}}]},
+    ]
+
+
+def test_latest_turn_is_kept_when_over_budget():
+    conv = Conversation(history_tokens=100)
+    conv.record("1장 요약해줘", "짧은 답")
+    conv.record("2장 요약해줘", "가" * 500)
+
+    messages = conv.messages()
+    assert [m["content"][0]["text"] for m in messages[::2]] == ["2장 요약해줘"]
+    answer = messages[1]["content"][0]["text"]
+    assert answer.startswith("가") and answer.endswith("(이하 생략)")
+    assert sum(estimate_tokens(m["content"][0]["text"]) for m in messages) <= 100 + estimate_tokens(" …(이하 생략)")
+
+
+def test_older_turns_dropped_first():
+    conv = Conversation(history_tokens=30)
+    conv.record("첫 질문", "가" * 20)
+    conv.record("둘째 질문", "짧은 답")
+
+    assert [m["content"][0]["text"] for m in conv.messages()] == ["둘째 질문", "짧은 답"]
+
+
+def test_passages_are_scoped_by_kb():
+    conv = Conversation()
+    conv.record("프로세스 관리", "답", _retrieve_messages("프로세스 관리는 스케줄링을 다룬다"), "KB1")
+
+    assert [p.source for p in conv.relevant_passages("프로세스 관리 스케줄링", "KB1")] == ["s3://b/os.pdf"]
+    assert conv.relevant_passages("프로세스 관리 스케줄링", "KB2") == []
+
+
+def test_follow_up_skips_cache_even_when_history_is_empty(fake_aws, monkeypatch):
+    monkeypatch.setattr(workflows, "load_agent_prompt", lambda: "test")
+    pool = make_pool(token_latency=0, tokens=1, retrieve_latency=0)
+    cache = AnswerCache()
+    workflows.ask(KB_ID, REGION, "그럼 3장은?", False, pool, stream=False, cache=cache)
+
+    session = Conversation(history_tokens=0)
+    session.record("2장 요약해줘", "가" * 100)
+    result = workflows.ask(KB_ID, REGION, "그럼 3장은?", False, pool, stream=False, cache=cache, session=session)
+    assert not result.cached
@@ -0,0 +1,92 @@
+from __future__ import annotations
+
+import functools
+
+import pytest
+
+import kb_sync
+import workflows
+from benchmark import BUCKET, KB_ID, REGION
+from kb_sync import PendingChanges
+
+
+@pytest.fixture
+def no_poll_wait(monkeypatch):
+    # 동기화 상태 조회 간격(2초~)을 기다리지 않는다
+    monkeypatch.setattr(workflows, "wait_for_jobs", functools.partial(kb_sync.wait_for_jobs, sleep=lambda _: None))
+
+
+def test_pending_changes_commit_keeps_reuploads():
+    changes = PendingChanges()
+    assert changes.record(KB_ID, "s3://b/a.pdf", "sha-a1")
+    snapshot = changes.pending(KB_ID)
+    # 동기화 중에 같은 객체가 다른 내용으로 다시 올라감
+    changes.record(KB_ID, "s3://b/a.pdf", "sha-a2")
+    changes.commit(KB_ID, snapshot)
+
+    assert set(changes.pending(KB_ID)) == {"s3://b/a.pdf"}
+    changes.commit(KB_ID, changes.pending(KB_ID))
+    assert changes.pending(KB_ID) == {}
+    assert not changes.record(KB_ID, "s3://b/a.pdf", "sha-a2")
+
+
+def test_sync_skips_when_nothing_changed(fake_aws, no_poll_wait):
+    first = workflows.sync(KB_ID, REGION)
+    assert [j["status"] for j in first] == ["COMPLETE"]
+
+    assert workflows.sync(KB_ID, REGION) == []
+
+    PendingChanges().record(KB_ID, "s3://b/a.pdf", "sha-a")
+    assert [j["status"] for j in workflows.sync(KB_ID, REGION)] == ["COMPLETE"]
+    assert PendingChanges().pending(KB_ID) == {}
+    assert workflows.sync(KB_ID, REGION) == []
+    assert len(workflows.sync(KB_ID, REGION, force=True)) == 1
+
+
+def test_wait_for_jobs_returns_last_status_on_timeout(fake_aws):
+    fake_aws.agent.polls = 1000
+    jobs = kb_sync.start_sync(KB_ID, REGION)
+    updates = []
+
+    jobs = kb_sync.wait_for_jobs(KB_ID, jobs, REGION, on_update=updates.append, initial=0.01, timeout=0.05)
+    assert [j["status"] for j in jobs] == ["IN_PROGRESS"]
+    assert "제한 초과" in updates[-1]
+
+
+def test_upload_without_kb_is_synced(fake_aws, no_poll_wait, tmp_path):
+    workflows.sync(KB_ID, REGION)
+    pdf = tmp_path / "a.pdf"
+    pdf.write_bytes(b"v1")
+
+    report = workflows.upload(BUCKET, None, "docs/", [str(pdf)], extract=False)
+    assert len(report.uploaded) == 1
+    assert [j["status"] for j in workflows.sync(KB_ID, REGION)] == ["COMPLETE"]
+    assert workflows.sync(KB_ID, REGION) == []
+
+
+def test_upload_without_kb_to_other_bucket_is_ignored():
+    changes = PendingChanges()
+    changes.record(None, "s3://other-bucket/a.pdf", "sha-a")
+
+    assert changes.pending(KB_ID, {BUCKET}) == {}
+    assert set(changes.pending(KB_ID)) == {"s3://other-bucket/a.pdf"}
+
+
+def test_kb_version_caches_the_fallback_when_lookup_fails(fake_aws, monkeypatch):
+    calls = []
+
+    def denied(**kwargs):
+        calls.append(kwargs)
+        raise PermissionError("AccessDenied")
+
+    monkeypatch.setattr(fake_aws.agent, "list_ingestion_jobs", denied)
+    assert kb_sync.kb_version(KB_ID, REGION) is None
+    assert kb_sync.kb_version(KB_ID, REGION) is None
+    assert len(calls) == 1
+
+    assert kb_sync.kb_version(KB_ID, REGION, fallback_ttl=0) is None
+    assert len(calls) == 1   # 만료 시각은 저장할 때 정해진다
+    kb_sync.forget_versions(KB_ID)
+    kb_sync.kb_version(KB_ID, REGION, fallback_ttl=0)
+    kb_sync.kb_version(KB_ID, REGION, fallback_ttl=0)
+    assert len(calls) == 3
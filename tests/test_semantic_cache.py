@@ -0,0 +1,71 @@
+from __future__ import annotations
+
+import pytest
+
+from answer_cache import AnswerCache
+from semantic_cache import DEFAULT_THRESHOLD, SemanticCache, anchors, embed
+
+pytest.importorskip("numpy")
+
+PARAPHRASES = [
+    ("IAM이 뭐야", "IAM 알려줘"),
+    ("IAM이 뭐야", "What is IAM?"),
+    ("IAM이 뭐야", "IAM 정의 알려줘"),
+    ("IAM이 뭐야", "IAM에 대해 알려줘"),
+    ("IAM이 뭐야", "IAM 의미가 뭐야"),
+    ("IAM 정의 알려줘", "IAM 의미 알려줘"),
+    ("프로세스 관리 요약해줘", "프로세스 관리를 요약해 주세요"),
+    ("가상 메모리 개념 설명해줘", "가상 메모리 개념을 알려줘"),
+    ("S3 버킷 정책 설명해줘", "S3 버킷 정책을 설명해 주세요"),
+    ("가상 메모리가 뭐야", "가상 메모리의 개념을 설명해 주세요"),
+    ("교착 상태 발생 조건 알려줘", "교착 상태의 발생 조건이 뭐야"),
+]
+
+DIFFERENT = [
+    ("2장 프로세스 관리 요약해줘", "3장 프로세스 관리 요약해줘"),
+    ("EC2 인스턴스 중지 방법", "EC2 인스턴스 시작 방법"),
+    ("VPC 서브넷 설명", "VPC 라우팅 설명"),
+    ("IAM이 뭐야", "IAM 정책 알려줘"),
+    ("가상 메모리 개념 설명해줘", "가상 메모리 장점 설명해줘"),
+    ("프로세스 상태 전이 설명해줘", "프로세스 상태 전이 예시 설명해줘"),
+    ("S3 버킷 정책 설명해줘", "EC2 버킷 정책 설명해줘"),
+]
+
+
+def _cache_with(prompt: str) -> SemanticCache:
+    cache = AnswerCache()
+    cache.put(AnswerCache.make_key(prompt, "KB", False, "model", "JOB1"), "KB", prompt, f"answer: {prompt}")
+    return SemanticCache(cache)
+
+
+@pytest.mark.parametrize("cached, asked", PARAPHRASES)
+def test_paraphrase_hits(cached, asked):
+    match = _cache_with(cached).lookup(asked, "KB", False, "model", "JOB1")
+    assert match is not None and match.prompt == cached
+
+
+@pytest.mark.parametrize("cached, asked", DIFFERENT)
+def test_different_question_misses(cached, asked):
+    assert _cache_with(cached).lookup(asked, "KB", False, "model", "JOB1") is None
+
+
+def test_number_and_latin_tokens_must_match_exactly():
+    assert anchors("2장 요약해줘") != anchors("3장 요약해줘")
+    assert anchors("IAM이 뭐야") == anchors("what is iam")
+    # 숫자만 다른 질문은 유사도가 임계값 근처까지 올라가므로 anchors로 걸러야 한다
+    assert float(embed("2장 프로세스 관리 요약해줘") @ embed("3장 프로세스 관리 요약해줘")) > 0.8
+
+
+def test_threshold_separates_paraphrases():
+    def similarity(a, b):
+        return float(embed(a) @ embed(b)) if anchors(a) == anchors(b) else -1.0
+
+    assert max(similarity(a, b) for a, b in DIFFERENT) < DEFAULT_THRESHOLD
+    assert min(similarity(a, b) for a, b in PARAPHRASES) >= DEFAULT_THRESHOLD
+
+
+def test_scope_kb_and_sync_version():
+    semantic = _cache_with("IAM이 뭐야")
+    assert semantic.lookup("IAM 알려줘", "KB2", False, "model", "JOB1") is None
+    assert semantic.lookup("IAM 알려줘", "KB", False, "model", "JOB2") is None
+    assert semantic.threshold == DEFAULT_THRESHOLD
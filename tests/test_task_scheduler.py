@@ -0,0 +1,61 @@
+from __future__ import annotations
+
+import pytest
+
+pytest.importorskip("PyQt6.QtCore")
+
+from PyQt6.QtCore import QObject, pyqtSignal  # noqa: E402
+
+from task_scheduler import CANCELLED, RUNNING, TaskScheduler  # noqa: E402
+
+
+class FakeWorker(QObject):
+    """스레드 없이 start/cancel만 기록하는 워커"""
+    finished = pyqtSignal(str)
+    failed = pyqtSignal(str)
+
+    def __init__(self):
+        super().__init__()
+        self.started = False
+        self.cancelled = False
+        self.done = False
+
+    def start(self):
+        self.started = True
+
+    def cancel(self):
+        self.cancelled = True
+
+    def isFinished(self) -> bool:
+        return self.done
+
+    def end(self):
+        self.done = True
+        self.failed.emit("취소됨")
+
+
+def test_cancelled_ask_frees_its_slot_right_away():
+    scheduler = TaskScheduler(limits={"ask": 1})
+    first, second = FakeWorker(), FakeWorker()
+    task = scheduler.submit("ask", "q1", first)
+    scheduler.submit("ask", "q2", second)
+    assert not second.started
+
+    scheduler.cancel(task)
+    assert first.cancelled and second.started
+
+
+def test_cancelled_upload_keeps_its_slot_until_the_worker_ends():
+    scheduler = TaskScheduler()
+    first, second = FakeWorker(), FakeWorker()
+    task = scheduler.submit("upload", "a.pdf", first)
+    queued = scheduler.submit("upload", "b.pdf", second)
+
+    scheduler.cancel(task)
+    assert first.cancelled and task.state == CANCELLED
+    # 취소된 워커가 매니페스트/재개 기록을 아직 쓰고 있을 수 있다
+    assert not second.started
+
+    first.end()
+    assert second.started and queued.state == RUNNING
+    assert scheduler.running("upload") == [queued]
@@ -0,0 +1,109 @@
+from __future__ import annotations
+
+import os
+
+import pytest
+
+from benchmark import FakeS3
+from upload_engine import MIN_PART_SIZE, DedupUploader, MultipartUploader, ResumeJournal, SkipUnchanged
+
+
+def _uploader(s3: FakeS3, sent: list):
+    def upload_one(path: str) -> str:
+        sent.append(path)
+        with open(path, "rb") as fp:
+            s3.put_object(Bucket="b", Key=f"docs/{os.path.basename(path)}", Body=fp.read())
+        return f"s3://b/docs/{os.path.basename(path)}"
+    return upload_one
+
+
+def test_dedup_skips_unchanged_file(tmp_path):
+    s3, sent = FakeS3(latency=0), []
+    dedup = DedupUploader("b", "docs/", _uploader(s3, sent), s3_client=s3)
+    pdf = tmp_path / "a.pdf"
+    pdf.write_bytes(b"v1")
+
+    assert dedup(str(pdf)) == "s3://b/docs/a.pdf"
+    with pytest.raises(SkipUnchanged):
+        dedup(str(pdf))
+    pdf.write_bytes(b"v2")
+    dedup(str(pdf))
+    assert len(sent) == 2
+    assert set(dedup.digests) == {"s3://b/docs/a.pdf"}
+
+
+def test_dedup_matches_existing_object_without_manifest(tmp_path):
+    s3, sent = FakeS3(latency=0), []
+    s3.put_object(Bucket="b", Key="docs/a.pdf", Body=b"same")
+    pdf = tmp_path / "a.pdf"
+    pdf.write_bytes(b"same")
+
+    with pytest.raises(SkipUnchanged):
+        DedupUploader("b", "docs/", _uploader(s3, sent), s3_client=s3)(str(pdf))
+    assert sent == []
+
+
+def test_dedup_reuploads_deleted_object(tmp_path):
+    s3, sent = FakeS3(latency=0), []
+    dedup = DedupUploader("b", "docs/", _uploader(s3, sent), s3_client=s3)
+    pdf = tmp_path / "a.pdf"
+    pdf.write_bytes(b"v1")
+    dedup(str(pdf))
+    del s3.objects["b/docs/a.pdf"]
+
+    dedup(str(pdf))
+    assert len(sent) == 2
+
+
+class FlakyS3(FakeS3):
+    """fail_part번 파트를 한 번 실패시키는 S3"""
+
+    def __init__(self, fail_part: int):
+        super().__init__(latency=0, bandwidth=1e12)
+        self.fail_part = fail_part
+        self.sent = []
+
+    def upload_part(self, **kwargs):
+        if kwargs["PartNumber"] == self.fail_part:
+            self.fail_part = None
+            raise ConnectionError("연결 끊김")
+        self.sent.append(kwargs["PartNumber"])
+        return super().upload_part(**kwargs)
+
+
+def test_multipart_resumes_after_failed_part(tmp_path):
+    pdf = tmp_path / "big.pdf"
+    pdf.write_bytes(b"x" * (MIN_PART_SIZE * 2 + 10))   # 파트 3개
+    s3 = FlakyS3(fail_part=2)
+    journal = ResumeJournal()
+
+    def uploader():
+        return MultipartUploader("b", "docs/", part_size=MIN_PART_SIZE, concurrency=1, threshold=1,
+                                 journal=journal, s3_client=s3)
+
+    with pytest.raises(ConnectionError):
+        uploader()(str(pdf))
+    first = list(s3.sent)
+    assert 1 in first and 2 not in first
+    assert journal.pending() == ["s3://b/docs/big.pdf"]
+
+    s3.sent.clear()
+    assert uploader()(str(pdf)) == "s3://b/docs/big.pdf"
+    assert sorted(first + s3.sent) == [1, 2, 3]
+    assert journal.pending() == []
+    assert s3.objects["b/docs/big.pdf"]["ContentLength"] == pdf.stat().st_size
+    assert s3.uploads == {}
+
+
+def test_multipart_aborts_stale_upload_of_changed_file(tmp_path):
+    pdf = tmp_path / "big.pdf"
+    pdf.write_bytes(b"x" * (MIN_PART_SIZE + 10))
+    s3 = FakeS3(latency=0, bandwidth=1e12)
+    journal = ResumeJournal()
+    stale = s3.create_multipart_upload(Bucket="b", Key="docs/big.pdf")["UploadId"]
+    journal.start("s3://b/docs/big.pdf", {"path": str(pdf), "size": 1, "mtime_ns": 0, "upload_id": stale,
+                                          "part_size": MIN_PART_SIZE, "parts": {}})
+
+    MultipartUploader("b", "docs/", part_size=MIN_PART_SIZE, threshold=1, journal=journal, s3_client=s3)(str(pdf))
+    assert stale not in s3.uploads
+    assert journal.pending() == []
@@ -0,0 +1,181 @@
+"""
+질의응답 단계별 소요 시간 측정 (span)
+
+질문 하나를 처리하는 동안 import, 에이전트 생성, 도구 호출(retrieve/http_request),
+모델 추론 등 단계마다 span을 기록하고, 끝나면 JSONL 파일(~/.pdfanalyze/traces/ask.jsonl)에
+한 줄로 남긴다.
+
+- 현재 trace와 부모 span은 contextvars로 전달한다.
+  strands는 도구를 asyncio.to_thread로 실행하므로 컨텍스트가 도구 스레드까지 이어진다.
+- 진행 중인 trace가 없으면 span()은 아무것도 기록하지 않는다 (CLI/벤치마크 등 어디서나 안전).
+"""
+from __future__ import annotations
+
+import contextvars
+import json
+import os
+import re
+import threading
+import time
+import uuid
+from contextlib import contextmanager
+from dataclasses import dataclass, field
+from typing import Any, Callable, Dict, Iterator, List, Optional
+
+from app_paths import state_path
+
+TRACE_FILE_BYTES = 5 * 1024 * 1024   # 넘으면 .1로 옮기고 새 파일 시작
+S3_URI = re.compile(r"s3://[^\s\"'<>)\]]+")  # 답변/도구 결과에 나온 S3 출처 (batch_runner도 사용)
+
+_current: contextvars.ContextVar[Optional["Trace"]] = contextvars.ContextVar("trace", default=None)
+_parent: contextvars.ContextVar[Optional[int]] = contextvars.ContextVar("trace_parent", default=None)
+_file_lock = threading.Lock()
+
+
+@dataclass
+class Span:
+    id: int
+    name: str
+    parent: Optional[int]
+    start_ms: float                 # trace 시작 기준
+    duration_ms: float = 0.0
+    attrs: Dict[str, Any] = field(default_factory=dict)
+    error: Optional[str] = None
+
+
+@dataclass
+class Trace:
+    name: str
+    attrs: Dict[str, Any] = field(default_factory=dict)
+    id: str = field(default_factory=lambda: uuid.uuid4().hex[:12])
+    started_at: float = field(default_factory=time.time)
+    spans: List[Span] = field(default_factory=list)
+
+    def __post_init__(self):
+        self._t0 = time.perf_counter()
+        self._lock = threading.Lock()
+
+    def _open(self, name: str, attrs: Dict[str, Any]) -> Span:
+        with self._lock:
+            sp = Span(len(self.spans), name, _parent.get(), (time.perf_counter() - self._t0) * 1000, attrs=attrs)
+            self.spans.append(sp)
+            return sp
+
+    def _close(self, sp: Span):
+        sp.duration_ms = (time.perf_counter() - self._t0) * 1000 - sp.start_ms
+
+    def depth(self, sp: Span) -> int:
+        depth = 0
+        while sp.parent is not None:
+            sp = self.spans[sp.parent]
+            depth += 1
+        return depth
+
+    def total_ms(self, name: str) -> float:
+        return sum(sp.duration_ms for sp in self.spans if sp.name == name or sp.name.startswith(name + ":"))
+
+    def sources(self) -> List[str]:
+        """도구 호출 결과에 나온 문서 URI (중복 제거, 처음 나온 순서)"""
+        return list(dict.fromkeys(uri for sp in self.spans for uri in sp.attrs.get("sources", [])))
+
+    def summary(self) -> Dict[str, float]:
+        """단계별 합계(ms). model은 추론 구간에서 도구 실행 시간을 뺀 값이다."""
+        tools = self.total_ms("tool")
+        return {
+            "import": self.total_ms("import"),
+            "agent_build": self.total_ms("agent_build"),
+            "tools": tools,
+            "model": max(0.0, self.total_ms("inference") - tools),
+            "total": self.total_ms("total"),
+        }
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            "trace_id": self.id, "name": self.name, "started_at": self.started_at, "attrs": self.attrs,
+            "spans": [{"id": s.id, "name": s.name, "parent": s.parent, "start_ms": round(s.start_ms, 2),
+                       "duration_ms": round(s.duration_ms, 2), "attrs": s.attrs,
+                       **({"error": s.error} if s.error else {})} for s in self.spans],
+        }
+
+    def format(self) -> str:
+        lines = []
+        for sp in self.spans:
+            attrs = " ".join(f"{k}={v}" for k, v in sp.attrs.items())
+            lines.append(f"{'  ' * self.depth(sp)}{sp.name} {sp.duration_ms:.0f}ms"
+                         f" (+{sp.start_ms:.0f}ms)" + (f" {attrs}" if attrs else "")
+                         + (f" 오류: {sp.error}" if sp.error else ""))
+        return "\n".join(lines)
+
+
+def current() -> Optional[Trace]:
+    return _current.get()
+
+
+@contextmanager
+def span(name: str, **attrs: Any) -> Iterator[Optional[Span]]:
+    """현재 trace에 span을 기록한다. trace가 없으면 아무 일도 하지 않는다."""
+    tr = _current.get()
+    if tr is None:
+        yield None
+        return
+    sp = tr._open(name, attrs)
+    token = _parent.set(sp.id)
+    try:
+        yield sp
+    except BaseException as e:
+        sp.error = type(e).__name__
+        raise
+    finally:
+        _parent.reset(token)
+        tr._close(sp)
+
+
+@contextmanager
+def trace(name: str, path: Optional[str] = None, **attrs: Any) -> Iterator[Trace]:
+    """새 trace를 시작하고 전체 구간을 루트 span(total)으로 기록한다. 끝나면 JSONL에 추가한다."""
+    tr = Trace(name, attrs)
+    token = _current.set(tr)
+    try:
+        with span("total"):
+            yield tr
+    finally:
+        _current.reset(token)
+        write_jsonl(tr, path)
+
+
+def write_jsonl(tr: Trace, path: Optional[str] = None):
+    path = path or state_path("traces", f"{tr.name}.jsonl")
+    line = json.dumps(tr.to_dict(), ensure_ascii=False)
+    with _file_lock:
+        try:
+            if os.path.getsize(path) > TRACE_FILE_BYTES:
+                os.replace(path, path + ".1")
+        except OSError:
+            pass
+        with open(path, "a", encoding="utf-8") as fp:
+            fp.write(line + "\n")
+
+
+def result_sources(result: Dict[str, Any]) -> List[str]:
+    """도구 결과 텍스트에 나오는 s3:// 문서 URI (retrieve 결과의 Document ID)"""
+    text = " ".join(str(c.get("text", "")) for c in result.get("content") or [] if isinstance(c, dict))
+    return list(dict.fromkeys(S3_URI.findall(text)))
+
+
+def traced_tool(name: str, func: Callable[..., Dict[str, Any]]) -> Callable[..., Dict[str, Any]]:
+    """strands 도구 함수 func(tool, **kwargs)를 호출마다 'tool:<name>' span으로 감싼다.
+
+    결과에 나온 문서 URI는 span의 sources 속성으로 남겨 답변의 근거 목록에 쓸 수 있게 한다.
+    """
+
+    def wrapper(tool, **kwargs):
+        with span(f"tool:{name}") as sp:
+            result = func(tool, **kwargs)
+            if sp is not None:
+                sp.attrs["status"] = result.get("status")
+                sources = result_sources(result)
+                if sources:
+                    sp.attrs["sources"] = sources
+            return result
+
+    return wrapper
@@ -0,0 +1,468 @@
+"""
+다중 파일 S3 업로드 엔진
+
+파일을 하나씩 순서대로 올리는 대신, 스레드 풀로 동시에 업로드한다.
+
+- 동시 업로드 수(workers)는 호출 측에서 지정한다.
+- 파일별 진행 상황은 on_progress 콜백으로 전달된다.
+- 한 파일이 실패해도 배치 전체를 중단하지 않고 실패 목록에 모아 보고한다.
+- 전체 처리량(MB/s)을 함께 계산한다.
+- DedupUploader는 내용 해시를 비교해 이미 올라가 있는 동일 파일을 건너뛴다.
+- MultipartUploader는 대용량 파일을 파트 단위로 동시에 올리고, 완료된 파트를 로컬 저널에
+  기록해 앱을 다시 시작해도 마지막 완료 파트 다음부터 이어 올린다.
+- cancel(threading.Event)이 설정되면 아직 시작하지 않은 파일/파트는 보내지 않고,
+  진행 중인 멀티파트 업로드는 S3에서 중단(abort)해 저장 공간을 바로 돌려준다.
+
+PyQt에 의존하지 않으므로 GUI 워커와 다른 진입점에서 함께 사용할 수 있다.
+"""
+from __future__ import annotations
+
+import hashlib
+import math
+import os
+import threading
+import time
+from concurrent.futures import Future, ThreadPoolExecutor, as_completed
+from dataclasses import dataclass, field
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+import aws_clients
+from app_paths import load_json, save_json, state_path
+from cancellation import Cancelled, check
+
+DEFAULT_WORKERS = 4
+MB = 1024 * 1024
+HASH_CHUNK = MB
+
+DEFAULT_PART_SIZE = 64 * MB
+MIN_PART_SIZE = 5 * MB          # S3 최소 파트 크기 (마지막 파트 제외)
+MAX_PARTS = 10000               # S3 최대 파트 수
+DEFAULT_PART_CONCURRENCY = 4
+MULTIPART_THRESHOLD = 100 * MB
+
+
+class SkipUnchanged(Exception):
+    """대상 위치에 같은 내용의 객체가 이미 있어 업로드를 건너뜀"""
+
+    def __init__(self, uri: str):
+        super().__init__(uri)
+        self.uri = uri
+
+
+@dataclass
+class UploadResult:
+    path: str
+    uri: Optional[str] = None
+    error: Optional[str] = None
+    size: int = 0
+    seconds: float = 0.0
+    skipped: bool = False
+    cancelled: bool = False
+
+    @property
+    def ok(self) -> bool:
+        return self.error is None and not self.cancelled
+
+
+@dataclass
+class UploadReport:
+    results: List[UploadResult] = field(default_factory=list)
+    elapsed: float = 0.0
+
+    @property
+    def uploaded(self) -> List[UploadResult]:
+        return [r for r in self.results if r.ok and not r.skipped]
+
+    @property
+    def skipped(self) -> List[UploadResult]:
+        return [r for r in self.results if r.skipped]
+
+    @property
+    def failed(self) -> List[UploadResult]:
+        return [r for r in self.results if r.error is not None]
+
+    @property
+    def cancelled(self) -> List[UploadResult]:
+        return [r for r in self.results if r.cancelled]
+
+    @property
+    def total_bytes(self) -> int:
+        return sum(r.size for r in self.uploaded)
+
+    @property
+    def throughput(self) -> float:
+        """업로드 성공분 기준 처리량 (MB/s)"""
+        if self.elapsed <= 0:
+            return 0.0
+        return self.total_bytes / MB / self.elapsed
+
+    def summary(self) -> str:
+        msg = (f"총 {len(self.uploaded)}개 업로드 완료"
+               f" ({self.total_bytes / MB:.1f} MB, {self.elapsed:.1f}초, {self.throughput:.2f} MB/s)")
+        if self.skipped:
+            msg += f", 변경 없음 {len(self.skipped)}개 건너뜀"
+        if self.failed:
+            msg += f", 실패 {len(self.failed)}개"
+        if self.cancelled:
+            msg += f", 취소로 미처리 {len(self.cancelled)}개"
+        return msg
+
+
+def upload_files(files: List[str], upload_one: Callable[[str], str], workers: int = DEFAULT_WORKERS,
+                 on_progress: Optional[Callable[[str], None]] = None,
+                 cancel: Optional[threading.Event] = None) -> UploadReport:
+    """files를 최대 workers개씩 동시에 upload_one(path) -> uri 로 업로드한다."""
+    notify = on_progress or (lambda msg: None)
+
+    def task(path: str) -> UploadResult:
+        result = UploadResult(path)
+        if cancel is not None and cancel.is_set():
+            result.cancelled = True
+            return result
+        started = time.perf_counter()
+        notify(f"[업로드] {path} ...")
+        try:
+            result.size = os.path.getsize(path)
+            result.uri = upload_one(path)
+        except SkipUnchanged as e:
+            result.uri = e.uri
+            result.skipped = True
+        except Cancelled:
+            result.cancelled = True
+        except Exception as e:
+            result.error = str(e)
+        result.seconds = time.perf_counter() - started
+        return result
+
+    report = UploadReport()
+    started = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=max(1, workers)) as pool:
+        futures = [pool.submit(task, f) for f in files]
+        for fut in as_completed(futures):
+            r = fut.result()
+            report.results.append(r)
+            if r.cancelled:
+                continue
+            if r.skipped:
+                notify(f"[건너뜀] {r.path} → {r.uri} skipped (unchanged)")
+            elif r.ok:
+                notify(f"[완료] {r.uri} ({r.size / MB:.1f} MB, {r.seconds:.1f}초)")
+            else:
+                notify(f"[실패] {r.path}: {r.error}")
+    report.elapsed = time.perf_counter() - started
+    return report
+
+
+# ---------- 내용 해시 기반 중복 업로드 방지 ----------
+
+def file_digest(path: str, cancel: Optional[threading.Event] = None) -> Tuple[str, str]:
+    """파일을 조각 단위로 읽어 (sha256, md5) 16진 문자열을 계산한다.
+
+    md5는 단일 파트로 올라간 S3 객체의 ETag와 비교하는 용도다.
+    """
+    sha = hashlib.sha256()
+    md5 = hashlib.md5()
+    with open(path, "rb") as fp:
+        for block in iter(lambda: fp.read(HASH_CHUNK), b""):
+            check(cancel)
+            sha.update(block)
+            md5.update(block)
+    return sha.hexdigest(), md5.hexdigest()
+
+
+class DigestCache:
+    """file_digest 결과를 (경로, 크기, 수정 시각) 단위로 공유한다.
+
+    한 번의 업로드에서 DedupUploader와 로컬 추출(index_files)이 같은 파일의 해시를 쓰므로,
+    먼저 계산을 시작한 쪽의 결과를 다른 쪽이 기다렸다가 그대로 쓴다 (파일을 두 번 읽지 않음).
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._results: Dict[Tuple[str, int, float], Future] = {}
+
+    def __call__(self, path: str, cancel: Optional[threading.Event] = None) -> Tuple[str, str]:
+        st = os.stat(path)
+        key = (os.path.abspath(path), st.st_size, st.st_mtime)
+        with self._lock:
+            result = self._results.get(key)
+            owner = result is None
+            if owner:
+                result = self._results[key] = Future()
+        if owner:
+            try:
+                result.set_result(file_digest(path, cancel))
+            except BaseException as e:
+                # 취소/읽기 오류는 기억하지 않는다 (다음 호출에서 다시 계산)
+                with self._lock:
+                    del self._results[key]
+                result.set_exception(e)
+                raise
+        return result.result()
+
+
+def split_s3_uri(uri: str) -> Tuple[str, str]:
+    bucket, _, key = uri[len("s3://"):].partition("/")
+    return bucket, key
+
+
+class UploadManifest:
+    """업로드 대상 위치별로 마지막으로 올린 파일의 해시를 기록하는 로컬 매니페스트"""
+
+    def __init__(self, path: Optional[str] = None):
+        self.path = path or state_path("upload_manifest.json")
+        self._lock = threading.Lock()
+        self._entries: Dict[str, Dict[str, Any]] = load_json(self.path, {})
+
+    def get(self, target: str) -> Optional[Dict[str, Any]]:
+        with self._lock:
+            return self._entries.get(target)
+
+    def record(self, target: str, entry: Dict[str, Any]):
+        with self._lock:
+            self._entries[target] = entry
+            save_json(self.path, self._entries)
+
+
+class DedupUploader:
+    """upload_one을 감싸 대상 객체와 내용이 같은 파일은 SkipUnchanged로 건너뛴다.
+
+    비교 순서:
+    1) 로컬 매니페스트에 같은 sha256이 기록되어 있고 객체가 아직 존재하면 건너뜀
+    2) 매니페스트에 없으면 prefix+파일명 위치의 객체 ETag(md5)/메타데이터(sha256)와 비교
+    """
+
+    def __init__(self, bucket: str, prefix: str, upload_one: Callable[[str], str],
+                 manifest: Optional[UploadManifest] = None, s3_client=None,
+                 cancel: Optional[threading.Event] = None,
+                 digest: Callable[[str, Optional[threading.Event]], Tuple[str, str]] = file_digest):
+        self.bucket = bucket
+        self.prefix = prefix
+        self.upload_one = upload_one
+        self.manifest = manifest or UploadManifest()
+        self._s3 = s3_client
+        self.cancel = cancel
+        self.digest = digest
+        self.digests: Dict[str, str] = {}   # 이번에 실제로 올린 객체 URI → sha256
+
+    @property
+    def s3(self):
+        if self._s3 is None:
+            self._s3 = aws_clients.get_client("s3")
+        return self._s3
+
+    def __call__(self, path: str) -> str:
+        sha256, md5 = self.digest(path, self.cancel)
+        target = f"s3://{self.bucket}/{self.prefix}{os.path.basename(path)}"
+
+        entry = self.manifest.get(target)
+        if entry and entry.get("sha256") == sha256:
+            head = self._head(entry["uri"])
+            if head is not False:
+                raise SkipUnchanged(entry["uri"])
+        elif entry is None:
+            head = self._head(target)
+            if head and self._same_content(head, sha256, md5):
+                self.manifest.record(target, {"sha256": sha256, "md5": md5, "uri": target})
+                raise SkipUnchanged(target)
+
+        uri = self.upload_one(path)
+        self.manifest.record(target, {"sha256": sha256, "md5": md5, "uri": uri})
+        self.digests[uri] = sha256
+        return uri
+
+    def _head(self, uri: str):
+        """객체 메타데이터. 객체가 없으면 False, 확인할 수 없으면(권한 등) None."""
+        from botocore.exceptions import ClientError
+
+        bucket, key = split_s3_uri(uri)
+        try:
+            return self.s3.head_object(Bucket=bucket, Key=key)
+        except ClientError as e:
+            code = e.response.get("Error", {}).get("Code")
+            if code in ("404", "NoSuchKey", "NotFound"):
+                return False
+            return None
+
+    @staticmethod
+    def _same_content(head: Dict[str, Any], sha256: str, md5: str) -> bool:
+        if head.get("Metadata", {}).get("sha256") == sha256:
+            return True
+        # 멀티파트 업로드 객체의 ETag("...-N")는 md5가 아니므로 비교하지 않는다
+        return head.get("ETag", "").strip('"') == md5
+
+
+# ---------- 멀티파트 / 이어 올리기 ----------
+
+class ResumeJournal:
+    """진행 중인 멀티파트 업로드의 UploadId와 완료된 파트 ETag를 기록하는 로컬 저널"""
+
+    def __init__(self, path: Optional[str] = None):
+        self.path = path or state_path("multipart_journal.json")
+        self._lock = threading.Lock()
+        self._entries: Dict[str, Dict[str, Any]] = load_json(self.path, {})
+
+    def get(self, uri: str) -> Optional[Dict[str, Any]]:
+        with self._lock:
+            entry = self._entries.get(uri)
+            return dict(entry, parts=dict(entry["parts"])) if entry else None
+
+    def pending(self) -> List[str]:
+        with self._lock:
+            return list(self._entries)
+
+    def start(self, uri: str, entry: Dict[str, Any]):
+        with self._lock:
+            self._entries[uri] = entry
+            save_json(self.path, self._entries)
+
+    def record_part(self, uri: str, part_number: int, etag: str):
+        with self._lock:
+            entry = self._entries.get(uri)
+            if entry is None:
+                return
+            entry["parts"][str(part_number)] = etag
+            save_json(self.path, self._entries)
+
+    def remove(self, uri: str):
+        with self._lock:
+            if self._entries.pop(uri, None) is not None:
+                save_json(self.path, self._entries)
+
+
+class MultipartUploader:
+    """파일을 part_size 단위로 나눠 concurrency개씩 동시에 올리는 S3 멀티파트 업로더.
+
+    같은 파일(경로/크기/수정 시각)이 저널에 남아 있으면 기존 UploadId로 이어 올린다.
+    실패 시 저널은 그대로 두므로 다음 업로드에서 완료된 파트는 다시 보내지 않는다.
+    """
+
+    def __init__(self, bucket: str, prefix: str, part_size: int = DEFAULT_PART_SIZE,
+                 concurrency: int = DEFAULT_PART_CONCURRENCY, threshold: int = MULTIPART_THRESHOLD,
+                 journal: Optional[ResumeJournal] = None, s3_client=None,
+                 on_progress: Optional[Callable[[str], None]] = None,
+                 cancel: Optional[threading.Event] = None):
+        self.bucket = bucket
+        self.prefix = prefix
+        self.part_size = max(MIN_PART_SIZE, part_size)
+        self.concurrency = max(1, concurrency)
+        self.threshold = threshold
+        self.journal = journal or ResumeJournal()
+        self._s3 = s3_client
+        self.notify = on_progress or (lambda msg: None)
+        self.cancel = cancel
+
+    @property
+    def s3(self):
+        if self._s3 is None:
+            self._s3 = aws_clients.get_client("s3")
+        return self._s3
+
+    def wants(self, path: str) -> bool:
+        return os.path.getsize(path) >= self.threshold
+
+    def __call__(self, path: str) -> str:
+        check(self.cancel)
+        key = f"{self.prefix}{os.path.basename(path)}"
+        uri = f"s3://{self.bucket}/{key}"
+        stat = os.stat(path)
+        fingerprint = {"path": os.path.abspath(path), "size": stat.st_size, "mtime_ns": stat.st_mtime_ns}
+
+        entry = self.journal.get(uri)
+        if entry and all(entry.get(k) == v for k, v in fingerprint.items()):
+            entry["parts"] = self._confirmed_parts(key, entry)
+            if entry["parts"] is None:
+                self._discard(key, entry)
+                entry = None
+            elif entry["parts"]:
+                self.notify(f"[이어 올리기] {os.path.basename(path)}: 완료된 파트 {len(entry['parts'])}개 건너뜀")
+        elif entry:
+            # 파일이 바뀌어 이어 올릴 수 없음: 이전 업로드의 파트가 S3에 과금되며 남지 않도록 중단
+            self._discard(key, entry)
+            entry = None
+
+        if entry is None:
+            part_size = max(self.part_size, math.ceil(stat.st_size / MAX_PARTS))
+            resp = self.s3.create_multipart_upload(Bucket=self.bucket, Key=key, ContentType="application/pdf")
+            entry = dict(fingerprint, upload_id=resp["UploadId"], part_size=part_size, parts={})
+            self.journal.start(uri, entry)
+
+        upload_id = entry["upload_id"]
+        part_size = entry["part_size"]
+        total = max(1, math.ceil(stat.st_size / part_size))
+        done: Dict[int, str] = {int(n): etag for n, etag in entry["parts"].items()}
+        todo = [n for n in range(1, total + 1) if n not in done]
+
+        def send(part_number: int) -> Tuple[int, str]:
+            check(self.cancel)
+            with open(path, "rb") as fp:
+                fp.seek((part_number - 1) * part_size)
+                body = fp.read(part_size)
+            resp = self.s3.upload_part(Bucket=self.bucket, Key=key, UploadId=upload_id,
+                                       PartNumber=part_number, Body=body)
+            self.journal.record_part(uri, part_number, resp["ETag"])
+            return part_number, resp["ETag"]
+
+        pool = ThreadPoolExecutor(max_workers=self.concurrency)
+        try:
+            for fut in as_completed([pool.submit(send, n) for n in todo]):
+                part_number, etag = fut.result()
+                done[part_number] = etag
+                self.notify(f"[멀티파트] {os.path.basename(path)} 파트 {len(done)}/{total}")
+        except Cancelled:
+            # 진행 중인 파트가 끝나기를 기다린 뒤 업로드 자체를 중단해 S3의 파트 저장 공간을 회수
+            pool.shutdown(wait=True, cancel_futures=True)
+            self.abort(uri)
+            raise
+        finally:
+            # 한 파트가 실패하면 아직 시작하지 않은 파트는 보내지 않는다 (다음에 이어 올림)
+            pool.shutdown(wait=True, cancel_futures=True)
+
+        self.s3.complete_multipart_upload(
+            Bucket=self.bucket, Key=key, UploadId=upload_id,
+            MultipartUpload={"Parts": [{"PartNumber": n, "ETag": done[n]} for n in sorted(done)]},
+        )
+        self.journal.remove(uri)
+        return uri
+
+    def abort(self, uri: str):
+        """저널에 남은 멀티파트 업로드를 S3에서 중단하고 저널에서 지운다."""
+        entry = self.journal.get(uri)
+        if entry is None:
+            return
+        _, key = split_s3_uri(uri)
+        try:
+            self.s3.abort_multipart_upload(Bucket=self.bucket, Key=key, UploadId=entry["upload_id"])
+        finally:
+            self.journal.remove(uri)
+            self.notify(f"[멀티파트] {os.path.basename(key)} 업로드 중단(abort)")
+
+    def _discard(self, key: str, entry: Dict[str, Any]):
+        """더 이상 이어 올리지 않을 이전 멀티파트 업로드를 S3에서 중단한다 (이미 없으면 무시)."""
+        from botocore.exceptions import ClientError
+
+        try:
+            self.s3.abort_multipart_upload(Bucket=self.bucket, Key=key, UploadId=entry["upload_id"])
+        except ClientError as e:
+            if e.response.get("Error", {}).get("Code") != "NoSuchUpload":
+                self.notify(f"[멀티파트] {os.path.basename(key)} 이전 업로드 중단 실패: {e}")
+
+    def _confirmed_parts(self, key: str, entry: Dict[str, Any]) -> Optional[Dict[str, str]]:
+        """S3에 실제로 남아 있는 파트만 돌려준다. 업로드가 만료/취소되었으면 None."""
+        from botocore.exceptions import ClientError
+
+        parts: Dict[str, str] = {}
+        kwargs = {"Bucket": self.bucket, "Key": key, "UploadId": entry["upload_id"]}
+        try:
+            while True:
+                resp = self.s3.list_parts(**kwargs)
+                for p in resp.get("Parts", []):
+                    parts[str(p["PartNumber"])] = p["ETag"]
+                if not resp.get("IsTruncated"):
+                    break
+                kwargs["PartNumberMarker"] = resp["NextPartNumberMarker"]
+        except ClientError as e:
+            if e.response.get("Error", {}).get("Code") == "NoSuchUpload":
+                return None
+            raise
+        return parts
@@ -0,0 +1,330 @@
+"""
+GUI 워커와 CLI가 공유하는 작업 흐름
+
+KB 점검, 질의응답, S3 업로드, KB 동기화의 실제 처리 로직을 PyQt 없이 구현한다.
+진행 상황은 콜백(on_progress, on_chunk 등)으로 전달하므로
+gui_app의 QThread 워커는 콜백을 시그널에 연결하기만 하고,
+pdfanalyze CLI는 콘솔에 출력한다.
+
+각 작업은 cancel(threading.Event)을 받아 취소되면 cancellation.Cancelled를 던진다.
+"""
+from __future__ import annotations
+
+import os
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+import aws_clients
+import tracing
+from agent_pool import AgentPool, stream_agent
+from answer_cache import AnswerCache
+from bm25_index import LocalSearch
+from cancellation import Cancelled, check
+from conversation import Conversation
+from kb_sync import (PendingChanges, data_source_buckets, kb_version, last_completed_job, record_completed,
+                     start_sync, wait_for_jobs)
+from pdf_index import PageIndex, extractor_available, index_files
+from semantic_cache import SemanticCache
+from upload_engine import (
+    DEFAULT_PART_CONCURRENCY, DEFAULT_PART_SIZE, DEFAULT_WORKERS,
+    DedupUploader, DigestCache, MultipartUploader, UploadReport, upload_files,
+)
+
+Callback = Optional[Callable[[str], None]]
+
+
+def _noop(msg: str):
+    pass
+
+
+def load_agent_prompt() -> str:
+    # 프롬프트는 kb_for_rrag의 것을 재사용
+    from kb_for_rrag import PAPER_AGENT_PROMPT
+    return PAPER_AGENT_PROMPT
+
+
+# ---------- KB 점검 ----------
+
+def validate_kb(kb_id: str, region: Optional[str], cancel: Optional[threading.Event] = None) -> str:
+    client = aws_clients.get_client("bedrock-agent", region)
+    kb = client.get_knowledge_base(knowledgeBaseId=kb_id)["knowledgeBase"]
+    status = kb.get("status")
+    msg = [f"[KB] ID={kb_id}, 상태={status}"]
+    check(cancel)
+    ds = client.list_data_sources(knowledgeBaseId=kb_id)
+    summaries = ds.get("dataSourceSummaries", [])
+    if not summaries:
+        msg.append("[KB] 데이터 소스: 없음 (S3 데이터 소스 추가 필요)")
+    else:
+        msg.append(f"[KB] 데이터 소스: {len(summaries)}개")
+        for s in summaries:
+            name = s.get("name") or s.get("dataSourceId")
+            msg.append(f" - {name}")
+    return "\n".join(msg)
+
+
+# ---------- 질의응답 ----------
+
+@dataclass
+class AskResult:
+    text: str
+    seconds: float
+    ttft: Optional[float] = None
+    cached: bool = False
+    local: bool = False     # 로컬 색인만으로 답함 (KB/모델 호출 없음)
+    similarity: Optional[float] = None   # 의미 캐시로 답한 경우 비슷한 질문과의 유사도
+    trace: Optional[tracing.Trace] = None
+
+
+def ask(kb_id: str, region: Optional[str], prompt: str, allow_web: bool, pool: AgentPool,
+        stream: bool = False, on_chunk: Callback = None, cache: Optional[AnswerCache] = None,
+        on_log: Callback = None, cancel: Optional[threading.Event] = None,
+        local: Optional[LocalSearch] = None, local_paths: Optional[List[str]] = None,
+        local_context: bool = False, session: Optional[Conversation] = None,
+        semantic: Optional[SemanticCache] = None) -> AskResult:
+    """질문 하나를 처리한다. 단계별 소요 시간은 trace로 기록되어 AskResult.trace와 JSONL 파일에 남는다.
+
+    session을 주면 그 대화의 이전 질문/답변과 관련 검색 구절을 함께 넘기고, 끝나면 이번 턴을 기록한다.
+    semantic을 주면 응답 캐시(cache)에 정확히 같은 질문이 없을 때 비슷한 질문의 답변을 찾는다.
+    """
+    with tracing.trace("ask", kb_id=kb_id, prompt=prompt[:80]) as tr:
+        result = _ask(kb_id, region, prompt, allow_web, pool, stream, on_chunk, cache, on_log, cancel,
+                      local, local_paths, local_context, session, semantic)
+        tr.attrs["outcome"] = "local" if result.local else "cached" if result.cached else "agent"
+    result.trace = tr
+    return result
+
+
+def _ask(kb_id: str, region: Optional[str], prompt: str, allow_web: bool, pool: AgentPool,
+         stream: bool, on_chunk: Callback, cache: Optional[AnswerCache], on_log: Callback,
+         cancel: Optional[threading.Event], local: Optional[LocalSearch], local_paths: Optional[List[str]],
+         local_context: bool, session: Optional[Conversation], semantic: Optional[SemanticCache]) -> AskResult:
+    log = on_log or _noop
+    started = time.perf_counter()
+
+    # 로컬 BM25 검색을 먼저: 위치 조회 질문은 여기서 끝내고, 아니면 (옵션) 참고 문맥으로 전달
+    query = prompt
+    if local is not None:
+        t0 = time.perf_counter()
+        with tracing.span("local_search"):
+            hits = local.search(prompt, local_paths, kb_id=kb_id)
+        log(f"[로컬 검색] {len(hits)}건 {(time.perf_counter() - t0) * 1000:.0f}ms"
+            + (f", 최상위 {hits[0].cite()} (일치 {hits[0].coverage:.0%})" if hits else ""))
+        answer = local.answer(prompt, hits)
+        if answer is not None:
+            if session is not None:
+                session.record(prompt, answer)
+            return AskResult(answer, time.perf_counter() - started, local=True)
+        if local_context and hits:
+            query = f"{prompt}\n\n{local.context(hits)}"
+
+    # 대화 모드: 이전 질문/답변(토큰 예산 안)과, 앞서 검색한 구절 중 이번 질문과 관련 있는 것
+    history: List[Dict[str, Any]] = []
+    if session is not None:
+        with tracing.span("session") as sp:
+            history = session.messages()
+            passages = session.relevant_passages(prompt, kb_id)
+            if sp is not None:
+                sp.attrs.update(turns=len(history) // 2, passages=len(passages))
+        if passages:
+            query = f"{query}\n\n{session.context(passages)}"
+        if history or passages:
+            log(f"[대화] 이전 {len(history) // 2}턴, 재사용 구절 {len(passages)}개 ({session.describe()})")
+
+    cache_key = None
+    # 이전 대화에 따라 답이 달라지는 후속 질문은 응답 캐시를 쓰지 않는다
+    # (이전 턴이 예산을 넘어 history가 비었더라도 세션에 턴이 있으면 후속 질문)
+    if cache is not None and not (session is not None and session.turns):
+        version = kb_version(kb_id, region)
+        cache_key = AnswerCache.make_key(query, kb_id, allow_web, pool.model_id, version)
+        with tracing.span("answer_cache"):
+            cached = cache.get(cache_key)
+        similarity = None
+        # 의미 캐시는 질문만으로 만든 답변끼리 비교한다 (참고 문맥을 덧붙인 질문은 제외)
+        if cached is None and semantic is not None and query == prompt:
+            with tracing.span("semantic_cache") as sp:
+                match = semantic.lookup(prompt, kb_id, allow_web, pool.model_id, version)
+                if sp is not None and match is not None:
+                    sp.attrs["similarity"] = round(match.similarity, 3)
+            if match is not None:
+                cached, similarity = match.answer, match.similarity
+                log(f"[의미 캐시] hit 유사도 {match.similarity:.2f} ← \"{match.prompt[:40]}\" ({semantic.stats()})")
+            else:
+                log(f"[의미 캐시] miss ({semantic.stats()})")
+        if cached is not None:
+            if similarity is None:
+                log(f"[응답 캐시] hit (누적 hit={cache.hits}, miss={cache.misses})")
+            if session is not None:
+                session.record(prompt, cached)
+            return AskResult(cached, time.perf_counter() - started, cached=True, similarity=similarity)
+
+    # 에이전트는 풀에서 재사용 (최초 1회만 생성, strands도 이때 로드)
+    # 취소할 수 있도록 항상 스트림으로 받고, stream=False면 조각을 전달하지 않는다
+    with tracing.span("import", modules="kb_for_rrag"):
+        system_prompt = load_agent_prompt()
+    with pool.acquire(kb_id, region, allow_web, system_prompt, history) as agent:
+        text, ttft = stream_agent(agent, query, (on_chunk or _noop) if stream else _noop, cancel)
+        if session is not None:
+            session.record(prompt, text, agent.messages[len(history):], kb_id)
+    if pool.retrieve_cache is not None:
+        log(f"[retrieve 캐시] {pool.retrieve_cache.stats()}")
+    if cache_key is not None and text.strip():
+        cache.put(cache_key, kb_id, prompt, text)
+        if semantic is not None and query == prompt:
+            semantic.add(kb_id, prompt)
+    return AskResult(text, time.perf_counter() - started, ttft=ttft)
+
+
+def warm_up(kb_id: str, region: Optional[str], pool: AgentPool, allow_web: bool = False,
+            on_progress: Callback = None) -> Tuple[float, bool]:
+    """첫 질문이 이후 질문과 같은 지연으로 처리되도록 미리 준비한다.
+
+    자격 증명 조회, bedrock-agent 연결(KB 조회), retrieve용 클라이언트 모델 로드,
+    Agent 생성과 bedrock-runtime 연결까지 수행하고 (전체 소요 시간(초), 모든 단계 성공 여부)를 돌려준다.
+    """
+    notify = on_progress or _noop
+    started = time.perf_counter()
+    failed: List[str] = []
+
+    def step(name: str, fn: Callable[[], Any]):
+        t0 = time.perf_counter()
+        try:
+            fn()
+            notify(f"[사전 준비] {name} {time.perf_counter() - t0:.2f}초")
+        except Exception as e:
+            failed.append(name)
+            notify(f"[사전 준비] {name} 실패: {e}")
+
+    def resolve_credentials():
+        creds = aws_clients.get_session(region).get_credentials()
+        if creds is None:
+            raise RuntimeError("AWS 자격 증명을 찾을 수 없습니다")
+        creds.get_frozen_credentials()
+    step("자격 증명", resolve_credentials)
+    step("KB 연결", lambda: aws_clients.get_client("bedrock-agent", region).get_knowledge_base(knowledgeBaseId=kb_id))
+
+    def load_retrieve_client():
+        # strands retrieve 도구는 호출마다 기본 세션으로 클라이언트를 만든다.
+        # 서비스 모델 로드/자격 증명 조회를 미리 해 두면 첫 호출이 빨라진다.
+        import boto3
+        boto3.client("bedrock-agent-runtime", region_name=region or os.environ.get("AWS_REGION"))
+    step("retrieve 클라이언트", load_retrieve_client)
+
+    def prime_agent():
+        with pool.acquire(kb_id, region, allow_web, load_agent_prompt()) as agent:
+            client = getattr(agent.model, "client", None)
+            if client is not None:
+                # 토큰을 쓰지 않는 가벼운 호출로 bedrock-runtime TLS 연결만 미리 연다 (권한 오류는 무시)
+                try:
+                    client.list_async_invokes(maxResults=1)
+                except Exception:
+                    pass
+    step("에이전트 준비", prime_agent)
+
+    return time.perf_counter() - started, not failed
+
+
+# ---------- 업로드 ----------
+
+def upload(bucket: str, kb_id: Optional[str], prefix: str, files: List[str],
+           workers: int = DEFAULT_WORKERS, skip_unchanged: bool = True, multipart: bool = True,
+           part_size: int = DEFAULT_PART_SIZE, part_concurrency: int = DEFAULT_PART_CONCURRENCY,
+           extract: bool = True, on_progress: Callback = None,
+           cancel: Optional[threading.Event] = None) -> UploadReport:
+    notify = on_progress or _noop
+
+    index = None
+    if extract:
+        if extractor_available():
+            index = PageIndex()
+        else:
+            notify("[추출] pypdf가 설치되어 있지 않아 로컬 텍스트 추출을 건너뜁니다 (pip install pypdf)")
+
+    # boto3 클라이언트는 스레드 안전하므로 업로더 하나를 동시 업로드에 공유
+    uploader = aws_clients.get_uploader(bucket, kb_id)
+    mp = None
+    if multipart:
+        # 대용량 파일은 파트 단위로 올리고 중단 시 이어 올리기
+        mp = MultipartUploader(bucket, prefix, part_size=part_size, concurrency=part_concurrency,
+                               on_progress=notify, cancel=cancel)
+
+    def upload_one(f: str) -> str:
+        if mp and mp.wants(f):
+            return mp(f)
+        return uploader.upload_pdf(f, prefix)
+
+    # 중복 검사와 로컬 추출이 같은 파일의 해시를 한 번만 계산하도록 공유
+    digest = DigestCache()
+    dedup = None
+    if skip_unchanged:
+        # 내용이 같은 파일은 다시 올리지 않음 (다음 동기화 때 재색인도 피함)
+        upload_one = dedup = DedupUploader(bucket, prefix, upload_one, cancel=cancel, digest=digest)
+    # 로컬 텍스트 추출(CPU)은 업로드(네트워크)와 겹쳐서 진행
+    with ThreadPoolExecutor(max_workers=1) as side:
+        extracting = (side.submit(index_files, files, index, on_progress=notify, cancel=cancel, digest=digest)
+                      if index else None)
+        report = upload_files(files, upload_one, workers=workers, on_progress=notify, cancel=cancel)
+        if extracting is not None:
+            try:
+                notify(f"[추출 완료] {extracting.result().summary()}")
+            except Cancelled:
+                pass
+            except Exception as e:
+                notify(f"[추출 실패] {e}")
+            for r in report.results:
+                sha = index.lookup(r.path) if r.uri else None
+                if sha:
+                    index.set_uri(sha, r.uri, kb_id)
+    if report.uploaded:
+        # 다음 동기화가 필요한 변경으로 기록 (KB ID가 없으면 버킷의 변경으로)
+        changes = PendingChanges()
+        for r in report.uploaded:
+            changes.record(kb_id, r.uri, dedup.digests.get(r.uri) if dedup else None)
+    for r in report.failed:
+        notify(f"[실패 목록] {r.path}: {r.error}")
+    return report
+
+
+# ---------- 동기화 ----------
+
+def sync(kb_id: str, region: Optional[str], wait: bool = True,
+         on_progress: Callback = None, cancel: Optional[threading.Event] = None,
+         force: bool = False, timeout: Optional[float] = None) -> List[Dict[str, Any]]:
+    """ingestion job을 시작하고 (wait=True면) 끝날 때까지 (timeout초까지) 추적한다.
+
+    이전에 이 앱에서 동기화를 마친 적이 있고 그 뒤로 업로드된 변경이 없으면
+    (force가 아니라면) job을 시작하지 않고 빈 목록을 돌려준다.
+    """
+    notify = on_progress or _noop
+    changes = PendingChanges()
+    snapshot = changes.pending(kb_id, data_source_buckets(kb_id, region))
+    if not force and not snapshot and last_completed_job(kb_id):
+        notify("[동기화] 마지막 동기화 이후 업로드된 변경이 없어 건너뜁니다")
+        return []
+    if snapshot:
+        notify(f"[동기화] 마지막 동기화 이후 변경 {len(snapshot)}개")
+    jobs = start_sync(kb_id, region)
+    ids = ", ".join(j["ingestionJobId"] for j in jobs)
+    if not wait:
+        notify(f"[동기화] 작업 시작 (job: {ids}), 완료까지 수 분 소요")
+        return jobs
+    notify(f"[동기화] 작업 시작 (job: {ids}), 완료까지 상태를 추적합니다")
+    jobs = wait_for_jobs(kb_id, jobs, region, on_update=lambda msg: notify(f"[동기화] {msg}"),
+                         cancel=cancel, timeout=timeout)
+    if all(j.get("status") == "COMPLETE" for j in jobs):
+        # 시작 시점까지의 변경은 반영 완료. 동기화 중에 올라간 파일은 다음 동기화 대상으로 남는다
+        changes.commit(kb_id, snapshot)
+    if record_completed(kb_id, jobs):
+        # 색인 내용이 바뀌었으므로 이전 응답 캐시는 더 이상 유효하지 않음
+        removed = AnswerCache().invalidate(kb_id)
+        notify(f"[응답 캐시] KB={kb_id} 항목 {removed}개 무효화")
+    return jobs
+
+
+def describe_jobs(jobs: List[Dict[str, Any]]) -> str:
+    if not jobs:
+        return "변경 없음 (건너뜀)"
+    return ", ".join(f"{j['ingestionJobId']}={j['status']}" for j in jobs)